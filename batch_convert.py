@@ -0,0 +1,279 @@
+"""
+FLAC3D网格批量转换为Gmsh MSH的命令行入口
+
+用法:
+    python batch_convert.py [输入文件或通配符 ...] [-j 4] [-o "{stem}.msh"] [--output-dir out]
+                            [--skip mtime|hash|none] [--format msh22|msh41] [--binary] ...
+
+示例:
+    python batch_convert.py "stages/**/*.f3grid" -j 8 --output-dir msh --skip hash
+
+通配符由程序展开 (支持 ** 递归)，Windows命令行中不需要shell展开。多个文件由进程池并行转换，
+每个文件在一个进程中串行解析；已是最新的输出默认跳过。结束时打印每个文件的节点数、单元数、
+各类型单元数、耗时和源文件处理速度 (MB/s)，有文件转换失败时以非零状态退出。
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from f3grid_reader import ZONE_TYPE_NAMES
+from f3grid_cache import file_digest
+from stage_profiler import PROFILE_HOOKS, display_width as _width, ljust as _ljust, rjust as _rjust
+
+# 判断输出是否为最新的方式
+SKIP_MODES = ('mtime', 'hash', 'none')
+# hash 模式下记录源文件摘要和转换参数的附属文件: 输出文件名 + 后缀
+STAMP_SUFFIX = '.src.json'
+# 各阶段耗时报告: 输出文件名 + 后缀 (见 stage_profiler)
+REPORT_SUFFIX = '.stages.json'
+DEFAULT_OUTPUT = 'output_{stem}.msh'
+
+
+def expand_inputs(patterns):
+    """
+    展开文件名和通配符，去掉重复项并保持给出的顺序
+
+    返回:
+        files: 文件路径列表
+        unmatched: 没有匹配任何文件的参数
+    """
+    files, unmatched, seen = [], [], set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        else:
+            matches = [pattern] if os.path.isfile(pattern) else []
+        if not matches:
+            unmatched.append(pattern)
+        for path in matches:
+            key = os.path.normcase(os.path.abspath(path))
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files, unmatched
+
+
+def output_path(source, template=DEFAULT_OUTPUT, output_dir=None):
+    """
+    输出文件名: template 中 {stem} 为不含扩展名的源文件名，{name} 为源文件名；
+    output_dir 为None时输出到源文件所在目录
+    """
+    name = os.path.basename(source)
+    filename = template.format(stem=os.path.splitext(name)[0], name=name)
+    return os.path.join(output_dir if output_dir is not None else os.path.dirname(source), filename)
+
+
+def _stamp(source, options):
+    return {'digest': file_digest(source), 'options': options}
+
+
+def is_up_to_date(source, output, mode, options):
+    """
+    判断输出是否已是最新
+
+    mtime: 输出存在且修改时间不早于源文件 (不检查转换参数)；
+    hash: 附属文件中记录的源文件摘要和转换参数都与当前相同；
+    none: 总是重新转换
+    """
+    if mode == 'none' or not os.path.isfile(output):
+        return False
+    if mode == 'mtime':
+        return os.stat(output).st_mtime_ns >= os.stat(source).st_mtime_ns
+    try:
+        with open(output + STAMP_SUFFIX, 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return stamp == _stamp(source, options)
+
+
+def convert_file(source, output, options, skip='mtime', report=False, profile=None):
+    """
+    转换一个文件 (进程池中执行)，转换过程的输出收集为日志而不直接打印
+    report 为True时在输出文件旁写出各阶段的JSON报告，profile 见 f3grid_2_msh
+
+    返回:
+        result: {'source', 'output', 'status' ('转换'/'跳过'/'失败'), 'nodes', 'zones',
+                 'types' ({类型: 个数}), 'seconds', 'mb', 'log'}
+    """
+    result = {'source': source, 'output': output, 'status': '跳过', 'nodes': None, 'zones': None,
+              'types': {}, 'seconds': 0.0, 'mb': os.path.getsize(source) / 1e6, 'log': ''}
+    if is_up_to_date(source, output, skip, options):
+        return result
+
+    from f3grid_to_msh_finally import f3grid_2_msh  # 导入FiPy较慢，跳过的文件不需要
+
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            grid = f3grid_2_msh(source, output, report=output + REPORT_SUFFIX if report else None,
+                                profile=profile, **options)
+        except SystemExit:  # read_flac3d_grid 读取失败时退出
+            grid = None
+    result['seconds'] = time.perf_counter() - t0
+    result['log'] = log.getvalue()
+    if grid is None:
+        result['status'] = '失败'
+        return result
+
+    result.update(status='转换', nodes=grid.num_nodes, zones=grid.num_zones, types=grid.zone_type_counts())
+    if skip == 'hash':
+        with open(output + STAMP_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(_stamp(source, options), f, indent=1)
+    return result
+
+
+def convert_batch(jobs, options, workers=1, skip='mtime', progress=None, report=False, profile=None):
+    """
+    并行转换多个文件
+
+    参数:
+        jobs: [(源文件, 输出文件), ...]
+        options: 传给 f3grid_2_msh 的参数
+        workers: 进程数，1为在当前进程中依次转换，None为CPU核数
+        skip: 'mtime'、'hash' 或 'none'，见 is_up_to_date
+        progress: 每个文件完成时调用 progress(result)
+        report, profile: 见 convert_file
+
+    返回:
+        results: 与 jobs 顺序相同的结果列表 (见 convert_file)
+    """
+    results = [None] * len(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        for i, (source, output) in enumerate(jobs):
+            results[i] = convert_file(source, output, options, skip, report, profile)
+            if progress:
+                progress(results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_file, source, output, options, skip, report, profile): i
+                   for i, (source, output) in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:  # 子进程异常退出等
+                source, output = jobs[i]
+                results[i] = {'source': source, 'output': output, 'status': '失败', 'nodes': None,
+                              'zones': None, 'types': {}, 'seconds': 0.0, 'mb': 0.0, 'log': f"{e}\n"}
+            if progress:
+                progress(results[i])
+    return results
+
+
+def format_summary(results, wall_time=None):
+    """汇总表: 每个文件一行，最后一行为合计"""
+    converted = [r for r in results if r['status'] == '转换']
+    total_name = f"合计 {len(converted)}/{len(results)}"
+    name_width = max([_width(total_name)] + [_width(os.path.basename(r['source'])) for r in results]) + 2
+    header = _ljust('文件', name_width) + _ljust('状态', 6) + _rjust('节点', 10) + _rjust('单元', 10) + \
+             ''.join(f"{t:>9}" for t in ZONE_TYPE_NAMES) + _rjust('耗时(s)', 10) + f"{'MB/s':>9}"
+    lines = [header, '-' * _width(header)]
+
+    def row(name, status, nodes, zones, types, seconds, mb):
+        speed = f"{mb / seconds:>9.1f}" if seconds > 0 else f"{'-':>9}"
+        return _ljust(name, name_width) + _ljust(status, 6) + f"{nodes if nodes is not None else '-':>10}" \
+               f"{zones if zones is not None else '-':>10}" + \
+               ''.join(f"{types.get(t, 0):>9}" for t in ZONE_TYPE_NAMES) + f"{seconds:>10.2f}" + speed
+
+    for r in results:
+        lines.append(row(os.path.basename(r['source']), r['status'], r['nodes'], r['zones'],
+                         r['types'], r['seconds'], r['mb'] if r['status'] == '转换' else 0.0))
+
+    types = {t: sum(r['types'].get(t, 0) for r in converted) for t in ZONE_TYPE_NAMES}
+    seconds = sum(r['seconds'] for r in converted)
+    lines.append('-' * _width(header))
+    lines.append(row(total_name, '', sum(r['nodes'] for r in converted),
+                     sum(r['zones'] for r in converted), types, seconds, sum(r['mb'] for r in converted)))
+    if wall_time is not None:
+        mb = sum(r['mb'] for r in converted)
+        lines.append(f"总耗时 {wall_time:.2f}s" + (f"，整体 {mb / wall_time:.1f} MB/s" if wall_time > 0 else ''))
+    return '\n'.join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="FLAC3D网格 (.f3grid) 批量转换为Gmsh MSH")
+    parser.add_argument('inputs', nargs='*', default=['geo.f3grid'],
+                        help="输入文件或通配符 (支持 **)，默认 geo.f3grid")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help="输出文件名模板，{stem} 为不含扩展名的源文件名，{name} 为源文件名 "
+                             f"(默认 {DEFAULT_OUTPUT})")
+    parser.add_argument('--output-dir', default=None, help="输出目录，默认为源文件所在目录")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="并行转换的进程数，0为CPU核数 (默认1)")
+    parser.add_argument('--skip', choices=SKIP_MODES, default='mtime',
+                        help="跳过已是最新的输出: mtime 比较修改时间，hash 比较源文件摘要和转换参数，"
+                             "none 总是转换 (默认 mtime)")
+    parser.add_argument('-f', '--force', action='store_true', help="总是重新转换，同 --skip none")
+    parser.add_argument('--format', choices=('msh22', 'msh41'), default='msh22', help="输出格式")
+    parser.add_argument('--binary', action='store_true', help="写出二进制MSH")
+    parser.add_argument('--renumber', choices=('rcm',), default=None, help="节点重新编号方式")
+    parser.add_argument('--sort-elements', choices=('hilbert', 'morton'), default=None,
+                        help="在各类型块内按空间填充曲线排序单元")
+    parser.add_argument('--zone-slot', default=None, help="写为物理组的单元组slot")
+    parser.add_argument('--face-slot', default=None, help="写为物理组的面组slot")
+    parser.add_argument('--no-repair', action='store_true', help="不修复负体积单元")
+    parser.add_argument('--no-cache', action='store_true', help="不使用源文件旁的二进制缓存")
+    parser.add_argument('--fipy-check', action='store_true', help="写出后用FiPy读入检查")
+    parser.add_argument('--report', action='store_true',
+                        help=f"在每个输出文件旁写出各阶段耗时和内存的JSON报告 (输出文件名{REPORT_SUFFIX})")
+    parser.add_argument('--profile', choices=PROFILE_HOOKS, default=None,
+                        help="报告中附加 cProfile 热点函数或 tracemalloc 内存分配，需要 --report")
+    parser.add_argument('-v', '--verbose', action='store_true', help="打印每个文件的转换过程")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile and not args.report:
+        parser.error("--profile 的结果写在报告中，需要同时指定 --report")
+    files, unmatched = expand_inputs(args.inputs)
+    for pattern in unmatched:
+        print(f"警告：没有匹配的文件: {pattern}")
+    if not files:
+        print("没有需要转换的文件")
+        return 1
+
+    jobs = [(source, output_path(source, args.output, args.output_dir)) for source in files]
+    outputs = {}
+    for source, output in jobs:
+        key = os.path.normcase(os.path.abspath(output))
+        if key in outputs:
+            print(f"错误：{outputs[key]} 和 {source} 的输出文件相同: {output}，请在模板中使用 {{stem}}")
+            return 1
+        outputs[key] = source
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {'cache': not args.no_cache, 'binary': args.binary, 'format': args.format,
+               'renumber': args.renumber, 'sort_elements': args.sort_elements,
+               'zone_slot': args.zone_slot, 'face_slot': args.face_slot,
+               'repair': not args.no_repair, 'fipy_check': args.fipy_check}
+    skip = 'none' if args.force else args.skip
+    workers = args.workers or os.cpu_count()
+    print(f"转换 {len(jobs)} 个文件，{min(workers, len(jobs))} 个进程")
+
+    def progress(result):
+        if args.verbose or result['status'] == '失败':
+            print(result['log'], end='')
+        print(f"[{result['status']}] {result['source']} -> {result['output']}")
+
+    t0 = time.perf_counter()
+    results = convert_batch(jobs, options, workers=workers, skip=skip, progress=progress,
+                            report=args.report, profile=args.profile)
+    print()
+    print(format_summary(results, time.perf_counter() - t0))
+    return 1 if any(r['status'] == '失败' for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+对比经MSH文件 (write_msh22 + Gmsh3D) 与在内存中直接创建 (fipy_mesh.create_fipy_mesh) FiPy网格的耗时
+
+用法:
+    python benchmarks/bench_fipy_mesh.py [--source geo.f3grid] [--copies 1] [--repeat 3]
+
+示例网格可在内存中复制 copies 份以放大差异。两种方式得到的网格逐项比较
+顶点、面-顶点、单元-面连接、单元体积以及物理组掩码，任何不一致时以非零状态退出。
+耗时取多次中最快的一次。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fipy import Gmsh3D
+from f3grid_reader import read_flac3d_arrays
+from msh_writer import element_blocks, grid_blocks, write_msh22
+from mesh_quality import repair_orientation
+from fipy_mesh import create_fipy_mesh
+from bench_msh_writer import tile_grid
+
+
+def compare(reference, mesh):
+    """逐项比较两个FiPy网格，返回不一致项的说明列表"""
+    errors = []
+    for name in ('vertexCoords', 'faceVertexIDs', 'cellFaceIDs', '_orderedCellVertexIDs'):
+        a, b = getattr(reference, name), getattr(mesh, name)
+        if a.shape != b.shape or not np.array_equal(np.ma.filled(a, -1), np.ma.filled(b, -1)):
+            errors.append(f"{name} 不同")
+    if not np.allclose(np.asarray(reference.cellVolumes), np.asarray(mesh.cellVolumes)):
+        errors.append("单元体积不同")
+    for what in ('physicalCells', 'physicalFaces'):
+        a, b = getattr(reference, what), getattr(mesh, what)
+        if sorted(a) != sorted(b):
+            errors.append(f"{what} 名称不同")
+        errors += [f"{what}[{k}] 不同" for k in sorted(set(a) & set(b))
+                   if not np.array_equal(a[k].value, b[k].value)]
+    return errors
+
+
+def best_time(func, repeat):
+    """返回 (最快一次的秒数, 最后一次的结果)"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.path.join(ROOT, 'geo.f3grid'))
+    parser.add_argument('--copies', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    grid = read_flac3d_arrays(args.source).compact_nodes()
+    if args.copies > 1:
+        # 复制后的网格没有单元组和面组
+        vertices, zone_types, offsets, connectivity = tile_grid(grid, args.copies)
+        blocks, tags, physical_names = element_blocks(zone_types, offsets, connectivity, reorder=True), None, ()
+    else:
+        vertices = grid.vertices
+        blocks, tags, physical_names = grid_blocks(grid, reorder=True)
+    repair_orientation(vertices, blocks)
+    print(f"节点: {len(vertices)}, 单元: {sum(len(nodes) for _, _, nodes in blocks)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'mesh.msh')
+
+        def through_file():
+            write_msh22(filename, vertices, blocks, tags=tags, physical_names=physical_names)
+            return Gmsh3D(filename)
+
+        t_file, reference = best_time(through_file, args.repeat)
+        t_memory, mesh = best_time(lambda: create_fipy_mesh(vertices, blocks, tags, physical_names), args.repeat)
+
+    errors = compare(reference, mesh)
+    print(f"{'方式':<16}{'耗时(s)':>10}")
+    print(f"{'MSH文件':<16}{t_file:>10.3f}")
+    print(f"{'内存':<16}{t_memory:>10.3f}")
+    print(f"加速比: {t_file / t_memory:.1f}x, 结果{'一致' if not errors else '不一致'}")
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
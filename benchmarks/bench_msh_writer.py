@@ -0,0 +1,96 @@
+"""
+对比逐行写出与分块批量写出Gmsh MSH 2.2文件的速度
+
+用法:
+    python benchmarks/bench_msh_writer.py [--copies 20] [--source geo.f3grid]
+
+将示例网格在内存中复制 copies 份，分别用旧的逐行 f.write 方式和
+msh_writer.write_msh22 写出，并按 单元数/秒 比较吞吐量。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f3grid_reader import read_flac3d_arrays, ZONE_TYPE_NAMES
+from msh_writer import element_blocks, write_msh22
+
+
+def create_gmsh_mesh_legacy(vertices, cells, cell_types, filename):
+    """原 create_gmsh_mesh 的逐行写出实现 (去掉了打印)，作为对比基准"""
+    with open(filename, 'w') as f:
+        f.write("$MeshFormat\n")
+        f.write("2.2 0 8\n")
+        f.write("$EndMeshFormat\n\n")
+        f.write("$PhysicalNames\n")
+        f.write("0\n")
+        f.write("$EndPhysicalNames\n\n")
+        f.write("$Nodes\n")
+        f.write(f"{len(vertices)}\n")
+        for i, vertex in enumerate(vertices):
+            f.write(f"{i+1} {vertex[0]} {vertex[1]} {vertex[2]}\n")
+        f.write("$EndNodes\n\n")
+        f.write("$Elements\n")
+        f.write(f"{len(cells)}\n")
+        cell_type_map = {'T4': 4, 'B8': 5, 'W6': 6, 'P5': 7}
+        for i, (cell, cell_type) in enumerate(zip(cells, cell_types)):
+            gmsh_type = cell_type_map.get(cell_type, 4)
+            f.write(f"{i+1} {gmsh_type} 2 0 0")
+            for node_idx in cell[1:]:
+                f.write(f" {node_idx+1}")
+            f.write("\n")
+        f.write("$EndElements\n")
+
+
+def tile_grid(grid, copies):
+    """在内存中把网格复制 copies 份，返回 (vertices, zone_types, offsets, connectivity)"""
+    num_nodes = grid.num_nodes
+    shift = grid.vertices[:, 0].max() - grid.vertices[:, 0].min()
+    vertices = np.concatenate([grid.vertices + [k * shift, 0, 0] for k in range(copies)])
+    zone_types = np.tile(grid.zone_types, copies)
+    connectivity = np.concatenate([grid.connectivity + k * num_nodes for k in range(copies)])
+    counts = np.tile(np.diff(grid.offsets), copies)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return vertices, zone_types, offsets, connectivity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.path.join(ROOT, 'geo.f3grid'))
+    parser.add_argument('--copies', type=int, default=20)
+    args = parser.parse_args()
+
+    vertices, zone_types, offsets, connectivity = tile_grid(read_flac3d_arrays(args.source), args.copies)
+    num_zones = len(zone_types)
+
+    # 旧接口的输入: cells 为 [单元编号-1, 节点编号-1, ...] 的列表
+    conn = (connectivity - 1).tolist()
+    bounds = offsets.tolist()
+    cells = [[i] + conn[a:b] for i, (a, b) in enumerate(zip(bounds[:-1], bounds[1:]))]
+    cell_types = np.array(ZONE_TYPE_NAMES)[zone_types].tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        create_gmsh_mesh_legacy(vertices, cells, cell_types, os.path.join(tmp, 'legacy.msh'))
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        write_msh22(os.path.join(tmp, 'batched.msh'), vertices,
+                    element_blocks(zone_types, offsets, connectivity))
+        t_new = time.perf_counter() - t0
+
+    print(f"节点: {len(vertices)}, 单元: {num_zones}")
+    print(f"{'方法':<24}{'耗时(s)':>10}{'单元/秒':>14}")
+    print(f"{'逐行 f.write':<24}{t_old:>10.3f}{num_zones / t_old:>14.0f}")
+    print(f"{'write_msh22 (分块)':<24}{t_new:>10.3f}{num_zones / t_new:>14.0f}")
+    print(f"加速比: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
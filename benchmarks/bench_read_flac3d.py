@@ -0,0 +1,121 @@
+"""
+对比逐行解析与整块数组解析读取FLAC3D网格的速度
+
+用法:
+    python benchmarks/bench_read_flac3d.py [--copies 100] [--source geo.f3grid]
+
+将示例网格复制 copies 份 (节点/单元编号依次偏移，坐标沿X方向平移)，
+然后分别用旧的逐行读取方式和 read_flac3d_arrays 读取并比较耗时。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f3grid_reader import read_flac3d_arrays, ZONE_TYPE_NAMES
+
+
+def read_flac3d_legacy(filename):
+    """原 read_flac3d 的逐行解析实现 (去掉了打印和编号检查)，作为对比基准"""
+    vertices = []
+    cells = []
+    cell_types = []
+    with open(filename, 'r', encoding='latin-1') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('G'):
+                parts = line.split()
+                if len(parts) >= 4:
+                    try:
+                        int(parts[1])
+                        vertices.append([float(parts[2]), float(parts[3]), float(parts[4])])
+                    except (ValueError, IndexError):
+                        continue
+            elif line.startswith('Z'):
+                parts = line.split()
+                if len(parts) >= 3:
+                    node_indices = []
+                    for idx in parts[2:]:
+                        try:
+                            node_indices.append(int(idx) - 1)
+                        except ValueError:
+                            continue
+                    if node_indices:
+                        cells.append(node_indices)
+                        cell_types.append(parts[1])
+    return np.array(vertices), cells, cell_types
+
+
+def replicate_f3grid(source, target, copies):
+    """把 source 网格复制 copies 份写入 target"""
+    grid = read_flac3d_arrays(source)
+    node_step = int(grid.node_ids.max())
+    zone_step = int(grid.zone_ids.max())
+    shift = grid.vertices[:, 0].max() - grid.vertices[:, 0].min()
+
+    with open(target, 'w') as f:
+        f.write("* FLAC3D grid replicated for benchmark\n")
+        f.write("* GRIDPOINTS\n")
+        for k in range(copies):
+            block = np.column_stack((grid.node_ids + k * node_step, grid.vertices))
+            block[:, 1] += k * shift
+            np.savetxt(f, block, fmt="G %9d %22.14E %22.14E %22.14E")
+
+        f.write("* ZONES\n")
+        for k in range(copies):
+            for code, name in enumerate(ZONE_TYPE_NAMES):
+                mask = grid.zone_types == code
+                if not mask.any():
+                    continue
+                starts = grid.offsets[:-1][mask]
+                n = grid.offsets[1 + np.flatnonzero(mask)[0]] - starts[0]
+                conn = grid.connectivity[starts[:, None] + np.arange(n)]
+                block = np.column_stack((grid.zone_ids[mask] + k * zone_step, conn + k * node_step))
+                np.savetxt(f, block, fmt=f"Z {name}" + " %d" * (n + 1))
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.path.join(ROOT, 'geo.f3grid'))
+    parser.add_argument('--copies', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, 'replicated.f3grid')
+        print(f"生成测试网格: {args.copies} 份 {args.source}")
+        replicate_f3grid(args.source, target, args.copies)
+        size_mb = os.path.getsize(target) / 1e6
+
+        t_new, grid = best_of(lambda: read_flac3d_arrays(target), args.repeat)
+        t_old, (vertices, cells, _) = best_of(lambda: read_flac3d_legacy(target), args.repeat)
+
+        assert np.array_equal(vertices, grid.vertices)
+        assert len(cells) == grid.num_zones
+
+    print(f"文件大小: {size_mb:.1f} MB, 节点: {grid.num_nodes}, 单元: {grid.num_zones}")
+    print(f"{'方法':<22}{'耗时(s)':>10}{'MB/s':>10}")
+    print(f"{'read_flac3d (逐行)':<22}{t_old:>10.3f}{size_mb / t_old:>10.1f}")
+    print(f"{'read_flac3d_arrays':<22}{t_new:>10.3f}{size_mb / t_new:>10.1f}")
+    print(f"加速比: {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+各处理步骤随网格规模的吞吐量曲线
+
+用法:
+    python benchmarks/bench_scaling.py [--sizes 1e3 1e4 1e5 1e6] [--workdir DIR] [--repeat 1]
+                                       [--output results.json] [--plot curves.png]
+    python benchmarks/bench_scaling.py --compare a.json b.json --plot compare.png
+
+用 synthetic_grid 生成各规模的网格 (类型比例与 geo.f3grid 相近)，依次计时:
+    read_flac3d, create_gmsh_mesh (FLAC3D节点顺序写出), convert_msh_node_order,
+    f3grid_2_msh (完整转换), 以及 vtk_viewer 的 load_vtk_file (需要 PyQt5 和 vtk，无显示时用offscreen)
+报告每一步的耗时、单元数/秒和源文件MB/秒，结果连同当前提交写为JSON，
+不同提交的结果可用 --compare 画在同一张图上比较。默认规模到 1e6；1e7 单元的源文件约1GB，
+read_flac3d 返回的Python列表需要十几GB内存。
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_grid import generate
+
+STAGES = ('read_flac3d', 'create_gmsh_mesh', 'convert_msh_node_order', 'f3grid_2_msh', 'load_vtk_file')
+DEFAULT_SIZES = (1e3, 1e4, 1e5, 1e6)
+
+
+def git_commit():
+    """当前提交和工作区是否有改动，不在git仓库中时为 (None, None)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def timed(func, repeat):
+    """最快一次的秒数，函数的打印输出被丢弃"""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def make_viewer():
+    """创建 VTKViewer (无显示时用offscreen平台)，缺少依赖时返回None"""
+    try:
+        if not os.environ.get('DISPLAY') and sys.platform.startswith('linux'):
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        import vtk
+        from PyQt5.QtWidgets import QApplication
+        vtk.vtkObject.GlobalWarningDisplayOff()
+        app = QApplication.instance() or QApplication([])
+        with contextlib.redirect_stdout(io.StringIO()):
+            from vtk_viewer import VTKViewer
+            viewer = VTKViewer()
+        return app, viewer
+    except ImportError as e:
+        print(f"跳过 load_vtk_file: {e}")
+        return None
+
+
+def run_size(num_zones, workdir, repeat, viewer):
+    """生成 (或复用) 一个规模的网格并计时各步骤，返回结果列表"""
+    from f3grid_to_msh_finally import read_flac3d, create_gmsh_mesh, convert_msh_node_order, f3grid_2_msh
+
+    source = os.path.join(workdir, f"synthetic_{num_zones}.f3grid")
+    vtk_file = os.path.join(workdir, f"synthetic_{num_zones}.vtk")
+    if not (os.path.isfile(source) and os.path.isfile(vtk_file)):
+        generate(source, num_zones, vtk_filename=vtk_file if viewer else None)
+    msh = os.path.join(workdir, f"synthetic_{num_zones}.msh")
+    reordered = os.path.join(workdir, f"synthetic_{num_zones}_gmsh.msh")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        vertices, cells, cell_types = read_flac3d(source)
+    source_mb = os.path.getsize(source) / 1e6
+    stages = {
+        'read_flac3d': (lambda: read_flac3d(source), source_mb),
+        'create_gmsh_mesh': (lambda: create_gmsh_mesh(vertices, cells, cell_types, msh), None),
+        'convert_msh_node_order': (lambda: convert_msh_node_order(msh, reordered), None),
+        'f3grid_2_msh': (lambda: f3grid_2_msh(source, reordered, cache=False), source_mb),
+    }
+    if viewer:
+        stages['load_vtk_file'] = (lambda: viewer[1].load_vtk_file(vtk_file), None)
+
+    results = []
+    for stage, (func, mb) in stages.items():
+        seconds = timed(func, repeat)
+        if mb is None:
+            # 写出的步骤按输出文件大小，转换按输入文件大小计算
+            mb = os.path.getsize({'create_gmsh_mesh': msh, 'convert_msh_node_order': msh,
+                                  'load_vtk_file': vtk_file}[stage]) / 1e6
+        results.append({'stage': stage, 'zones': len(cells), 'nodes': len(vertices), 'mb': mb,
+                        'seconds': seconds, 'zones_per_s': len(cells) / seconds, 'mb_per_s': mb / seconds})
+    for filename in (msh, reordered):
+        if os.path.exists(filename):
+            os.remove(filename)
+    return results
+
+
+def plot(reports, filename):
+    """每个步骤一张子图: 横轴单元数、纵轴单元数/秒 (对数坐标)，每个报告一条曲线"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    stages = [s for s in STAGES if any(r['stage'] == s for report in reports for r in report['results'])]
+    fig, axes = plt.subplots(1, len(stages), figsize=(4 * len(stages), 3.6), squeeze=False)
+    for ax, stage in zip(axes[0], stages):
+        for report in reports:
+            rows = sorted((r['zones'], r['zones_per_s']) for r in report['results'] if r['stage'] == stage)
+            if rows:
+                label = (report.get('commit') or '?') + ('+' if report.get('dirty') else '')
+                ax.plot(*zip(*rows), marker='o', label=label)
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_title(stage)
+        ax.set_xlabel('zones')
+        ax.grid(True, which='both', alpha=0.3)
+    axes[0][0].set_ylabel('zones / s')
+    axes[0][-1].legend()
+    fig.tight_layout()
+    fig.savefig(filename, dpi=120)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=DEFAULT_SIZES, help="目标单元数")
+    parser.add_argument('--workdir', default=None, help="存放生成网格的目录，已存在的网格直接复用；默认为临时目录")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-viewer', action='store_true', help="不计时 load_vtk_file")
+    parser.add_argument('--output', default=None, help="结果JSON文件，默认 scaling_<提交>.json")
+    parser.add_argument('--plot', default=None, help="吞吐量曲线图 (PNG)")
+    parser.add_argument('--compare', nargs='+', default=None, help="只把已有的结果JSON画在一张图上")
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for filename in args.compare:
+            with open(filename, 'r', encoding='utf-8') as f:
+                reports.append(json.load(f))
+        plot(reports, args.plot or 'scaling_compare.png')
+        return
+
+    commit, dirty = git_commit()
+    viewer = None if args.no_viewer else make_viewer()
+    report = {'commit': commit, 'dirty': dirty, 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'platform': platform.platform(), 'results': []}
+
+    print(f"{'单元':>10}{'节点':>10}  {'步骤':<24}{'耗时(s)':>10}{'单元/s':>12}{'MB/s':>9}")
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(workdir, exist_ok=True)
+        for size in args.sizes:
+            for r in run_size(int(size), workdir, args.repeat, viewer):
+                report['results'].append(r)
+                print(f"{r['zones']:>10}{r['nodes']:>10}  {r['stage']:<24}{r['seconds']:>10.3f}"
+                      f"{r['zones_per_s']:>12.0f}{r['mb_per_s']:>9.1f}")
+
+    output = args.output or f"scaling_{commit or 'unknown'}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=1)
+    print(f"结果已写出: {output}")
+    if args.plot:
+        plot([report], args.plot)
+        print(f"曲线已写出: {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+MSH 4.1 与 MSH 2.2 输出的往返一致性检查
+
+用法:
+    python benchmarks/check_msh41_roundtrip.py [--source geo.f3grid]
+
+把网格分别写为 MSH 2.2 和 MSH 4.1 (ASCII、二进制)，再用 msh_reader.read_msh 读回，
+检查节点编号、坐标、各类型单元的节点和物理标签以及物理名称完全一致，
+并报告写出和读入的耗时。已安装 meshio 时，同时检查 meshio 读入的4.1文件。
+任何不一致时以非零状态退出。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f3grid_reader import read_flac3d_arrays
+from msh_writer import grid_blocks, write_msh22
+from msh41_writer import write_msh41
+from msh_reader import read_msh, read_physical_names
+
+
+def compare(reference, result):
+    """比较两次 read_msh 的结果，返回不一致项的说明列表"""
+    errors = []
+    if not np.array_equal(reference[0], result[0]):
+        errors.append("节点编号不同")
+    if not np.array_equal(reference[1], result[1]):
+        errors.append("节点坐标不同")
+    ref_blocks = {gmsh_type: (tags, nodes) for gmsh_type, _, tags, nodes in reference[2]}
+    blocks = {gmsh_type: (tags, nodes) for gmsh_type, _, tags, nodes in result[2]}
+    if sorted(ref_blocks) != sorted(blocks):
+        errors.append(f"单元类型不同: {sorted(ref_blocks)} / {sorted(blocks)}")
+    for gmsh_type in sorted(set(ref_blocks) & set(blocks)):
+        # MSH 4.1 的实体编号与MSH 2.2的几何实体标签不同，只比较物理标签和节点
+        (ref_tags, ref_nodes), (tags, nodes) = ref_blocks[gmsh_type], blocks[gmsh_type]
+        if not (np.array_equal(ref_nodes, nodes) and np.array_equal(ref_tags[:, 0], tags[:, 0])):
+            errors.append(f"Gmsh类型 {gmsh_type} 的单元不同")
+    return errors
+
+
+def check_meshio(filename, reference):
+    """用 meshio 读入4.1文件，检查坐标和各类型单元数"""
+    import meshio
+
+    mesh = meshio.read(filename)
+    counts = {}
+    for block in mesh.cells:
+        counts[block.type] = counts.get(block.type, 0) + len(block.data)
+    expected = {'triangle': 2, 'quad': 3, 'tetra': 4, 'hexahedron': 5, 'wedge': 6, 'pyramid': 7}
+    ref_counts = {name: len(nodes) for name, t in expected.items()
+                  for gmsh_type, _, _, nodes in reference[2] if gmsh_type == t}
+    errors = []
+    if not np.array_equal(mesh.points, reference[1]):
+        errors.append("meshio: 节点坐标不同")
+    if counts != ref_counts:
+        errors.append(f"meshio: 单元数不同 {counts} / {ref_counts}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--source', default=os.path.join(ROOT, 'geo.f3grid'))
+    args = parser.parse_args()
+
+    grid = read_flac3d_arrays(args.source).compact_nodes()
+    blocks, tags, physical_names = grid_blocks(grid, reorder=True)
+    try:
+        import meshio  # noqa: F401
+        has_meshio = True
+    except ImportError:
+        has_meshio = False
+
+    errors = []
+    print(f"{'格式':<16}{'写出(s)':>10}{'读入(s)':>10}{'大小(MB)':>10}  结果")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = None
+        for name, writer, binary in (('msh22', write_msh22, False), ('msh22 binary', write_msh22, True),
+                                     ('msh41', write_msh41, False), ('msh41 binary', write_msh41, True)):
+            filename = os.path.join(tmp, name.replace(' ', '_') + '.msh')
+            t0 = time.perf_counter()
+            writer(filename, grid.vertices, blocks, tags=tags, binary=binary, physical_names=physical_names)
+            t_write = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            result = read_msh(filename)
+            t_read = time.perf_counter() - t0
+
+            problems = [] if reference is None else compare(reference, result)
+            if read_physical_names(filename) != physical_names:
+                problems.append("物理名称不同")
+            if has_meshio and name.startswith('msh41'):
+                problems += check_meshio(filename, result)
+            reference = reference or result
+            errors += [f"{name}: {p}" for p in problems]
+            size = os.path.getsize(filename) / 1e6
+            print(f"{name:<16}{t_write:>10.3f}{t_read:>10.3f}{size:>10.2f}  {'一致' if not problems else '不一致'}")
+
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+四边形面节点环形顺序 (element_order.cyclic_quad_order) 的检查
+
+用法:
+    python benchmarks/check_quad_order.py [--count 10000] [--seed 0] [--source geo.f3grid]
+
+随机生成凸四边形 (任意朝向，带少量翘曲)，把环形节点顺序按 0-1-2-3、0-1-3-2 (蝴蝶结)、
+0-2-1-3 (蝴蝶结) 以及全部24种排列打乱后交给 cyclic_quad_order，检查重排后的节点
+都是原四边形的环形顺序 (允许旋转和反向)，并检查示例网格中重排后的Q4面都不自相交。
+任何不一致时以非零状态退出。
+"""
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from element_order import cyclic_quad_order
+from f3grid_reader import FACE_TYPE_CODES, read_flac3d_arrays, id_index
+
+# 文件中节点顺序的三种环形类型: 正常、两种蝴蝶结
+CROSSED_ORDERS = {'0-1-2-3': (0, 1, 2, 3), '0-1-3-2': (0, 1, 3, 2), '0-2-1-3': (0, 2, 1, 3)}
+# 随机四边形相邻角点的最小圆心角 (弧度)
+MIN_GAP = 0.3
+
+
+def random_quads(count, rng):
+    """
+    (count, 4, 3) 按环形顺序排列的凸四边形: 圆上按角度排列的四点 (圆内接四边形总是凸的，
+    相邻角点的圆心角不小于 MIN_GAP，不会退化为三角形) 经随机拉伸、旋转和平移，翘曲不超过尺寸的2%
+    """
+    gaps = MIN_GAP + (2 * np.pi - 4 * MIN_GAP) * rng.dirichlet(np.ones(4), count)
+    angles = np.cumsum(gaps, axis=1) + rng.uniform(0, 2 * np.pi, (count, 1))
+    local = np.stack([np.cos(angles) * rng.uniform(0.2, 5.0, (count, 1)), np.sin(angles),
+                      rng.uniform(-0.02, 0.02, (count, 4))], axis=2)
+    rotation, _ = np.linalg.qr(rng.normal(size=(count, 3, 3)))
+    return np.einsum('nij,nkj->nki', rotation, local) * rng.uniform(0.01, 100, (count, 1, 1)) \
+        + rng.uniform(-1e5, 1e5, (count, 1, 3))
+
+
+def is_cyclic(order, permutation):
+    """permutation 打乱后按 order 取出的节点是否为原来的环形顺序 0-1-2-3 (可旋转、反向)"""
+    nodes = np.asarray(permutation)[order]
+    steps = (np.diff(np.concatenate([nodes, nodes[:, :1]], axis=1), axis=1)) % 4
+    return (steps == 1).all(axis=1) | (steps == 3).all(axis=1)
+
+
+def crossed(points):
+    """按给定顺序连接的四边形是否自相交: 两个相对角的三角形法向相反"""
+    p0, p1, p2, p3 = points[:, 0], points[:, 1], points[:, 2], points[:, 3]
+    return np.einsum('ij,ij->i', np.cross(p1 - p0, p2 - p0), np.cross(p2 - p0, p3 - p0)) < 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=os.path.join(ROOT, 'geo.f3grid'))
+    args = parser.parse_args()
+
+    quads = random_quads(args.count, np.random.default_rng(args.seed))
+    errors = []
+    permutations = {name: p for name, p in CROSSED_ORDERS.items()}
+    permutations.update({'-'.join(map(str, p)): p for p in itertools.permutations(range(4))})
+    for name, permutation in permutations.items():
+        order = cyclic_quad_order(quads[:, permutation])
+        bad = int((~is_cyclic(order, permutation)).sum())
+        if name in CROSSED_ORDERS or bad:
+            print(f"{name}: {args.count - bad}/{args.count} 正确")
+        if bad:
+            errors.append(f"按 {name} 给出的节点有 {bad} 个面顺序错误")
+
+    if os.path.isfile(args.source):
+        grid = read_flac3d_arrays(args.source)
+        quad = np.flatnonzero(grid.face_types == FACE_TYPE_CODES['Q4'])
+        nodes = grid.face_connectivity[grid.face_offsets[quad][:, None] + np.arange(4)]
+        points = grid.vertices[id_index(grid.node_ids, nodes, '节点')]
+        ordered = np.take_along_axis(points, cyclic_quad_order(points)[:, :, None], axis=1)
+        bad = int(crossed(ordered).sum())
+        print(f"{os.path.basename(args.source)}: {len(quad)} 个Q4面，原顺序自相交 {int(crossed(points).sum())} 个，"
+              f"重排后 {bad} 个")
+        if bad:
+            errors.append(f"{args.source} 中重排后仍有 {bad} 个自相交的面")
+
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+生成指定规模和单元类型比例的FLAC3D网格 (.f3grid)，用于测试各处理步骤随网格规模的变化
+
+用法:
+    python benchmarks/synthetic_grid.py 1000000 -o synthetic_1e6.f3grid [--mix B8=0.32,W6=0.05,P5=0.35,T4=0.28]
+                                       [--seed 0] [--jitter 0.1] [--vtk synthetic_1e6.vtk]
+
+网格为规则立方体格子，每个立方体按比例随机取一种剖分:
+    B8: 1个六面体; W6: 沿底面对角线分为2个楔形; P5: 以立方体中心为顶点分为6个金字塔;
+    T4: 沿体对角线分为6个四面体 (Kuhn剖分)
+相邻立方体的剖分不要求共形。内部节点随机扰动 jitter 倍格距，所有单元的有向体积为正，
+节点按FLAC3D顺序写出 (Gmsh顺序经 element_order 的索引表逆变换)。
+文件中带按高度分层的单元组和底面、顶面的面组，与示例文件的各区段相同。
+默认类型比例与 geo.f3grid 相近。
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from f3grid_reader import Flac3DGrid, ZONE_TYPE_NAMES
+from element_order import element_types
+from mesh_quality import repair_orientation
+from msh_writer import _format_rows
+
+# geo.f3grid 中各类型单元所占比例
+DEFAULT_MIX = {'B8': 0.32, 'W6': 0.05, 'P5': 0.35, 'T4': 0.28}
+# 每个立方体剖分出的单元数
+ZONES_PER_CUBE = {'B8': 1, 'W6': 2, 'P5': 6, 'T4': 6}
+# 单元组按高度分的层数
+NUM_LAYERS = 4
+# 每批格式化的行数
+BATCH_SIZE = 100000
+
+# 立方体角点 (Gmsh六面体顺序) 的格子偏移
+_CORNERS = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                     [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]])
+# 各类型剖分出的单元 (立方体角点位置，8 为立方体中心)，按Gmsh节点顺序，方向由 repair_orientation 统一
+_SPLITS = {
+    'B8': [[0, 1, 2, 3, 4, 5, 6, 7]],
+    'W6': [[0, 1, 2, 4, 5, 6], [0, 2, 3, 4, 6, 7]],
+    'P5': [[0, 1, 2, 3, 8], [4, 7, 6, 5, 8], [0, 4, 5, 1, 8],
+           [1, 5, 6, 2, 8], [2, 6, 7, 3, 8], [3, 7, 4, 0, 8]],
+    'T4': [[0, 1, 2, 6], [0, 5, 1, 6], [0, 4, 5, 6], [0, 7, 4, 6], [0, 3, 7, 6], [0, 2, 3, 6]],
+}
+# 底面和顶面: 六面体、金字塔为四边形，楔形和四面体沿 0-2 / 4-6 对角线分为两个三角形
+_BOUNDARY_FACES = {
+    'bottom': {'quad': [[0, 3, 2, 1]], 'tri': [[0, 2, 1], [0, 3, 2]]},
+    'top': {'quad': [[4, 5, 6, 7]], 'tri': [[4, 5, 6], [4, 6, 7]]},
+}
+
+
+def parse_mix(text):
+    """'B8=0.3,T4=0.7' -> {'B8': 0.3, 'T4': 0.7}"""
+    mix = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        if name.strip() not in ZONES_PER_CUBE:
+            raise ValueError(f"不支持的单元类型: {name}，可选 {', '.join(ZONES_PER_CUBE)}")
+        mix[name.strip()] = float(value)
+    return mix
+
+
+def lattice_shape(num_zones, mix=None):
+    """
+    满足单元数的立方体格子尺寸
+
+    返回:
+        shape: (nx, ny, nz)
+        cube_mix: {类型: 立方体取该剖分的概率}
+    """
+    mix = mix or DEFAULT_MIX
+    weights = {t: w / ZONES_PER_CUBE[t] for t, w in mix.items() if w > 0}
+    total = sum(weights.values())
+    cube_mix = {t: w / total for t, w in weights.items()}
+    zones_per_cube = sum(p * ZONES_PER_CUBE[t] for t, p in cube_mix.items())
+    num_cubes = max(1, int(round(num_zones / zones_per_cube)))
+    n = max(1, int(round(num_cubes ** (1 / 3))))
+    return (n, n, max(1, int(np.ceil(num_cubes / (n * n))))), cube_mix
+
+
+def synthetic_grid(num_zones, mix=None, seed=0, jitter=0.1):
+    """
+    生成网格数组 (节点编号 1..N，单元节点为FLAC3D顺序)
+
+    返回:
+        grid: f3grid_reader.Flac3DGrid (不含单元组和面组)
+        boundary: {'bottom'/'top': [(面类型名, 面节点编号数组), ...]}，面组所用的底面和顶面
+        layers: 每个单元所在的高度层 (0..NUM_LAYERS-1)
+    """
+    rng = np.random.default_rng(seed)
+    (nx, ny, nz), cube_mix = lattice_shape(num_zones, mix)
+    names = list(cube_mix)
+    cube_type = rng.choice(len(names), size=nx * ny * nz, p=[cube_mix[t] for t in names])
+
+    # 格子节点，编号 i + (nx+1)*(j + (ny+1)*k) + 1
+    i, j, k = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1), np.arange(nz + 1), indexing='ij')
+    lattice = np.column_stack((i.ravel('F'), j.ravel('F'), k.ravel('F'))).astype(np.float64)
+    interior = ((lattice > 0) & (lattice < [nx, ny, nz])).all(axis=1)
+    lattice[interior] += rng.uniform(-jitter, jitter, size=(int(interior.sum()), 3))
+
+    ci, cj, ck = np.meshgrid(np.arange(nx), np.arange(ny), np.arange(nz), indexing='ij')
+    cube_origin = np.column_stack((ci.ravel('F'), cj.ravel('F'), ck.ravel('F')))
+    corners = cube_origin[:, None, :] + _CORNERS[None, :, :]
+    corner_ids = corners[..., 0] + (nx + 1) * (corners[..., 1] + (ny + 1) * corners[..., 2]) + 1
+
+    # 金字塔立方体的中心节点排在格子节点之后
+    pyramid_cubes = np.flatnonzero(cube_type == names.index('P5')) if 'P5' in names else np.empty(0, int)
+    centers = lattice[corner_ids[pyramid_cubes] - 1].mean(axis=1)
+    center_ids = np.zeros(len(cube_type), dtype=np.int64)
+    center_ids[pyramid_cubes] = len(lattice) + 1 + np.arange(len(pyramid_cubes))
+    vertices = np.concatenate((lattice, centers))
+    cube_nodes = np.column_stack((corner_ids, center_ids))
+
+    gmsh_of = {name: gmsh_type for name, (gmsh_type, _) in element_types().items()}
+    zone_types, zone_nodes, zone_layers = [], [], []
+    for t, name in enumerate(names):
+        cubes = np.flatnonzero(cube_type == t)
+        gmsh_nodes = cube_nodes[cubes][:, _SPLITS[name]].reshape(-1, len(_SPLITS[name][0]))
+        block = [(gmsh_of[name], None, gmsh_nodes)]
+        repair_orientation(vertices, block)
+        # Gmsh顺序 -> FLAC3D顺序: gmsh = flac[:, index_map]
+        index_map = element_types()[name][1]
+        flac_nodes = np.empty_like(gmsh_nodes)
+        flac_nodes[:, index_map] = gmsh_nodes
+        zone_types.append(np.full(len(flac_nodes), ZONE_TYPE_NAMES.index(name), dtype=np.uint8))
+        zone_nodes.append(flac_nodes)
+        layer = cube_origin[cubes, 2] * NUM_LAYERS // nz
+        zone_layers.append(np.repeat(layer, len(_SPLITS[name])))
+
+    # 与FLAC3D输出相同，单元按类型连续编号
+    zone_types = np.concatenate(zone_types)
+    layers = np.concatenate(zone_layers)
+    counts = np.concatenate([np.full(len(nodes), nodes.shape[1]) for nodes in zone_nodes])
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    connectivity = np.concatenate([nodes.ravel() for nodes in zone_nodes])
+
+    boundary = {}
+    for side, level in (('bottom', 0), ('top', nz - 1)):
+        cubes = np.flatnonzero(cube_origin[:, 2] == level)
+        quad = np.isin(cube_type[cubes], [names.index(t) for t in ('B8', 'P5') if t in names])
+        faces = [('Q4', corner_ids[cubes[quad]][:, f]) for f in _BOUNDARY_FACES[side]['quad']] + \
+                [('T3', corner_ids[cubes[~quad]][:, f]) for f in _BOUNDARY_FACES[side]['tri']]
+        boundary[side] = faces
+
+    grid = Flac3DGrid(node_ids=np.arange(1, len(vertices) + 1), vertices=vertices,
+                      zone_ids=np.arange(1, len(zone_types) + 1), zone_types=zone_types,
+                      offsets=offsets, connectivity=connectivity)
+    return grid, boundary, layers
+
+
+def _write_ids(f, ids, per_line=20):
+    """编号列表，每行 per_line 个，与FLAC3D输出相同"""
+    for start in range(0, len(ids), BATCH_SIZE // per_line * per_line):
+        batch = ids[start:start + BATCH_SIZE // per_line * per_line]
+        full = len(batch) // per_line * per_line
+        if full:
+            f.write(_format_rows(" %d" * per_line + "\n", batch[:full].reshape(-1, per_line)))
+        if len(batch) > full:
+            f.write(_format_rows(" %d" * (len(batch) - full) + "\n", batch[full:].reshape(1, -1)))
+
+
+def write_f3grid(filename, grid, boundary=None, layers=None):
+    """把 synthetic_grid 的结果写为FLAC3D网格文件"""
+    with open(filename, 'w', encoding='utf-8', newline='\n') as f:
+        f.write("* FLAC3D grid produced by benchmarks/synthetic_grid.py\n")
+        f.write("* GRIDPOINTS\n")
+        for start in range(0, grid.num_nodes, BATCH_SIZE):
+            rows = np.column_stack((grid.node_ids[start:start + BATCH_SIZE], grid.vertices[start:start + BATCH_SIZE]))
+            f.write(_format_rows("G %9d %22.14E %22.14E %22.14E\n", rows))
+
+        f.write("* ZONES\n")
+        # 单元按类型连续排列，逐段写出
+        bounds = np.flatnonzero(np.diff(grid.zone_types)) + 1
+        for first, last in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [grid.num_zones]))):
+            name = ZONE_TYPE_NAMES[grid.zone_types[first]]
+            n = int(grid.offsets[first + 1] - grid.offsets[first])
+            for start in range(first, last, BATCH_SIZE):
+                stop = min(start + BATCH_SIZE, last)
+                nodes = grid.connectivity[grid.offsets[start]:grid.offsets[stop]].reshape(-1, n)
+                f.write(_format_rows(f"Z {name} %d" + " %d" * n + "\n",
+                                     np.column_stack((grid.zone_ids[start:stop], nodes))))
+
+        if layers is not None:
+            f.write("* ZONE GROUPS\n")
+            for layer in range(NUM_LAYERS):
+                members = grid.zone_ids[layers == layer]
+                if len(members):
+                    f.write(f'ZGROUP "Layer{layer + 1}" SLOT "Layers"\n')
+                    _write_ids(f, members)
+
+        if boundary:
+            f.write("* FACES\n")
+            face_id, groups = 1, {}
+            for side, faces in boundary.items():
+                ids = []
+                for name, nodes in faces:
+                    if not len(nodes):
+                        continue
+                    face_ids = np.arange(face_id, face_id + len(nodes))
+                    f.write(_format_rows(f"F {name} %d" + " %d" * nodes.shape[1] + "\n",
+                                         np.column_stack((face_ids, nodes))))
+                    ids.append(face_ids)
+                    face_id += len(nodes)
+                groups[side] = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+            f.write("* FACE GROUPS\n")
+            for side, members in groups.items():
+                f.write(f'FGROUP "{side.capitalize()}" SLOT "Skin"\n')
+                _write_ids(f, members)
+
+
+def write_vtk_points(filename, grid, boundary):
+    """
+    写出 vtk_viewer 可以打开的旧版VTK POLYDATA文件 (二进制): 全部节点和底面、顶面的多边形
+    """
+    import vtk
+    from vtk.util import numpy_support
+
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(grid.vertices), deep=True))
+    faces = [nodes - 1 for side in boundary.values() for _, nodes in side if len(nodes)]
+    offsets = np.concatenate(([0], np.cumsum([f.size for f in faces]))).astype(np.int64)
+    polys = vtk.vtkCellArray()
+    polys.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(np.concatenate([f.ravel() for f in faces]).astype(np.int64),
+                                                        deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(points)
+    polydata.SetPolys(polys)
+    writer = vtk.vtkPolyDataWriter()
+    writer.SetFileName(filename)
+    writer.SetInputData(polydata)
+    writer.SetFileTypeToBinary()
+    writer.Write()
+
+
+def generate(filename, num_zones, mix=None, seed=0, jitter=0.1, vtk_filename=None):
+    """生成并写出网格，返回 Flac3DGrid"""
+    grid, boundary, layers = synthetic_grid(num_zones, mix, seed, jitter)
+    write_f3grid(filename, grid, boundary, layers)
+    if vtk_filename:
+        write_vtk_points(vtk_filename, grid, boundary)
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('zones', type=float, help="目标单元数 (如 1e6)")
+    parser.add_argument('-o', '--output', default=None, help="输出文件名，默认 synthetic_<单元数>.f3grid")
+    parser.add_argument('--mix', type=parse_mix, default=None, help="类型比例，如 B8=0.32,W6=0.05,P5=0.35,T4=0.28")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jitter', type=float, default=0.1, help="内部节点的随机扰动 (格距的倍数)")
+    parser.add_argument('--vtk', default=None, help="同时写出供 vtk_viewer 打开的VTK文件")
+    args = parser.parse_args()
+
+    output = args.output or f"synthetic_{int(args.zones)}.f3grid"
+    grid = generate(output, int(args.zones), args.mix, args.seed, args.jitter, args.vtk)
+    counts = ", ".join(f"{t}: {n}" for t, n in grid.zone_type_counts().items())
+    print(f"{output}: {grid.num_nodes} 个节点, {grid.num_zones} 个单元 ({counts})")
+
+
+if __name__ == "__main__":
+    main()
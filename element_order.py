@@ -0,0 +1,143 @@
+import numpy as np
+from f3grid_reader import ZONE_TYPE_NAMES, ZONE_TYPE_NODES
+
+# Gmsh单元类型 -> 节点数 (体单元和面单元)
+GMSH_TYPE_NODES = {1: 2, 2: 3, 3: 4, 4: 4, 5: 8, 6: 6, 7: 5, 15: 1}
+# Gmsh单元类型 -> 维数
+GMSH_TYPE_DIM = {1: 1, 2: 2, 3: 2, 4: 3, 5: 3, 6: 3, 7: 3, 15: 0}
+
+# FLAC3D单元类型 -> (Gmsh单元类型, 节点索引表)
+# 转换为Gmsh顺序: gmsh_nodes = flac3d_nodes[:, index_map]
+_ELEMENT_ORDERS = {}
+
+
+def register_element_type(zone_type, gmsh_type, index_map):
+    """
+    登记一种FLAC3D单元类型到Gmsh单元的节点对应关系
+
+    index_map 的长度必须等于Gmsh单元的节点数，每一项是FLAC3D单元中的节点位置。
+    index_map 中可以有重复项 (登记为节点重合的退化Gmsh单元)，这样的类型只能在
+    转换为Gmsh节点顺序时写出。7节点的 B7 没有登记: 文件中不含缺少的是哪个角点，
+    无法确定与之重合的节点，见 check_zone_types。
+
+    参数:
+        zone_type: FLAC3D单元类型名，必须是 ZONE_TYPE_NAMES 之一
+        gmsh_type: Gmsh单元类型
+        index_map: 节点索引表
+    """
+    if zone_type not in ZONE_TYPE_NAMES:
+        raise ValueError(f"未知的FLAC3D单元类型: {zone_type}")
+    if gmsh_type not in GMSH_TYPE_NODES:
+        raise ValueError(f"不支持的Gmsh单元类型: {gmsh_type}")
+    index_map = np.asarray(index_map, dtype=np.intp)
+    num_nodes = ZONE_TYPE_NODES[ZONE_TYPE_NAMES.index(zone_type)]
+    if index_map.shape != (GMSH_TYPE_NODES[gmsh_type],):
+        raise ValueError(f"Gmsh单元类型 {gmsh_type} 需要 {GMSH_TYPE_NODES[gmsh_type]} 个节点索引")
+    if index_map.min() < 0 or index_map.max() >= num_nodes:
+        raise ValueError(f"{zone_type} 单元只有 {num_nodes} 个节点")
+    index_map.setflags(write=False)
+    _ELEMENT_ORDERS[zone_type] = (gmsh_type, index_map)
+
+
+def element_types():
+    """返回 {FLAC3D单元类型: (Gmsh单元类型, 节点索引表)}，按Gmsh类型排序"""
+    return dict(sorted(_ELEMENT_ORDERS.items(), key=lambda item: item[1][0]))
+
+
+def unsupported_zone_types(zone_types):
+    """
+    zone_types 中没有登记Gmsh对应关系的单元类型
+
+    参数:
+        zone_types: 单元类型编码 (M,) uint8，对应 ZONE_TYPE_NAMES
+
+    返回:
+        {单元类型名: 单元数}，按类型编码排序
+    """
+    counts = np.bincount(zone_types, minlength=len(ZONE_TYPE_NAMES))
+    return {name: int(counts[code]) for code, name in enumerate(ZONE_TYPE_NAMES)
+            if counts[code] and name not in _ELEMENT_ORDERS}
+
+
+def check_zone_types(zone_types):
+    """网格中有不能转换为Gmsh单元的类型 (如 B7) 时抛出 ValueError，说明类型和单元数"""
+    unsupported = unsupported_zone_types(zone_types)
+    if unsupported:
+        listed = ', '.join(f"{name} ({count} 个)" for name, count in unsupported.items())
+        raise ValueError(f"不支持的单元类型: {listed}。可转换的类型为 {', '.join(_ELEMENT_ORDERS)}，"
+                         f"请在FLAC3D中把这些单元划分为支持的类型后重新导出")
+
+
+def is_permutation(zone_type):
+    """该类型的节点索引表是否为一一对应的重排 (非退化单元)"""
+    gmsh_type, index_map = _ELEMENT_ORDERS[zone_type]
+    return len(index_map) == ZONE_TYPE_NODES[ZONE_TYPE_NAMES.index(zone_type)] and \
+        len(np.unique(index_map)) == len(index_map)
+
+
+def gmsh_node_orders():
+    """
+    返回 {Gmsh单元类型: 节点索引表}，只包含一一对应的重排，
+    用于重排已写出的MSH文件 (文件中只有Gmsh类型)
+    """
+    orders = {}
+    for zone_type, (gmsh_type, index_map) in element_types().items():
+        if is_permutation(zone_type):
+            orders.setdefault(gmsh_type, index_map)
+    return orders
+
+
+def to_gmsh_order(zone_type, nodes):
+    """
+    把一个类型的全部单元一次转换为Gmsh节点顺序
+
+    参数:
+        zone_type: FLAC3D单元类型名
+        nodes: (n_elems, FLAC3D节点数) 的节点编号数组
+
+    返回:
+        (n_elems, Gmsh节点数) 的节点编号数组
+    """
+    return nodes[:, _ELEMENT_ORDERS[zone_type][1]]
+
+
+# Gmsh体单元类型 -> 镜像重排: 按Gmsh顺序的节点表反转底面 (四面体交换两个节点)，
+# 手性相反 (有向体积为负) 的单元经此重排后体积变为正
+MIRROR_ORDERS = {
+    4: np.array([0, 2, 1, 3]),
+    5: np.array([0, 3, 2, 1, 4, 7, 6, 5]),
+    6: np.array([0, 2, 1, 3, 5, 4]),
+    7: np.array([0, 3, 2, 1, 4]),
+}
+for _order in MIRROR_ORDERS.values():
+    _order.setflags(write=False)
+
+
+# 四边形面的三种候选环形顺序 (固定节点0，对应三种对角线配对)。FLAC3D的Q4面中
+# 节点可能按任意一种顺序给出，后两种按原顺序连接时是自相交的“蝴蝶结”
+_QUAD_ORDERS = np.array([[0, 1, 2, 3], [0, 1, 3, 2], [0, 2, 1, 3]], dtype=np.intp)
+
+
+def cyclic_quad_order(points):
+    """
+    为每个四边形面选出首尾相接的节点顺序
+
+    按环形顺序 a-b-c-d 连接的四边形面积向量为 (c - a) × (d - b) / 2。自相交的顺序中
+    两个三角形瓣的面积相互抵消，因此取三种候选顺序中面积最大的一种。
+
+    参数:
+        points: (n, 4, 3) 每个面四个节点的坐标，按文件中的顺序
+
+    返回:
+        (n, 4) 节点索引，gmsh_nodes = np.take_along_axis(nodes, order, axis=1)
+    """
+    candidates = points[:, _QUAD_ORDERS]  # (n, 3, 4, 3)
+    areas = np.cross(candidates[:, :, 2] - candidates[:, :, 0], candidates[:, :, 3] - candidates[:, :, 1])
+    best = np.einsum('ijk,ijk->ij', areas, areas).argmax(axis=1)
+    return _QUAD_ORDERS[best]
+
+
+register_element_type('B8', 5, [2, 4, 7, 5, 0, 1, 6, 3])  # 六面体
+register_element_type('W6', 6, [5, 2, 4, 3, 0, 1])        # 楔形
+register_element_type('P5', 7, [2, 0, 1, 4, 3])           # 金字塔
+register_element_type('T4', 4, [0, 2, 3, 1])              # 四面体
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from f3grid_reader import Flac3DGrid, read_flac3d_arrays
+
+# 解析结果或缓存布局变化时递增，使旧缓存失效
+CACHE_VERSION = 2
+CACHE_SUFFIX = '.cache'
+META_FILE = 'meta.json'
+
+
+def cache_path(filename):
+    """缓存目录: 与源文件同目录，如 geo.f3grid -> geo.f3grid.cache/"""
+    return filename + CACHE_SUFFIX
+
+
+def file_digest(filename, block_size=16 * 1024 * 1024):
+    """计算文件内容的 blake2b 摘要"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_stat(filename):
+    st = os.stat(filename)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(directory, meta):
+    tmp = os.path.join(directory, META_FILE + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(directory, META_FILE))
+
+
+def is_cache_valid(filename, meta):
+    """
+    判断缓存是否对应当前源文件
+
+    大小和修改时间都未变时直接认为有效；只有修改时间变化时重新计算摘要，
+    内容未变则更新记录的修改时间并继续使用缓存
+    """
+    if not meta or meta.get('version') != CACHE_VERSION:
+        return False
+    stat = _source_stat(filename)
+    if stat['size'] != meta.get('size'):
+        return False
+    if stat['mtime_ns'] == meta.get('mtime_ns'):
+        return True
+    if file_digest(filename) != meta.get('digest'):
+        return False
+    meta['mtime_ns'] = stat['mtime_ns']
+    _write_meta(cache_path(filename), meta)
+    return True
+
+
+def save_cache(filename, grid, digest=None):
+    """
+    把解析结果写入缓存目录，每个数组一个 .npy 文件，meta.json 最后写入，
+    因此中途失败的缓存不会被当作有效缓存
+    """
+    directory = cache_path(filename)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    arrays = {}
+    for name, array in vars(grid).items():
+        np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(array))
+        arrays[name] = [list(array.shape), array.dtype.str]
+
+    meta = dict(_source_stat(filename), version=CACHE_VERSION,
+                digest=digest or file_digest(filename), arrays=arrays)
+    _write_meta(directory, meta)
+
+
+def load_cache(filename, meta=None):
+    """以只读内存映射方式载入缓存，返回 Flac3DGrid"""
+    directory = cache_path(filename)
+    meta = meta or _read_meta(directory)
+    arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+              for name in meta['arrays']}
+    return Flac3DGrid(**arrays)
+
+
+def read_flac3d_cached(filename, **kwargs):
+    """
+    带二进制缓存的 read_flac3d_arrays
+
+    参数:
+        filename: FLAC3D网格文件名
+        kwargs: 传给 read_flac3d_arrays 的参数 (如 workers)
+
+    返回:
+        grid: Flac3DGrid
+        from_cache: 是否直接来自缓存
+    """
+    meta = _read_meta(cache_path(filename))
+    if is_cache_valid(filename, meta):
+        try:
+            return load_cache(filename, meta), True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"警告：缓存读取失败，重新解析: {e}")
+
+    grid = read_flac3d_arrays(filename, **kwargs)
+    try:
+        save_cache(filename, grid)
+    except OSError as e:
+        print(f"警告：无法写入缓存 {cache_path(filename)}: {e}")
+    return grid, False
@@ -0,0 +1,624 @@
+import mmap
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# FLAC3D区段标记（* 开头的行）
+SECTION_MARKERS = {
+    b'* GRIDPOINTS': 'gridpoints',
+    b'* ZONES': 'zones',
+    b'* ZONE GROUPS': 'zone_groups',
+    b'* FACES': 'faces',
+    b'* FACE GROUPS': 'face_groups',
+}
+
+# 单元类型编码: zone_types 中保存的是该元组的下标 (uint8)
+ZONE_TYPE_NAMES = ('B8', 'B7', 'W6', 'P5', 'T4')
+ZONE_TYPE_CODES = {name: code for code, name in enumerate(ZONE_TYPE_NAMES)}
+ZONE_TYPE_NODES = np.array([8, 7, 6, 5, 4], dtype=np.int64)
+
+# 面类型编码: face_types 中保存的是该元组的下标 (uint8)
+FACE_TYPE_NAMES = ('Q4', 'T3')
+FACE_TYPE_CODES = {name: code for code, name in enumerate(FACE_TYPE_NAMES)}
+FACE_TYPE_NODES = np.array([4, 3], dtype=np.int64)
+
+# 默认每块解析的字节数，块边界总是对齐到换行符
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+
+
+class Flac3DGrid:
+    """
+    FLAC3D网格的数组表示
+
+    属性:
+        node_ids: 节点编号 (N,) int64
+        vertices: 节点坐标 (N, 3) float64，与 node_ids 一一对应
+        zone_ids: 单元编号 (M,) int64
+        zone_types: 单元类型编码 (M,) uint8，对应 ZONE_TYPE_NAMES 的下标
+        offsets: 单元节点偏移 (M+1,) int64，第 i 个单元的节点为
+                 connectivity[offsets[i]:offsets[i+1]]
+        connectivity: 单元节点编号 (FLAC3D原始编号，1-based) int64
+        face_ids, face_types, face_offsets, face_connectivity:
+                 * FACES 区段中的面，含义与单元的四个数组相同，
+                 face_types 对应 FACE_TYPE_NAMES 的下标
+        zone_group_names, zone_group_slots: 单元组的名称和所属slot (str数组)
+        zone_group_offsets, zone_group_members: 第 g 个单元组的单元编号为
+                 zone_group_members[zone_group_offsets[g]:zone_group_offsets[g+1]]
+        face_group_names, face_group_slots, face_group_offsets, face_group_members:
+                 面组，成员为面编号
+    """
+
+    def __init__(self, node_ids, vertices, zone_ids, zone_types, offsets, connectivity,
+                 face_ids=None, face_types=None, face_offsets=None, face_connectivity=None,
+                 zone_group_names=None, zone_group_slots=None,
+                 zone_group_offsets=None, zone_group_members=None,
+                 face_group_names=None, face_group_slots=None,
+                 face_group_offsets=None, face_group_members=None):
+        self.node_ids = node_ids
+        self.vertices = vertices
+        self.zone_ids = zone_ids
+        self.zone_types = zone_types
+        self.offsets = offsets
+        self.connectivity = connectivity
+        # 没有面和组区段的文件，对应数组为空
+        self.face_ids = _or_empty(face_ids, np.int64)
+        self.face_types = _or_empty(face_types, np.uint8)
+        self.face_offsets = _or_empty(face_offsets, np.int64, [0])
+        self.face_connectivity = _or_empty(face_connectivity, np.int64)
+        self.zone_group_names = _or_empty(zone_group_names, str)
+        self.zone_group_slots = _or_empty(zone_group_slots, str)
+        self.zone_group_offsets = _or_empty(zone_group_offsets, np.int64, [0])
+        self.zone_group_members = _or_empty(zone_group_members, np.int64)
+        self.face_group_names = _or_empty(face_group_names, str)
+        self.face_group_slots = _or_empty(face_group_slots, str)
+        self.face_group_offsets = _or_empty(face_group_offsets, np.int64, [0])
+        self.face_group_members = _or_empty(face_group_members, np.int64)
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_zones(self):
+        return len(self.zone_ids)
+
+    @property
+    def num_faces(self):
+        return len(self.face_ids)
+
+    def node_id_gaps(self):
+        """节点编号中缺失的区间，见 id_gaps"""
+        return id_gaps(self.node_ids, '节点')
+
+    def compact_nodes(self):
+        """
+        把节点重新编号为 1..N (按文件中的顺序)，单元和面的节点编号同步换算
+
+        编号本来就是 1..N 时直接返回自身，否则返回新的 Flac3DGrid，
+        其余数组与原网格共用。换算为一次整体索引，不依赖 位置 = 编号-1 的假设。
+        """
+        if np.array_equal(self.node_ids, np.arange(1, self.num_nodes + 1)):
+            return self
+        arrays = dict(vars(self))
+        arrays['node_ids'] = np.arange(1, self.num_nodes + 1, dtype=np.int64)
+        arrays['connectivity'] = id_index(self.node_ids, self.connectivity, '节点') + 1
+        arrays['face_connectivity'] = id_index(self.node_ids, self.face_connectivity, '节点') + 1
+        return Flac3DGrid(**arrays)
+
+    def zone_type_counts(self):
+        """返回 {单元类型名: 数量}，按类型编码排序，只包含出现过的类型"""
+        counts = np.bincount(self.zone_types, minlength=len(ZONE_TYPE_NAMES))
+        return {ZONE_TYPE_NAMES[code]: int(n) for code, n in enumerate(counts) if n}
+
+    def zone_group_index(self, slot=None):
+        """
+        一次散射得到每个单元所属单元组的下标
+
+        参数:
+            slot: 只考虑该slot中的组，为None时取文件中第一个slot。
+                  同一slot内的组互不重叠，因此每个单元至多属于一个组
+
+        返回:
+            (M,) int64，对应 zone_group_names 的下标，不属于任何组时为 -1
+        """
+        return _group_index(self.zone_ids, self.zone_group_slots,
+                            self.zone_group_offsets, self.zone_group_members, slot)
+
+    def face_group_index(self, slot=None):
+        """每个面所属面组的下标，含义同 zone_group_index"""
+        return _group_index(self.face_ids, self.face_group_slots,
+                            self.face_group_offsets, self.face_group_members, slot)
+
+    def face_group_pairs(self):
+        """
+        返回全部 (面位置, 面组下标) 对，包括不同slot中重叠的成员
+
+        返回:
+            face_index: (K,) 面在 face_ids 中的位置
+            group_index: (K,) 对应 face_group_names 的下标
+        """
+        group_index = np.repeat(np.arange(len(self.face_group_names)), np.diff(self.face_group_offsets))
+        return id_index(self.face_ids, self.face_group_members, '面'), group_index
+
+
+def _or_empty(array, dtype, default=()):
+    return np.asarray(default, dtype=dtype) if array is None else array
+
+
+def _is_dense(low, high, count):
+    """编号范围不超过个数的数倍时，用长度为编号范围的数组代替排序"""
+    return high - low < 4 * count + 1024
+
+
+def id_gaps(ids, what=''):
+    """
+    找出编号中缺失的区间
+
+    编号较紧凑时用标记数组线性完成，否则对编号排序。编号重复时抛出 ValueError。
+
+    参数:
+        ids: (n,) 编号
+        what: 出错信息中的对象名称
+
+    返回:
+        (k, 2) int64，每行为一段缺失编号的 [起, 止] (闭区间)，在最小和最大编号之间
+    """
+    if len(ids) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    low, high = int(ids.min()), int(ids.max())
+    if _is_dense(low, high, len(ids)):
+        counts = np.bincount(ids - low, minlength=high - low + 1)
+        duplicated = np.flatnonzero(counts > 1)
+        if duplicated.size:
+            raise ValueError(f"{what}编号 {duplicated[0] + low} 重复出现")
+        # 缺失段的起点和终点: 标记从有变无、从无变有的位置
+        present = np.concatenate(([1], counts, [1])) > 0
+        edges = np.flatnonzero(present[1:] != present[:-1])
+        return edges.reshape(-1, 2) + [low, low - 1]
+    ordered = np.sort(ids)
+    step = np.diff(ordered)
+    if (step == 0).any():
+        raise ValueError(f"{what}编号 {ordered[np.flatnonzero(step == 0)[0]]} 重复出现")
+    gap = np.flatnonzero(step > 1)
+    return np.column_stack((ordered[gap] + 1, ordered[gap + 1] - 1))
+
+
+def format_id_ranges(ranges, limit=10):
+    """把 id_gaps 的结果格式化为 '3-7, 12, ...' 形式的简短文本"""
+    parts = [f"{a}" if a == b else f"{a}-{b}" for a, b in ranges[:limit].tolist()]
+    if len(ranges) > limit:
+        parts.append(f"... (共 {len(ranges)} 段)")
+    return ', '.join(parts)
+
+
+def id_index(ids, query, what='编号'):
+    """
+    把编号映射为在 ids 中的位置
+
+    编号较紧凑时用查找表一次索引完成，否则退化为对排序后的编号二分查找。
+
+    参数:
+        ids: (n,) 全部编号，互不重复
+        query: 要查找的编号数组
+        what: 出错信息中的对象名称
+
+    返回:
+        与 query 形状相同的位置数组 (int64)
+    """
+    query = np.asarray(query, dtype=np.int64)
+    if query.size == 0:
+        return np.zeros(query.shape, dtype=np.int64)
+    if len(ids) == 0:
+        raise ValueError(f"引用了不存在的{what}: {query.flat[0]}")
+    low, high = int(ids.min()), int(ids.max())
+    if _is_dense(low, high, len(ids)):
+        lookup = np.full(high - low + 1, -1, dtype=np.int64)
+        lookup[ids - low] = np.arange(len(ids))
+        inside = (query >= low) & (query <= high)
+        index = np.full(query.shape, -1, dtype=np.int64)
+        index[inside] = lookup[query[inside] - low]
+    else:
+        order = np.argsort(ids, kind='stable')
+        pos = np.clip(np.searchsorted(ids, query, sorter=order), 0, len(ids) - 1)
+        index = np.where(ids[order[pos]] == query, order[pos], -1)
+    if (index < 0).any():
+        raise ValueError(f"引用了不存在的{what}: {query[index < 0][0]}")
+    return index
+
+
+def _group_index(ids, slots, group_offsets, members, slot):
+    index = np.full(len(ids), -1, dtype=np.int64)
+    if len(slots) == 0:
+        return index
+    if slot is None:
+        slot = slots[0]
+    if not (slots == slot).any():
+        raise ValueError(f"没有名为 {slot} 的slot")
+    counts = np.diff(group_offsets)
+    in_slot = np.repeat(slots == slot, counts)
+    member_group = np.repeat(np.arange(len(slots)), counts)
+    index[id_index(ids, members[in_slot])] = member_group[in_slot]
+    return index
+
+
+def find_sections(data):
+    """
+    按字节偏移查找各区段
+
+    参数:
+        data: 文件内容 (bytes 或其他支持 find/切片的缓冲区)
+
+    返回:
+        sections: {区段名: (起始偏移, 结束偏移)}，范围不包含标记行本身
+    """
+    headers = []
+    pos = 0 if data[:1] == b'*' else data.find(b'\n*')
+    while pos != -1:
+        start = pos if data[pos:pos + 1] == b'*' else pos + 1
+        line_end = data.find(b'\n', start)
+        if line_end == -1:
+            line_end = len(data)
+        headers.append((start, line_end, data[start:line_end].strip()))
+        pos = data.find(b'\n*', line_end)
+
+    sections = {}
+    for i, (start, line_end, text) in enumerate(headers):
+        name = SECTION_MARKERS.get(text)
+        if name is None:
+            continue
+        body_end = headers[i + 1][0] if i + 1 < len(headers) else len(data)
+        sections[name] = (min(line_end + 1, body_end), body_end)
+    return sections
+
+
+def iter_chunks(data, start, end, chunk_size=DEFAULT_CHUNK_SIZE):
+    """将 [start, end) 按约 chunk_size 字节切分，每块都在换行符之后结束"""
+    while start < end:
+        stop = data.find(b'\n', min(start + chunk_size, end) - 1, end)
+        stop = end if stop == -1 else stop + 1
+        yield start, stop
+        start = stop
+
+
+def parse_numbers(text, dtype):
+    """把以空白分隔的数字文本一次性解析为一维数组，解析不完整时返回None"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=dtype, sep=' ')
+        except ValueError:
+            return None
+
+
+def token_layout(text):
+    """
+    定位每个字段的起始位置，并统计每个非空行的字段数
+
+    返回:
+        token_starts: 每个字段首字节的偏移
+        counts: 每个非空行的字段数
+    """
+    buf = np.frombuffer(text, dtype=np.uint8)
+    if buf.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    blank = buf <= 32  # 空格、制表符、\r、\n
+    token_starts = np.flatnonzero(~blank[1:] & blank[:-1]) + 1
+    if not blank[0]:
+        token_starts = np.concatenate(([0], token_starts))
+    line_ends = np.append(np.flatnonzero(buf == 10), buf.size)
+    counts = np.diff(np.searchsorted(token_starts, line_ends), prepend=0)
+    return token_starts, counts[counts > 0]
+
+
+def _type_layout(marker, type_names, type_nodes):
+    """
+    行首标记为 marker、类型名为 字母+节点数 的区段的解析表
+
+    返回:
+        table: 去掉标记和类型字母的 bytes.translate 表
+        code_by_nodes: 节点数 -> 类型编码 (没有对应类型时为 -1)
+        letters: 每种类型名的首字母 (uint8)
+    """
+    letters = bytes({ord(n[0]) for n in type_names})
+    table = bytes.maketrans(marker + letters, b' ' * (1 + len(letters)))
+    code_by_nodes = np.full(type_nodes.max() + 1, -1, dtype=np.int64)
+    code_by_nodes[type_nodes] = np.arange(len(type_names))
+    return table, code_by_nodes, np.frombuffer(''.join(n[0] for n in type_names).encode(), dtype=np.uint8)
+
+
+# 去掉行首标记和类型字母，只留下数字；类型名去掉字母后只剩节点数
+_GRIDPOINT_TABLE = bytes.maketrans(b'G', b' ')
+_ZONE_LAYOUT = _type_layout(b'Z', ZONE_TYPE_NAMES, ZONE_TYPE_NODES)
+_FACE_LAYOUT = _type_layout(b'F', FACE_TYPE_NAMES, FACE_TYPE_NODES)
+
+
+def parse_gridpoint_chunk(text):
+    """
+    解析 * GRIDPOINTS 区段中的一段文本 (格式: G node_id x y z)
+
+    返回:
+        node_ids: (n,) int64
+        vertices: (n, 3) float64
+    """
+    num_lines = text.count(b'G')
+    values = parse_numbers(text.translate(_GRIDPOINT_TABLE), np.float64)
+    if values is None or values.size != 4 * num_lines:
+        raise ValueError("无法解析节点区段: 每个G行应包含编号和三个坐标")
+    values = values.reshape(num_lines, 4)
+    return values[:, 0].astype(np.int64), np.ascontiguousarray(values[:, 1:])
+
+
+def parse_zone_chunk(text):
+    """
+    解析 * ZONES 区段中的一段文本 (格式: Z cell_type zone_id node1 node2 ...)
+
+    返回:
+        zone_ids: (m,) int64
+        zone_types: (m,) uint8
+        num_nodes: (m,) int64 每个单元的节点数
+        connectivity: 所有单元节点编号依次拼接 int64
+    """
+    return _parse_typed_chunk(text, _ZONE_LAYOUT, ZONE_TYPE_NAMES, '单元')
+
+
+def parse_face_chunk(text):
+    """
+    解析 * FACES 区段中的一段文本 (格式: F face_type face_id node1 node2 ...)
+
+    返回:
+        face_ids: (m,) int64
+        face_types: (m,) uint8
+        num_nodes: (m,) int64 每个面的节点数
+        connectivity: 所有面节点编号依次拼接 int64
+    """
+    return _parse_typed_chunk(text, _FACE_LAYOUT, FACE_TYPE_NAMES, '面')
+
+
+def _parse_typed_chunk(text, layout, type_names, what):
+    """单元和面共用的解析: 每行为 标记 类型 编号 节点..."""
+    table, code_by_nodes, type_letters = layout
+    # 'Z B8 1 ...' -> '   8 1 ...'，整段文本即可一次解析为整数
+    numeric = text.translate(table)
+    token_starts, counts = token_layout(numeric)
+    values = parse_numbers(numeric, np.int64)
+    if values is None or values.size != counts.sum():
+        raise ValueError(f"无法解析{what}区段: 仅支持类型 {', '.join(type_names)}")
+
+    line_starts = np.cumsum(counts) - counts
+    type_nodes = values[line_starts]
+    ids = values[line_starts + 1]
+    num_nodes = counts - 2
+    types = code_by_nodes[np.clip(type_nodes, 0, len(code_by_nodes) - 1)]
+    # 类型字母必须与节点数对应，且行内节点数与类型一致
+    letters = np.frombuffer(text, dtype=np.uint8)[token_starts[line_starts] - 1]
+    bad = (type_nodes != num_nodes) | (types < 0)
+    bad |= letters != type_letters[types]
+    if bad.any():
+        i = np.flatnonzero(bad)[0]
+        raise ValueError(f"{what} {ids[i]} 的类型或节点数无法识别 (节点数 {num_nodes[i]})")
+
+    keep = np.ones(values.size, dtype=bool)
+    keep[line_starts] = False
+    keep[line_starts + 1] = False
+    return ids, types.astype(np.uint8), num_nodes, values[keep]
+
+
+# 组区段的标题行: ZGROUP "name" SLOT "slot"，旧版本文件中名称可能不带引号，也可能没有SLOT
+_GROUP_HEADER = re.compile(
+    rb'^[ \t]*[ZF]GROUP[ \t]+("[^"\r\n]*"|[^\s"]+)(?:[ \t]+SLOT[ \t]+("[^"\r\n]*"|[^\s"]+))?[^\n]*\n?',
+    re.MULTILINE)
+# 没有写明slot的组属于默认slot
+DEFAULT_SLOT = 'Default'
+
+
+def parse_group_section(text):
+    """
+    解析整个 * ZONE GROUPS 或 * FACE GROUPS 区段 (标题行后跟若干行成员编号)
+
+    组的个数通常很少，逐组用一次 parse_numbers 解析成员编号
+
+    返回:
+        names: 组名列表
+        slots: slot名列表
+        counts: (g,) int64 每组的成员数
+        members: 所有组的成员编号依次拼接 int64
+    """
+    headers = list(_GROUP_HEADER.finditer(text))
+    if text[:headers[0].start() if headers else len(text)].strip():
+        raise ValueError("无法解析组区段: 成员编号之前缺少 ZGROUP/FGROUP 标题行")
+    names, slots, members = [], [], []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        ids = parse_numbers(text[header.end():end], np.int64)
+        if ids is None:
+            raise ValueError(f"无法解析组 {header.group(1).decode()} 的成员编号")
+        names.append(header.group(1).strip(b'"').decode())
+        slots.append(header.group(2).strip(b'"').decode() if header.group(2) else DEFAULT_SLOT)
+        members.append(ids)
+    counts = np.array([len(ids) for ids in members], dtype=np.int64)
+    return names, slots, counts, _concat(members, np.int64)
+
+
+# 区段名 -> 块解析函数
+SECTION_PARSERS = {
+    'gridpoints': parse_gridpoint_chunk,
+    'zones': parse_zone_chunk,
+    'faces': parse_face_chunk,
+}
+# 组区段按标题行划分，不能按行切块，整段解析
+GROUP_SECTIONS = ('zone_groups', 'face_groups')
+
+
+def _concat(parts, dtype, shape_tail=()):
+    """拼接分块结果并清空分块列表，避免分块与结果同时长期占用内存"""
+    if not parts:
+        return np.zeros((0,) + shape_tail, dtype=dtype)
+    result = np.concatenate(parts)
+    parts.clear()
+    return result
+
+
+def _parse_section(data, bounds, parser, chunk_size, release=None):
+    """
+    逐块解析一个区段
+
+    参数:
+        data: 文件缓冲区 (bytes 或 mmap)
+        bounds: 区段的 (起始偏移, 结束偏移)
+        parser: 块解析函数，如 parse_gridpoint_chunk
+        chunk_size: 每块字节数
+        release: 每块解析完后调用 release(a, b)，用于释放已读的映射页
+
+    返回:
+        每个输出字段的分块列表组成的元组
+    """
+    parts = []
+    for a, b in iter_chunks(data, *bounds, chunk_size):
+        parts.append(parser(data[a:b]))
+        if release is not None:
+            release(a, b)
+    return tuple(list(p) for p in zip(*parts))
+
+
+def _page_release(mm):
+    """返回一个释放 mmap 已解析范围的函数 (不支持 madvise 的平台返回None)"""
+    if not hasattr(mm, 'madvise') or not hasattr(mmap, 'MADV_DONTNEED'):
+        return None
+
+    def release(a, b):
+        # madvise 要求起始地址按页对齐；页缓存仍保留，只是不再计入本进程RSS
+        start = a - a % mmap.PAGESIZE
+        if b > start:
+            mm.madvise(mmap.MADV_DONTNEED, start, b - start)
+    return release
+
+
+def _offsets(num_nodes):
+    num_nodes = _concat(num_nodes, np.int64)
+    offsets = np.zeros(len(num_nodes) + 1, dtype=np.int64)
+    np.cumsum(num_nodes, out=offsets[1:])
+    return offsets
+
+
+def _group_arrays(group):
+    names, slots, counts, members = group or ([], [], [], [])
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return (np.array(names, dtype=str), np.array(slots, dtype=str),
+            offsets, np.asarray(members, dtype=np.int64))
+
+
+def _build_grid(gridpoint_parts, zone_parts, face_parts=None, zone_groups=None, face_groups=None):
+    node_ids, vertices = gridpoint_parts or ([], [])
+    zone_ids, zone_types, num_nodes, connectivity = zone_parts or ([], [], [], [])
+    face_ids, face_types, face_nodes, face_connectivity = face_parts or ([], [], [], [])
+    zone_group_names, zone_group_slots, zone_group_offsets, zone_group_members = _group_arrays(zone_groups)
+    face_group_names, face_group_slots, face_group_offsets, face_group_members = _group_arrays(face_groups)
+
+    return Flac3DGrid(
+        node_ids=_concat(node_ids, np.int64),
+        vertices=_concat(vertices, np.float64, (3,)),
+        zone_ids=_concat(zone_ids, np.int64),
+        zone_types=_concat(zone_types, np.uint8),
+        offsets=_offsets(num_nodes),
+        connectivity=_concat(connectivity, np.int64),
+        face_ids=_concat(face_ids, np.int64),
+        face_types=_concat(face_types, np.uint8),
+        face_offsets=_offsets(face_nodes),
+        face_connectivity=_concat(face_connectivity, np.int64),
+        zone_group_names=zone_group_names,
+        zone_group_slots=zone_group_slots,
+        zone_group_offsets=zone_group_offsets,
+        zone_group_members=zone_group_members,
+        face_group_names=face_group_names,
+        face_group_slots=face_group_slots,
+        face_group_offsets=face_group_offsets,
+        face_group_members=face_group_members,
+    )
+
+
+def _open_mmap(f):
+    """只读映射整个文件，空文件或不支持映射时返回None"""
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        return None
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+
+def _parse_file_chunk(task):
+    """进程池任务: 从文件中读取 [a, b) 并用对应区段的解析函数解析"""
+    filename, name, a, b = task
+    with open(filename, 'rb') as f:
+        f.seek(a)
+        return SECTION_PARSERS[name](f.read(b - a))
+
+
+def _parse_sections_parallel(filename, data, sections, chunk_size, workers):
+    """
+    各区段切分为按换行对齐的块后交给进程池解析，结果按块在文件中的顺序拼接，
+    与串行解析得到的数组完全一致
+    """
+    tasks = []
+    for name in SECTION_PARSERS:
+        if name not in sections:
+            continue
+        start, end = sections[name]
+        # 保证每个进程能分到多个块以均衡负载
+        size = max(1, min(chunk_size, (end - start) // (workers * 4) + 1))
+        tasks.extend((filename, name, a, b) for a, b in iter_chunks(data, start, end, size))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_parse_file_chunk, tasks))
+
+    parts = {}
+    for (_, name, _, _), result in zip(tasks, results):
+        parts.setdefault(name, []).append(result)
+    return {name: tuple(list(p) for p in zip(*chunks)) for name, chunks in parts.items()}
+
+
+def read_flac3d_arrays(filename, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=True, workers=1):
+    """
+    以整块数组方式读取FLAC3D网格文件
+
+    参数:
+        filename: FLAC3D网格文件名
+        chunk_size: 每次解析的字节数
+        use_mmap: 是否以内存映射方式读取。映射模式下按字节偏移定位区段，
+                  每次只复制一个块，峰值内存接近输出数组的大小
+        workers: 解析进程数，1为串行，None为CPU核数。大于1时节点、单元和面区段
+                 被切分成多个块并行解析，再按原顺序拼接；组区段总是在主进程中解析
+
+    返回:
+        grid: Flac3DGrid
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with open(filename, 'rb') as f:
+        mm = _open_mmap(f) if use_mmap else None
+        data = mm if mm is not None else f.read()
+        release = _page_release(mm) if mm is not None else None
+        try:
+            sections = find_sections(data)
+            if 'gridpoints' not in sections:
+                raise ValueError(f"{filename} 中没有找到 * GRIDPOINTS 区段")
+
+            if workers > 1:
+                parts = _parse_sections_parallel(filename, data, sections, chunk_size, workers)
+            else:
+                parts = {name: _parse_section(data, sections[name], parser, chunk_size, release)
+                         for name, parser in SECTION_PARSERS.items() if name in sections}
+            for name in GROUP_SECTIONS:
+                if name in sections:
+                    parts[name] = parse_group_section(data[slice(*sections[name])])
+        finally:
+            if mm is not None:
+                mm.close()
+
+    return _build_grid(parts.get('gridpoints'), parts.get('zones'), parts.get('faces'),
+                       parts.get('zone_groups'), parts.get('face_groups'))
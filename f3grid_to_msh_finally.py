@@ -1,171 +1,194 @@
 import numpy as np
-from fipy import Grid3D, CellVariable, TransientTerm, DiffusionTerm, Gmsh3D
+try:
+    from fipy import Grid3D, CellVariable, TransientTerm, DiffusionTerm, Gmsh3D
+except ImportError:  # 只做格式转换和数组质量检查时不需要FiPy
+    Gmsh3D = None
 import os
+import itertools
+import tempfile
 import traceback
 import sys
+from f3grid_reader import read_flac3d_arrays, format_id_ranges, ZONE_TYPE_NAMES
+from f3grid_cache import read_flac3d_cached, cache_path
+from msh_writer import element_blocks, grid_blocks, write_msh22
+from msh41_writer import write_msh41
+from element_order import element_types, check_zone_types
+from msh_reader import msh_file_format, read_msh, read_physical_names
+from msh_reorder import reorder_msh_stream
+from mesh_quality import mesh_quality, repair_orientation
+from node_renumber import renumber_nodes
+from space_filling import sort_blocks
+from fipy_mesh import create_fipy_mesh
+from stage_profiler import NullProfiler, StageProfiler
 #import pyvista as pv
 
-def read_flac3d(filename):
+# 输出格式 -> 写出函数
+MSH_WRITERS = {'msh22': write_msh22, 'msh41': write_msh41}
+
+def read_flac3d_grid(filename, workers=1, cache=False):
     """
-    读取FLAC3D格式的网格文件，提取节点坐标和单元编号
+    读取FLAC3D格式的网格文件并检查节点编号
+    编号不连续或不从1开始时，节点重新编号为 1..N
     
     参数:
         filename: FLAC3D网格文件名
+        workers: 并行解析的进程数，1为串行，None为CPU核数
+        cache: 是否使用源文件旁的二进制缓存 (见 f3grid_cache)
     
     返回:
-        vertices: 节点坐标数组 (N, 3)
-        cells: 单元节点编号列表，每个元素是一个节点编号数组
-        cell_types: 单元类型列表，每个元素是一个字符串，如'B8', 'W6', 'P5'等
+        grid: f3grid_reader.Flac3DGrid
     """
-    vertices = []
-    cells = []
-    cell_types = []
-    node_ids = set()  # 用于存储所有节点ID
-    max_node_id = 0   # 记录最大节点ID
-    
     try:
-        with open(filename, 'r', encoding='latin-1') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 只处理以G或Z开头的行
-                if line.startswith('G'):
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        # 格式: G node_id x y z
-                        try:
-                            node_id = int(parts[1])
-                            node_ids.add(node_id)
-                            max_node_id = max(max_node_id, node_id)
-                            
-                            # 跳过节点ID，只取坐标
-                            x = float(parts[2])
-                            y = float(parts[3])
-                            z = float(parts[4])
-                            vertices.append([x, y, z])
-                        except (ValueError, IndexError) as e:
-                            print(f"警告：无法解析节点行: {line}, 错误: {e}")
-                            continue
-                
-                elif line.startswith('Z'):
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        # 格式: Z cell_type node1 node2 node3 ...
-                        cell_type = parts[1]  # 如 'B8', 'W6', 'P5' 等
-                        
-                        # 只处理数字部分，忽略其他字符串
-                        node_indices = []
-                        for idx in parts[2:]:
-                            try:
-                                node_idx = int(idx) - 1  # 减1是因为FLAC3D使用1-based索引
-                                node_indices.append(node_idx)
-                            except ValueError:
-                                continue  # 忽略非数字部分
-                        
-                        if node_indices:  # 只有当有有效的节点编号时才添加单元
-                            cells.append(node_indices)
-                            cell_types.append(cell_type)
-                
-                # 其他所有行都忽略
+        if cache:
+            grid, from_cache = read_flac3d_cached(filename, workers=workers)
+            if from_cache:
+                print(f"从缓存载入网格: {cache_path(filename)}")
+        else:
+            grid = read_flac3d_arrays(filename, workers=workers)
         
-        # 检查节点编号的连续性
-        if node_ids:
-            min_node_id = min(node_ids)
-            missing_ids = []
-            for i in range(min_node_id, max_node_id + 1):
-                if i not in node_ids:
-                    missing_ids.append(i)
-            
-            if missing_ids:
-                print(f"警告：发现 {len(missing_ids)} 个缺失的节点编号")
+        # 检查节点编号的连续性，缺失的编号按区间报告
+        gaps = grid.node_id_gaps()
+        max_node_id = int(grid.node_ids.max()) if grid.num_nodes else 0
+        if grid.num_nodes:
+            min_node_id = int(grid.node_ids.min())
+            if len(gaps):
+                num_missing = int((gaps[:, 1] - gaps[:, 0] + 1).sum())
+                print(f"警告：发现 {num_missing} 个缺失的节点编号")
                 print(f"节点编号范围: {min_node_id} - {max_node_id}")
-                print(f"缺失的节点编号: {missing_ids}")
+                print(f"缺失的节点编号: {format_id_ranges(gaps)}")
             else:
                 print(f"节点编号检查通过：从 {min_node_id} 到 {max_node_id} 的节点编号连续")
         
-        print(f"读取到 {len(vertices)} 个节点，最大节点编号: {max_node_id}")
+        print(f"读取到 {grid.num_nodes} 个节点，最大节点编号: {max_node_id}")
+
+        # 不能转换的单元类型 (如 B7) 在读入时报告，不等到写出时才失败
+        check_zone_types(grid.zone_types)
+        
+        # 节点重新编号为 1..N，使节点在 vertices 中的位置等于 编号-1
+        compact = grid.compact_nodes()
+        if compact is not grid:
+            print(f"节点已重新编号为 1 - {grid.num_nodes}，单元节点编号已同步换算")
+        grid = compact
     
     except Exception as e:
         print(f"读取FLAC3D文件时出错: {e}")
         traceback.print_exc()
         sys.exit(1)
     
-    return np.array(vertices), cells, cell_types
+    return grid
+
+def read_flac3d(filename, workers=1, cache=False):
+    """
+    读取FLAC3D格式的网格文件，提取节点坐标和单元编号
+    (基于 read_flac3d_grid 的兼容接口)
+    
+    参数:
+        filename: FLAC3D网格文件名
+        workers: 并行解析的进程数，1为串行，None为CPU核数
+        cache: 是否使用源文件旁的二进制缓存 (见 f3grid_cache)
+    
+    返回:
+        vertices: 节点坐标数组 (N, 3)
+        cells: 单元节点编号列表，每个元素是一个节点编号数组
+        cell_types: 单元类型列表，每个元素是一个字符串，如'B8', 'W6', 'P5'等
+    """
+    grid = read_flac3d_grid(filename, workers=workers, cache=cache)
+    
+    # 转换为旧格式: 每个单元为 [单元编号-1, 节点编号-1, ...]
+    tokens = np.insert(grid.connectivity, grid.offsets[:-1], grid.zone_ids) - 1
+    bounds = (grid.offsets + np.arange(grid.num_zones + 1)).tolist()
+    tokens = tokens.tolist()
+    cells = [tokens[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    cell_types = np.array(ZONE_TYPE_NAMES)[grid.zone_types].tolist()
+    
+    return grid.vertices, cells, cell_types
+
+def write_gmsh_blocks(vertices, blocks, filename, binary=False, tags=None, physical_names=(), format='msh22'):
+    """
+    按单元类型分块批量写出Gmsh MSH格式网格文件
+    
+    参数:
+        vertices: 节点坐标数组 (N, 3)
+        blocks: msh_writer.element_blocks 或 grid_blocks 返回的单元分组
+        filename: 输出文件名
+        binary: 是否写出二进制MSH 2.2
+        tags: 与 blocks 对应的每块单元标签，为None时标签均为 0 0
+        physical_names: 物理组名称 [(维数, 物理标签, 名称), ...]
+        format: 'msh22' 或 'msh41'
+    
+    返回:
+        success: 是否成功创建Gmsh网格
+    """
+    try:
+        if format not in MSH_WRITERS:
+            raise ValueError(f"不支持的输出格式: {format}，可选 {', '.join(MSH_WRITERS)}")
+        version = format[3] + '.' + format[4:]
+        print(f"创建Gmsh MSH {version}{'二进制' if binary else ''}格式网格文件: {filename}")
+        MSH_WRITERS[format](filename, vertices, blocks, tags=tags, binary=binary, physical_names=physical_names)
+        print(f"Gmsh MSH {version}格式网格文件已成功创建: {filename}")
+        return True
+    except Exception as e:
+        print(f"创建Gmsh网格文件时出错: {e}")
+        traceback.print_exc()
+        return False
 
-def create_gmsh_mesh(vertices, cells, cell_types, filename):
+def create_gmsh_mesh(vertices, cells, cell_types, filename, binary=False):
     """
     从FLAC3D数据创建Gmsh MSH2格式网格文件
+    单元按类型分组写出，同一类型内保持原顺序
     
     参数:
         vertices: 节点坐标数组 (N, 3)
-        cells: 单元节点编号列表
+        cells: 单元节点编号列表 (read_flac3d 的格式，第一个元素为单元编号)
         cell_types: 单元类型列表
         filename: 输出文件名
+        binary: 是否写出二进制MSH 2.2
     
     返回:
         success: 是否成功创建Gmsh网格
     """
     try:
-        print(f"创建Gmsh MSH2格式网格文件: {filename}")
-        
-        # 打开文件
-        with open(filename, 'w') as f:
-            # 写入Gmsh MSH2格式头部
-            f.write("$MeshFormat\n")
-            f.write("2.2 0 8\n")  # 版本2.2，ASCII格式，双精度
-            f.write("$EndMeshFormat\n\n")
-            
-            # 写入物理名称（可选）
-            f.write("$PhysicalNames\n")
-            f.write("0\n")  # 没有物理名称
-            f.write("$EndPhysicalNames\n\n")
-            
-            # 写入节点
-            f.write("$Nodes\n")
-            f.write(f"{len(vertices)}\n")
-            for i, vertex in enumerate(vertices):
-                # Gmsh使用1-based索引
-                # f.write(f"{i+1} {vertex[0]:.6f} {vertex[1]:.6f} {vertex[2]:.6f}\n")
-                # 输出为浮点数，不要省略
-                f.write(f"{i+1} {vertex[0]} {vertex[1]} {vertex[2]}\n")
-                # f.write(f"{i+1} {vertex[0]} {vertex[1]} {vertex[2]}\n")
-
-            f.write("$EndNodes\n\n")
-            
-            # 写入单元
-            f.write("$Elements\n")
-            f.write(f"{len(cells)}\n")
-            
-            # 单元类型映射: T4=4, B8=5, W6=6, P5=7
-            cell_type_map = {
-                'T4': 4,  # 四面体
-                'B8': 5,  # 六面体
-                'W6': 6,  # 楔形
-                'P5': 7   # 金字塔
-            }
-            
-            for i, (cell, cell_type) in enumerate(zip(cells, cell_types)):
-                # 获取Gmsh单元类型
-                gmsh_type = cell_type_map.get(cell_type, 4)  # 默认使用四面体
-                
-                # 写入单元
-                # 格式: 单元ID 单元类型 标签数量 物理标签 基本标签 节点ID1 节点ID2 ...
-                # 注意: Gmsh使用1-based索引
-                f.write(f"{i+1} {gmsh_type} 2 0 0")  # 2个标签，都是0
-                for node_idx in cell[1:]:
-                    f.write(f" {node_idx+1}")  # 加1是因为Gmsh使用1-based索引
-                f.write("\n")
-            
-            f.write("$EndElements\n")
-        
-        print(f"Gmsh MSH2格式网格文件已成功创建: {filename}")
-        return True
+        zone_types = np.array([ZONE_TYPE_NAMES.index(ct) for ct in cell_types], dtype=np.uint8)
+        offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        np.cumsum([len(cell) - 1 for cell in cells], out=offsets[1:])
+        # Gmsh使用1-based索引
+        connectivity = np.fromiter(itertools.chain.from_iterable(cell[1:] for cell in cells),
+                                   dtype=np.int64, count=offsets[-1]) + 1
+        blocks = element_blocks(zone_types, offsets, connectivity)
     except Exception as e:
         print(f"创建Gmsh网格文件时出错: {e}")
         traceback.print_exc()
         return False
+    
+    return write_gmsh_blocks(vertices, blocks, filename, binary=binary)
+
+def check_mesh_quality(vertices, blocks, zone_ids=None):
+    """
+    直接在数组上检查体单元质量 (有向体积、角点雅可比、长宽比、偏斜度)，
+    在写出网格之前发现翻转单元
+    
+    参数:
+        vertices: 节点坐标数组 (N, 3)，编号 i+1 的节点坐标为 vertices[i]
+        blocks: element_blocks 或 grid_blocks 返回的单元分组 (Gmsh节点顺序)
+        zone_ids: 单元编号 (M,)，用于在警告中给出翻转单元的FLAC3D编号
+    
+    返回:
+        quality: mesh_quality.MeshQuality
+    """
+    print("检查网格质量...")
+    quality = mesh_quality(vertices, blocks)
+    for gmsh_type, stats in quality.summary().items():
+        print(f"  Gmsh类型 {gmsh_type}: {stats['count']} 个, 最小缩放雅可比 {stats['min_jacobian']:.3f}, "
+              f"最大长宽比 {stats['max_aspect_ratio']:.2f}, 最大偏斜度 {stats['max_skewness']:.3f}")
+    
+    inverted = quality.inverted()
+    if inverted.any():
+        print(f"警告：发现 {int(inverted.sum())} 个翻转、退化或坐标含NaN的单元")
+        if zone_ids is not None:
+            print(f"  单元编号: {zone_ids[quality.index[inverted][:10]].tolist()}")
+    else:
+        print("网格质量检查通过：所有单元的有向体积和角点雅可比均为正")
+    return quality
 
 def create_fipy_mesh_from_gmsh(gmsh_file):
     """
@@ -177,11 +200,24 @@ def create_fipy_mesh_from_gmsh(gmsh_file):
     返回:
         mesh: FiPy网格对象
     """
+    ascii_file = None
     try:
+        if Gmsh3D is None:
+            raise ImportError("未安装FiPy")
         print(f"从Gmsh文件创建FiPy网格: {gmsh_file}")
         
+        # FiPy只能直接读取ASCII格式的MSH 2.x，其他格式先转为临时的ASCII MSH 2.2文件
+        version, binary, _ = msh_file_format(gmsh_file)
+        if binary or not version.startswith('2'):
+            node_ids, vertices, blocks = read_msh(gmsh_file)
+            fd, ascii_file = tempfile.mkstemp(suffix='.msh')
+            os.close(fd)
+            write_msh22(ascii_file, vertices, [(t, ids, nodes) for t, ids, _, nodes in blocks],
+                        tags=[tags for _, _, tags, _ in blocks], node_ids=node_ids,
+                        physical_names=read_physical_names(gmsh_file))
+        
         # 使用Gmsh3D创建网格
-        mesh = Gmsh3D(gmsh_file)
+        mesh = Gmsh3D(ascii_file or gmsh_file)
         
         # 获取网格信息
         num_cells = len(mesh.cellCenters[0])
@@ -202,115 +238,236 @@ def create_fipy_mesh_from_gmsh(gmsh_file):
             print(f"警告：发现 {nan_vertices} 个包含NaN值的节点坐标")
         
         print(f"FiPy网格创建成功: {num_cells} 个单元,  {num_vertices} 个顶点")
+        
+        # 物理组可直接作为边界条件和区域的掩码使用
+        for name, mask in mesh.physicalCells.items():
+            print(f"  单元组 {name}: {np.count_nonzero(mask.value)} 个单元")
+        for name, mask in mesh.physicalFaces.items():
+            print(f"  面组 {name}: {np.count_nonzero(mask.value)} 个面")
         return mesh
     except Exception as e:
         print(f"从Gmsh文件创建FiPy网格时出错: {e}")
         traceback.print_exc()
         return None
+    finally:
+        if ascii_file:
+            os.remove(ascii_file)
+
+def prepare_gmsh_blocks(grid, reorder=True, zone_slot=None, face_slot=None, repair=True, renumber=None,
+                        sort_elements=None, verbose=True, profiler=None):
+    """
+    把FLAC3D网格整理为按Gmsh单元类型分组的单元块，参数含义见 f3grid_2_msh
+    
+    依次进行: 节点重新编号 (可选)、按类型分块并生成物理组、块内排序 (可选)、
+    修复负体积单元和检查单元质量 (reorder=True 时)。
+    profiler 为 stage_profiler.StageProfiler 时记录每一步的耗时
+    
+    返回:
+        grid: 节点重新编号后的网格 (未重新编号时为原网格)
+        blocks, tags, physical_names: 同 msh_writer.grid_blocks
+    """
+    profiler = profiler or NullProfiler()
+    # 节点重新编号，节点坐标和单元节点编号同步重排
+    if renumber is not None:
+        with profiler.stage('renumber', items=grid.num_nodes):
+            grid, before, after = renumber_nodes(grid, renumber)
+        if verbose:
+            print(f"节点已按 {renumber} 重新编号，节点邻接矩阵带宽: {before} -> {after}")
+    
+    with profiler.stage('blocks', items=grid.num_zones):
+        blocks, tags, physical_names = grid_blocks(grid, reorder=reorder, zone_slot=zone_slot, face_slot=face_slot)
+    if verbose:
+        print(f"物理组: {len(physical_names)} 个")
+    if sort_elements is not None:
+        with profiler.stage('sort', items=grid.num_zones):
+            blocks, tags = sort_blocks(grid.vertices, blocks, tags, sort_elements)
+        if verbose:
+            print(f"单元已在各类型块内按 {sort_elements} 曲线排序")
+    
+    # 修复翻转单元并检查单元质量 (节点需已是Gmsh顺序)
+    if reorder and repair:
+        with profiler.stage('repair', items=grid.num_zones):
+            flipped = repair_orientation(grid.vertices, blocks)
+        if flipped and verbose:
+            print(f"已翻转 {sum(flipped.values())} 个负体积单元: " +
+                  ", ".join(f"Gmsh类型 {t}: {n} 个" for t, n in flipped.items()))
+    if reorder and verbose:
+        with profiler.stage('quality', items=grid.num_zones):
+            check_mesh_quality(grid.vertices, blocks, grid.zone_ids)
+    return grid, blocks, tags, physical_names
+
+def create_fipy_mesh_from_grid(grid, zone_slot=None, face_slot=None, repair=True, renumber=None,
+                               sort_elements=None, verbose=False):
+    """
+    由内存中的FLAC3D网格直接创建FiPy网格，不写出、不读入MSH文件
+    
+    结果与 f3grid_2_msh 写出后再用 Gmsh3D 读入的网格相同 (见 fipy_mesh.create_fipy_mesh)，
+    适合批量生成大量网格的参数扫描。参数含义见 f3grid_2_msh，verbose 为是否打印各步骤信息。
+    
+    参数:
+        grid: f3grid_reader.Flac3DGrid，节点编号需为 1..N (见 Flac3DGrid.compact_nodes)
+    
+    返回:
+        mesh: fipy.Gmsh3D
+    """
+    if Gmsh3D is None:
+        raise ImportError("未安装FiPy")
+    grid, blocks, tags, physical_names = prepare_gmsh_blocks(
+        grid, reorder=True, zone_slot=zone_slot, face_slot=face_slot, repair=repair,
+        renumber=renumber, sort_elements=sort_elements, verbose=verbose)
+    return create_fipy_mesh(grid.vertices, blocks, tags, physical_names)
+
+def f3grid_2_fipy(filename, workers=1, cache=True, zone_slot=None, face_slot=None, repair=True,
+                  renumber=None, sort_elements=None):
+    """
+    读取FLAC3D网格文件并直接创建FiPy网格，不经过MSH文件
+    
+    参数含义见 f3grid_2_msh
+    
+    返回:
+        mesh: fipy.Gmsh3D，出错时为None
+    """
+    try:
+        print("读取FLAC3D文件...")
+        grid = read_flac3d_grid(filename, workers=workers, cache=cache)
+        print(f"读取到 {grid.num_nodes} 个节点和 {grid.num_zones} 个单元")
+        mesh = create_fipy_mesh_from_grid(grid, zone_slot=zone_slot, face_slot=face_slot, repair=repair,
+                                          renumber=renumber, sort_elements=sort_elements, verbose=True)
+        print(f"FiPy网格创建成功: {mesh.numberOfCells} 个单元, {mesh.numberOfFaces} 个面")
+        return mesh
+    except Exception as e:
+        print(f"创建FiPy网格时出错: {e}")
+        traceback.print_exc()
+        return None
 
-def f3grid_2_msh(filename,output_filename):
+def f3grid_2_msh(filename,output_filename, workers=1, cache=True, binary=False, reorder=True,
+                 zone_slot=None, face_slot=None, fipy_check=False, repair=True, renumber=None,
+                 sort_elements=None, format='msh22', report=None, profile=None):
+    """
+    FLAC3D网格转换为Gmsh MSH网格 (2.2 或 4.1) 并检查单元质量
+    
+    参数:
+        filename: FLAC3D网格文件名
+        output_filename: 输出的MSH文件名
+        workers: 并行解析的进程数
+        cache: 是否使用源文件旁的二进制缓存
+        binary: 是否写出二进制格式
+        reorder: 写出时直接把节点从FLAC3D顺序转换为Gmsh顺序，
+                 不再需要 convert_msh_node_order 的第二遍转换
+        zone_slot: 写为物理组的单元组所在slot，为None时取文件中第一个slot
+        face_slot: 写为物理组的面组所在slot，为None时写出全部面组。
+                   FiPy中一个面只保留最后一个物理标签，面组跨slot重叠时
+                   可指定slot以得到完整的掩码
+        repair: 是否把有向体积为负 (手性相反) 的单元换成镜像节点顺序后再写出，
+                需要 reorder=True
+        renumber: 节点重新编号方式，None为保持FLAC3D节点顺序，
+                  'rcm' 为 Reverse Cuthill-McKee 编号以减小节点邻接矩阵的带宽
+        sort_elements: 单元排序方式，None为保持原顺序，'hilbert' 或 'morton' 为
+                       在每个类型块内按单元形心的空间填充曲线键排序，物理标签随单元一起重排
+        format: 输出格式，'msh22' 或 'msh41' (每个单元组/面组与单元类型一个实体块)
+        fipy_check: 写出后是否再用FiPy读入网格检查。单元质量在写出前已在数组上检查，
+                    FiPy读入只用于确认文件可被FiPy使用。不需要MSH文件时可用
+                    f3grid_2_fipy 直接在内存中创建FiPy网格
+        report: JSON报告文件名，给出时记录各阶段 (读入、分块、修复、质量检查、写出、FiPy读入等)
+                的墙钟时间、CPU时间、峰值RSS和每秒处理的条目数并写出 (见 stage_profiler)
+        profile: 报告中附加的分析，'cprofile' (各阶段热点函数，.prof 文件写入报告旁的 _prof 目录)
+                 或 'tracemalloc' (各阶段Python内存分配)，需要给出 report，否则抛出 ValueError
+    
+    ZONE GROUPS / FACE GROUPS 写为Gmsh物理组: 体单元带所属单元组的物理标签，
+    面组中的面写为面单元，FiPy中可用 mesh.physicalCells / mesh.physicalFaces 选取
+    
+    返回:
+        grid: 转换成功时为写出的网格 (f3grid_reader.Flac3DGrid)，失败时为None
+    """
+    if profile is not None and not report:
+        raise ValueError("profile 的结果写在报告中，需要同时给出 report")
+    profiler = NullProfiler()
+    if report:
+        profile_dir = os.path.splitext(report)[0] + '_prof' if profile == 'cprofile' else None
+        profiler = StageProfiler(profile=profile, profile_dir=profile_dir, source=os.path.abspath(filename),
+                                 output=os.path.abspath(output_filename),
+                                 source_mb=os.path.getsize(filename) / 1e6, format=format, binary=binary)
     try:
         # 读取FLAC3D文件
         print("读取FLAC3D文件...")
-        vertices, cells, cell_types = read_flac3d(filename)
-        print(f"读取到 {len(vertices)} 个节点和 {len(cells)} 个单元")
+        with profiler.stage('read') as record:
+            grid = read_flac3d_grid(filename, workers=workers, cache=cache)
+            record['items'] = grid.num_zones
+        print(f"读取到 {grid.num_nodes} 个节点和 {grid.num_zones} 个单元")
         
         # 统计不同类型的单元数量
-        cell_type_counts = {}
-        for ct in cell_types:
-            if ct in cell_type_counts:
-                cell_type_counts[ct] += 1
-            else:
-                cell_type_counts[ct] = 1
-        
         print("单元类型统计:")
-        for ct, count in cell_type_counts.items():
+        for ct, count in grid.zone_type_counts().items():
             print(f"  {ct}: {count} 个")
         
+        grid, blocks, tags, physical_names = prepare_gmsh_blocks(
+            grid, reorder=reorder, zone_slot=zone_slot, face_slot=face_slot, repair=repair,
+            renumber=renumber, sort_elements=sort_elements, profiler=profiler)
+        
         # 创建Gmsh网格文件
         gmsh_file = output_filename
-        success = create_gmsh_mesh(vertices, cells, cell_types, gmsh_file)
+        with profiler.stage('write', items=sum(len(nodes) for _, _, nodes in blocks)) as record:
+            success = write_gmsh_blocks(grid.vertices, blocks, gmsh_file, binary=binary,
+                                        tags=tags, physical_names=physical_names, format=format)
+        if success:
+            record['output_mb'] = os.path.getsize(gmsh_file) / 1e6
         
         if not success:
             print("创建Gmsh网格文件失败，程序终止")
             return
         
         # 从Gmsh文件创建FiPy网格
-        mesh = create_fipy_mesh_from_gmsh(gmsh_file)
-        
-        if mesh is None:
-            print("创建FiPy网格失败，程序终止")
-            return
+        if fipy_check:
+            with profiler.stage('fipy_load', items=grid.num_zones):
+                mesh = create_fipy_mesh_from_gmsh(gmsh_file)
+            
+            if mesh is None:
+                print("创建FiPy网格失败，程序终止")
+                return
         
         print("完成!")
+        return grid
     except Exception as e:
         print(f"程序执行出错: {e}")
         traceback.print_exc()
+    finally:
+        if report:
+            profiler.write_json(report)
+            print(profiler.format_table())
+            print(f"阶段报告已写出: {report}")
+
+# 逐单元重排的旧接口使用的节点索引表，只查一次登记表
+_INDEX_MAPS = {zone_type: index_map.tolist() for zone_type, (_, index_map) in element_types().items()}
 
 def reorder_flac3d_to_gmsh_hex8(nodes):
-    index_map = [2, 4, 7, 5, 0, 1, 6, 3]
-    return [nodes[i] for i in index_map]
+    return [nodes[i] for i in _INDEX_MAPS['B8']]
 
 def reorder_flac3d_to_gmsh_wedge6(nodes):
-    index_map = [5, 2, 4, 3, 0, 1]
-    return [nodes[i] for i in index_map]
+    return [nodes[i] for i in _INDEX_MAPS['W6']]
 
 def reorder_flac3d_to_gmsh_pyramid5(nodes):
-    index_map = [2, 0, 1, 4, 3]
-    return [nodes[i] for i in index_map]
+    return [nodes[i] for i in _INDEX_MAPS['P5']]
 
 def reorder_flac3d_to_gmsh_tetra4(nodes):
-    index_map = [0, 2, 3, 1]
-    return [nodes[i] for i in index_map]
-
-def convert_msh_node_order(input_file, output_file):
-    with open(input_file, 'r') as f:
-        lines = f.readlines()
-
-    current_line = 0
-    output_lines = []
-
-    while current_line < len(lines):
-        line = lines[current_line]
-        output_lines.append(line)
-
-        if line.strip() == "$Elements":
-            current_line += 1
-            num_elements = int(lines[current_line].strip())
-            output_lines.append(lines[current_line])
-            current_line += 1
-
-            for _ in range(num_elements):
-                line = lines[current_line].strip()
-                parts = line.split()
-                elm_id = int(parts[0])
-                elm_type = int(parts[1])
-                num_tags = int(parts[2])
-                tags = parts[3:3+num_tags]
-                node_ids = list(map(int, parts[3+num_tags:]))
+    return [nodes[i] for i in _INDEX_MAPS['T4']]
 
-                if elm_type == 5 and len(node_ids) == 8:
-                    node_ids = reorder_flac3d_to_gmsh_hex8(node_ids)
-                elif elm_type == 6 and len(node_ids) == 6:
-                    node_ids = reorder_flac3d_to_gmsh_wedge6(node_ids)
-                elif elm_type == 7 and len(node_ids) == 5:
-                    node_ids = reorder_flac3d_to_gmsh_pyramid5(node_ids)
-                elif elm_type == 4 and len(node_ids) == 4:
-                    node_ids = reorder_flac3d_to_gmsh_tetra4(node_ids)
-
-                new_line = f"{elm_id} {elm_type} {num_tags} {' '.join(tags)} {' '.join(map(str, node_ids))}\n"
-                output_lines.append(new_line)
-                current_line += 1
-        else:
-            current_line += 1
-
-    with open(output_file, 'w') as f:
-        f.writelines(output_lines)
+def convert_msh_node_order(input_file, output_file, batch_size=100000):
+    """
+    把已有MSH 2.2文件 (ASCII或二进制) 中单元的节点从FLAC3D顺序转换为Gmsh顺序
+    按批流式处理，内存占用与文件大小无关
+    
+    参数:
+        input_file: 输入MSH文件
+        output_file: 输出MSH文件
+        batch_size: 每批重排的单元数
+    """
+    reorder_msh_stream(input_file, output_file, batch_size=batch_size)
 
     print(f"✅ Gmsh 节点顺序转换完成，输出文件：{output_file}")
 
 
 
 if __name__ == "__main__":
-    f3grid_2_msh("geo.f3grid","convert.msh")
-    convert_msh_node_order("convert.msh", "output_geo.msh")
\ No newline at end of file
+    # 命令行批量转换，不带参数时与原来相同: geo.f3grid -> output_geo.msh
+    from batch_convert import main
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,204 @@
+import numpy as np
+from f3grid_reader import id_index
+from element_order import GMSH_TYPE_DIM
+
+# FiPy (fipy.meshes.gmshMesh._deriveCellsAndFaces) 对各Gmsh体单元类型使用的面顺序，
+# 面内节点为Gmsh单元中的局部编号。四面体为 _extractRegularFaces 的循环取法
+FIPY_FACE_ORDERINGS = {
+    4: [[0, 1, 2], [1, 2, 3], [2, 3, 0], [3, 0, 1]],
+    5: [[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4], [3, 2, 6, 7], [0, 3, 7, 4], [1, 2, 6, 5]],
+    6: [[0, 1, 2], [5, 4, 3], [3, 4, 1, 0], [4, 5, 2, 1], [5, 3, 0, 2]],
+    7: [[0, 1, 2, 3], [0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4]],
+}
+# 面的最大节点数 (四边形)
+MAX_FACE_NODES = 4
+
+
+def _node_positions(nodes, node_ids):
+    """单元节点编号 -> 在 vertices 中的位置"""
+    return nodes - 1 if node_ids is None else id_index(node_ids, nodes, '节点')
+
+
+def _face_keys(faces):
+    """
+    面的查找键: 节点排序后 (-1填充在前) 每行视为一个定长字节串，
+    相同节点集合的面键相同，可直接用 np.unique / np.searchsorted
+    """
+    keys = np.ascontiguousarray(np.sort(faces, axis=1), dtype=np.int64)
+    return keys.view(np.dtype((np.void, keys.itemsize * keys.shape[1]))).ravel()
+
+
+def _pad_front(faces):
+    """节点数不足 MAX_FACE_NODES 的面在前面补-1 (与FiPy相同)"""
+    padded = np.full((len(faces), MAX_FACE_NODES), -1, dtype=np.int64)
+    padded[:, MAX_FACE_NODES - faces.shape[1]:] = faces
+    return padded
+
+
+def used_vertices(num_vertices, blocks, node_ids=None):
+    """
+    体单元用到的节点，按节点编号从小到大排列 (FiPy只保留体单元引用的节点)
+
+    参数:
+        num_vertices: 节点总数
+        blocks: element_blocks 或 grid_blocks 返回的单元分组
+        node_ids: 节点编号数组，为None时编号 i+1 对应 vertices[i]
+
+    返回:
+        positions: FiPy顶点 k 在 vertices 中的位置
+        vertex_of: (num_vertices,) vertices 中的位置 -> FiPy顶点编号，未使用的为-1
+    """
+    used = np.zeros(num_vertices, dtype=bool)
+    for gmsh_type, _, nodes in blocks:
+        if GMSH_TYPE_DIM[gmsh_type] == 3:
+            used[_node_positions(nodes, node_ids).ravel()] = True
+    positions = np.flatnonzero(used)
+    if node_ids is not None:
+        positions = positions[np.argsort(np.asarray(node_ids)[positions], kind='stable')]
+    vertex_of = np.full(num_vertices, -1, dtype=np.int64)
+    vertex_of[positions] = np.arange(len(positions))
+    return positions, vertex_of
+
+
+def fipy_connectivity(blocks, vertex_of, node_ids=None):
+    """
+    从单元块直接计算FiPy网格的面-顶点和单元-面连接关系，结果与 Gmsh3D 读入同一网格完全相同
+
+    FiPy按单元在文件中的顺序逐个取面，面在第一次出现时编号。这里把所有单元的面
+    一次展开为数组，用排序后的节点键去重，按首次出现的位置重新编号，不需要逐单元的Python循环。
+
+    参数:
+        blocks: 单元分组，只使用体单元块，单元节点需已是Gmsh顺序
+        vertex_of: used_vertices 返回的节点位置 -> FiPy顶点编号
+        node_ids: 节点编号数组，为None时编号 i+1 对应 vertices[i]
+
+    返回:
+        face_vertex_ids: (4, F) 每个面的顶点，三角形面末尾为-1 (FiPy的 faceVertexIDs)
+        cell_face_ids: (最大面数, C) 每个单元的面，不足的为-1 (FiPy的 cellFaceIDs)
+        cell_vertex_ids: (最大节点数, C) 每个单元按Gmsh顺序的顶点，不足的为-1
+        face_keys: 排序后的面键，与 face_order 一起用于把面单元对应到FiPy的面
+        face_order: face_keys 中每个键对应的FiPy面编号
+    """
+    volume_blocks = [(gmsh_type, _node_positions(nodes, node_ids)) for gmsh_type, _, nodes in blocks
+                     if GMSH_TYPE_DIM[gmsh_type] == 3]
+    num_cells = sum(len(cells) for _, cells in volume_blocks)
+    max_faces = max((len(FIPY_FACE_ORDERINGS[t]) for t, _ in volume_blocks), default=0)
+    max_nodes = max((cells.shape[1] for _, cells in volume_blocks), default=0)
+
+    # 按单元顺序展开所有单元的面: 单元在前、面在后，与FiPy的遍历顺序相同
+    cell_faces, cell_vertex_ids, start = [], np.full((max_nodes, num_cells), -1, dtype=np.int64), 0
+    for gmsh_type, cells in volume_blocks:
+        cells = vertex_of[cells]
+        faces = np.empty((len(cells), len(FIPY_FACE_ORDERINGS[gmsh_type]), MAX_FACE_NODES), dtype=np.int64)
+        for k, ordering in enumerate(FIPY_FACE_ORDERINGS[gmsh_type]):
+            faces[:, k] = _pad_front(cells[:, ordering])
+        cell_faces.append(faces)
+        cell_vertex_ids[:cells.shape[1], start:start + len(cells)] = cells.T
+        start += len(cells)
+
+    all_faces = np.concatenate([f.reshape(-1, MAX_FACE_NODES) for f in cell_faces]) if cell_faces \
+        else np.empty((0, MAX_FACE_NODES), dtype=np.int64)
+    face_keys, first, inverse = np.unique(_face_keys(all_faces), return_index=True, return_inverse=True)
+    # 按首次出现的位置编号
+    by_first = np.argsort(first, kind='stable')
+    face_order = np.empty(len(first), dtype=np.int64)
+    face_order[by_first] = np.arange(len(first))
+    face_of = face_order[inverse.ravel()]
+
+    # FiPy把补-1后的面整体反转: 节点顺序倒过来，-1移到末尾
+    face_vertex_ids = all_faces[first[by_first]].T[::-1].copy()
+
+    cell_face_ids = np.full((max_faces, num_cells), -1, dtype=np.int64)
+    start, row = 0, 0
+    for faces in cell_faces:
+        n, k = faces.shape[:2]
+        cell_face_ids[:k, start:start + n] = face_of[row:row + n * k].reshape(n, k).T
+        start, row = start + n, row + n * k
+    return face_vertex_ids, cell_face_ids, cell_vertex_ids, face_keys, face_order
+
+
+def face_tag_maps(blocks, tags, vertex_of, face_keys, face_order, num_faces, node_ids=None):
+    """
+    面单元 (三角形、四边形) 的标签对应到FiPy的面
+
+    与 Gmsh3D 相同，按节点集合匹配，一个面属于多个面单元时保留文件中最后一个的标签，
+    不属于任何面单元的面标签为0。
+
+    返回:
+        physical, geometrical: (F,) 每个FiPy面的物理标签和几何实体标签
+    """
+    physical = np.zeros(num_faces, dtype=np.int64)
+    geometrical = np.zeros(num_faces, dtype=np.int64)
+    parts = [(_node_positions(nodes, node_ids), np.asarray(block_tags))
+             for (gmsh_type, _, nodes), block_tags in zip(blocks, tags) if GMSH_TYPE_DIM[gmsh_type] == 2]
+    if not parts or not num_faces:
+        return physical, geometrical
+
+    faces = np.concatenate([_pad_front(vertex_of[nodes]) for nodes, _ in parts])
+    face_tags = np.concatenate([block_tags for _, block_tags in parts])
+    # 包含体单元未用到节点的面单元不对应任何FiPy面
+    valid = (faces >= 0).sum(axis=1) == np.concatenate([np.full(len(n), n.shape[1]) for n, _ in parts])
+    keys = _face_keys(faces)
+    found = np.minimum(np.searchsorted(face_keys, keys), len(face_keys) - 1)
+    matched = np.flatnonzero(valid & (face_keys[found] == keys))
+
+    # 同一个面重复出现时取最后一个: 倒序后取每个面第一次出现的位置
+    matched = matched[::-1]
+    target = face_order[found[matched]]
+    _, last = np.unique(target, return_index=True)
+    physical[target[last]] = face_tags[matched[last], 0]
+    geometrical[target[last]] = face_tags[matched[last], 1]
+    return physical, geometrical
+
+
+def create_fipy_mesh(vertices, blocks, tags=None, physical_names=(), node_ids=None):
+    """
+    由节点坐标和单元块直接在内存中创建FiPy的 Gmsh3D 网格，不写出、不读入MSH文件
+
+    结果与用 Gmsh3D 读入 write_msh22 写出的同一网格相同: 顶点、面和单元的编号一致，
+    physicalCells / physicalFaces / physicalCellMap 等属性也相同，可以直接替换
+    Gmsh3D(文件名)。网格不分区 (串行通信器)。
+
+    参数:
+        vertices: 节点坐标数组 (N, 3)
+        blocks: element_blocks 或 grid_blocks 返回的单元分组，单元节点需已是Gmsh顺序
+        tags: 与 blocks 对应的每块单元标签 (n, 2)，列为 (物理标签, 几何实体标签)，为None时均为0
+        physical_names: 物理组名称 [(维数, 物理标签, 名称), ...]
+        node_ids: 节点编号数组，为None时编号 i+1 对应 vertices[i]
+
+    返回:
+        mesh: fipy.Gmsh3D
+    """
+    from fipy import CellVariable, FaceVariable, Gmsh3D
+    from fipy.meshes.gmshMesh import _GmshTopology
+    from fipy.meshes.mesh import Mesh
+    from fipy.tools import serialComm
+
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if tags is None:
+        tags = [np.zeros((len(nodes), 2), dtype=np.int64) for _, _, nodes in blocks]
+    positions, vertex_of = used_vertices(len(vertices), blocks, node_ids)
+    face_vertex_ids, cell_face_ids, cell_vertex_ids, face_keys, face_order = \
+        fipy_connectivity(blocks, vertex_of, node_ids)
+    if cell_face_ids.shape[1] == 0:
+        raise ValueError("网格中没有体单元")
+    cell_tags = np.concatenate([np.asarray(block_tags) for (gmsh_type, _, _), block_tags in zip(blocks, tags)
+                                if GMSH_TYPE_DIM[gmsh_type] == 3])
+    face_physical, face_geometrical = face_tag_maps(blocks, tags, vertex_of, face_keys, face_order,
+                                                    face_vertex_ids.shape[1], node_ids)
+
+    # 与 Gmsh3D.__setstate__ 相同，不经过读文件的 __init__ 直接初始化
+    mesh = Gmsh3D.__new__(Gmsh3D)
+    mesh.cellGlobalIDs = list(np.arange(cell_face_ids.shape[1]))
+    mesh.gCellGlobalIDs = []
+    mesh._orderedCellVertexIDs_data = np.ma.masked_equal(cell_vertex_ids, -1)
+    Mesh.__init__(mesh, vertexCoords=vertices[positions].T.copy(), faceVertexIDs=face_vertex_ids,
+                  cellFaceIDs=cell_face_ids, communicator=serialComm, _TopologyClass=_GmshTopology)
+
+    mesh.physicalCellMap = CellVariable(mesh=mesh, value=cell_tags[:, 0])
+    mesh.geometricalCellMap = CellVariable(mesh=mesh, value=cell_tags[:, 1])
+    mesh.physicalFaceMap = FaceVariable(mesh=mesh, value=face_physical)
+    mesh.geometricalFaceMap = FaceVariable(mesh=mesh, value=face_geometrical)
+    mesh.physicalCells = {name: mesh.physicalCellMap == tag for dim, tag, name in physical_names if dim == 3}
+    mesh.physicalFaces = {name: mesh.physicalFaceMap == tag for dim, tag, name in physical_names if dim == 2}
+    return mesh
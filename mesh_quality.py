@@ -0,0 +1,235 @@
+import numpy as np
+from element_order import MIRROR_ORDERS
+from f3grid_reader import id_index
+
+# 以下各表均按Gmsh节点顺序，参考单元上的有向体积和角点雅可比均为正
+
+# Gmsh体单元类型 -> 分解出的四面体 (每行4个节点位置)
+TETRA_SPLITS = {
+    4: np.array([[0, 1, 2, 3]]),
+    5: np.array([[0, 1, 2, 6], [0, 2, 3, 6], [0, 3, 7, 6], [0, 7, 4, 6], [0, 4, 5, 6], [0, 5, 1, 6]]),
+    6: np.array([[0, 1, 2, 3], [1, 2, 3, 4], [2, 3, 4, 5]]),
+    7: np.array([[0, 1, 2, 4], [0, 2, 3, 4]]),
+}
+
+# Gmsh体单元类型 -> 每个角点及其三个相邻节点 (角点, a, b, c)，
+# 角点雅可比为 det(a-角点, b-角点, c-角点)。金字塔顶点有四条棱，不计入
+CORNERS = {
+    4: np.array([[0, 1, 2, 3], [1, 2, 0, 3], [2, 0, 1, 3], [3, 0, 2, 1]]),
+    5: np.array([[0, 1, 3, 4], [1, 2, 0, 5], [2, 3, 1, 6], [3, 0, 2, 7],
+                 [4, 7, 5, 0], [5, 4, 6, 1], [6, 5, 7, 2], [7, 6, 4, 3]]),
+    6: np.array([[0, 1, 2, 3], [1, 2, 0, 4], [2, 0, 1, 5], [3, 5, 4, 0], [4, 3, 5, 1], [5, 4, 3, 2]]),
+    7: np.array([[0, 1, 3, 4], [1, 2, 0, 4], [2, 3, 1, 4], [3, 0, 2, 4]]),
+}
+
+# Gmsh体单元类型 -> 各面的节点 (首尾相接)，按边数分组
+FACES = {
+    4: {3: np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]])},
+    5: {4: np.array([[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]])},
+    6: {3: np.array([[0, 1, 2], [3, 4, 5]]),
+        4: np.array([[0, 1, 4, 3], [1, 2, 5, 4], [2, 0, 3, 5]])},
+    7: {3: np.array([[0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4]]),
+        4: np.array([[0, 1, 2, 3]])},
+}
+
+
+def _edges(faces):
+    """由面的节点表得到单元的全部棱 (节点位置对，不重复)"""
+    edges = set()
+    for table in faces.values():
+        for face in table.tolist():
+            edges.update(tuple(sorted(pair)) for pair in zip(face, face[1:] + face[:1]))
+    return np.array(sorted(edges))
+
+
+EDGES = {gmsh_type: _edges(faces) for gmsh_type, faces in FACES.items()}
+
+# 每批计算的单元数
+DEFAULT_BATCH_SIZE = 100000
+
+
+class MeshQuality:
+    """
+    体单元质量指标，按 blocks 中体单元的先后顺序排列 (即写出后的单元顺序)
+
+    属性:
+        gmsh_types: 单元的Gmsh类型 (K,) int64
+        index: 单元在其所在块 index 数组中的值 (K,)，对 element_blocks 的块即为单元位置
+        volumes: 有向体积 (K,)，由分解出的四面体有向体积求和
+        min_jacobian: 各角点缩放雅可比的最小值 (K,)，范围 [-1, 1]，
+                      正方体为1，小于等于0表示单元翻转或退化
+        aspect_ratio: 最长棱与最短棱之比 (K,)，最短棱长度为0时为 inf
+        skewness: 等角偏斜度 (K,)，范围 [0, 1]，规则单元为0
+    """
+
+    def __init__(self, gmsh_types, index, volumes, min_jacobian, aspect_ratio, skewness):
+        self.gmsh_types = gmsh_types
+        self.index = index
+        self.volumes = volumes
+        self.min_jacobian = min_jacobian
+        self.aspect_ratio = aspect_ratio
+        self.skewness = skewness
+
+    @property
+    def num_elements(self):
+        return len(self.volumes)
+
+    def inverted(self):
+        """翻转或退化的单元: 有向体积或某个角点雅可比不为正，或坐标含NaN"""
+        return ~(self.volumes > 0) | ~(self.min_jacobian > 0)
+
+    def summary(self):
+        """返回 {Gmsh类型: {指标: 值}} 的统计，用于打印"""
+        bad = self.inverted()
+        result = {}
+        for gmsh_type in np.unique(self.gmsh_types).tolist():
+            mask = self.gmsh_types == gmsh_type
+            result[gmsh_type] = {
+                'count': int(mask.sum()),
+                'inverted': int(bad[mask].sum()),
+                'min_jacobian': float(self.min_jacobian[mask].min()),
+                'max_aspect_ratio': float(self.aspect_ratio[mask].max()),
+                'max_skewness': float(self.skewness[mask].max()),
+            }
+        return result
+
+
+def _det(a, b, c):
+    """逐行计算 det([a, b, c]) = a · (b × c)"""
+    return np.einsum('ij,ij->i', a, np.cross(b, c))
+
+
+def signed_volumes(points, gmsh_type):
+    """
+    有向体积
+
+    参数:
+        points: (n, 节点数, 3) 每个单元节点的坐标，Gmsh节点顺序
+        gmsh_type: Gmsh体单元类型
+
+    返回:
+        (n,) float64
+    """
+    volumes = np.zeros(len(points))
+    for a, b, c, d in TETRA_SPLITS[gmsh_type]:
+        p = points[:, a]
+        volumes += _det(points[:, b] - p, points[:, c] - p, points[:, d] - p)
+    return volumes / 6
+
+
+def corner_jacobians(points, gmsh_type, scaled=True):
+    """
+    各角点的雅可比行列式
+
+    参数:
+        scaled: 是否除以三条棱长之积 (缩放雅可比，范围 [-1, 1])
+
+    返回:
+        (n, 角点数) float64
+    """
+    table = CORNERS[gmsh_type]
+    result = np.empty((len(points), len(table)))
+    for k, (i, a, b, c) in enumerate(table):
+        p = points[:, i]
+        e1, e2, e3 = points[:, a] - p, points[:, b] - p, points[:, c] - p
+        result[:, k] = _det(e1, e2, e3)
+        if scaled:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[:, k] /= np.linalg.norm(e1, axis=1) * np.linalg.norm(e2, axis=1) * np.linalg.norm(e3, axis=1)
+    return result
+
+
+def aspect_ratios(points, gmsh_type):
+    """最长棱与最短棱之比"""
+    edges = EDGES[gmsh_type]
+    lengths = np.linalg.norm(points[:, edges[:, 1]] - points[:, edges[:, 0]], axis=2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return lengths.max(axis=1) / lengths.min(axis=1)
+
+
+def equiangle_skewness(points, gmsh_type):
+    """
+    等角偏斜度: 各面内角相对理想角 (三角形60°，四边形90°) 的最大偏离，
+    max((θmax-θe)/(180-θe), (θe-θmin)/θe)
+    """
+    skewness = np.zeros(len(points))
+    for num_sides, faces in FACES[gmsh_type].items():
+        ideal = 180.0 * (num_sides - 2) / num_sides
+        corners = points[:, faces]  # (n, 面数, 边数, 3)
+        to_prev = np.roll(corners, 1, axis=2) - corners
+        to_next = np.roll(corners, -1, axis=2) - corners
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cos = np.einsum('...k,...k->...', to_prev, to_next) / (
+                np.linalg.norm(to_prev, axis=-1) * np.linalg.norm(to_next, axis=-1))
+        angles = np.degrees(np.arccos(np.clip(cos, -1, 1))).reshape(len(points), -1)
+        face_skew = np.maximum((angles.max(axis=1) - ideal) / (180 - ideal),
+                               (ideal - angles.min(axis=1)) / ideal)
+        skewness = np.maximum(skewness, face_skew)
+    return skewness
+
+
+def mesh_quality(vertices, blocks, node_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    直接在数组上计算体单元质量，不需要写出或重新读入网格
+
+    参数:
+        vertices: 节点坐标 (N, 3)
+        blocks: element_blocks 或 grid_blocks 返回的单元分组 (节点为Gmsh顺序)，
+                面单元块被忽略
+        node_ids: 节点编号 (N,)，为None时编号 i+1 的节点坐标为 vertices[i]
+        batch_size: 每批计算的单元数，限制中间数组的大小
+
+    返回:
+        MeshQuality
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    fields = {name: [] for name in ('gmsh_types', 'index', 'volumes', 'min_jacobian', 'aspect_ratio', 'skewness')}
+    for gmsh_type, index, nodes in blocks:
+        if gmsh_type not in TETRA_SPLITS:
+            continue
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size]
+            positions = batch - 1 if node_ids is None else id_index(node_ids, batch, '节点')
+            points = vertices[positions]
+            fields['gmsh_types'].append(np.full(len(batch), gmsh_type, dtype=np.int64))
+            fields['index'].append(index[start:start + batch_size])
+            fields['volumes'].append(signed_volumes(points, gmsh_type))
+            fields['min_jacobian'].append(corner_jacobians(points, gmsh_type).min(axis=1))
+            fields['aspect_ratio'].append(aspect_ratios(points, gmsh_type))
+            fields['skewness'].append(equiangle_skewness(points, gmsh_type))
+
+    arrays = {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in fields.items()}
+    return MeshQuality(**arrays)
+
+
+def repair_orientation(vertices, blocks, node_ids=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    把有向体积为负的体单元原地换成镜像节点顺序 (见 element_order.MIRROR_ORDERS)
+
+    FLAC3D中手性相反的单元按Gmsh顺序重排后体积为负，镜像后即为正常单元。
+    各块按 batch_size 分批计算体积，需要翻转的行用一次花式索引整体改写。
+    角点雅可比正负混杂的扭曲单元无法靠重排修复，修复后仍会被 MeshQuality.inverted 标出。
+
+    参数:
+        vertices: 节点坐标 (N, 3)
+        blocks: element_blocks 或 grid_blocks 返回的单元分组 (Gmsh节点顺序)，
+                体单元块的 nodes 数组被原地修改，面单元块不变
+        node_ids: 节点编号 (N,)，为None时编号 i+1 的节点坐标为 vertices[i]
+        batch_size: 每批计算的单元数
+
+    返回:
+        flipped: {Gmsh类型: 翻转的单元数}，只包含有翻转的类型
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    flipped = {}
+    for gmsh_type, _, nodes in blocks:
+        if gmsh_type not in MIRROR_ORDERS:
+            continue
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size]
+            positions = batch - 1 if node_ids is None else id_index(node_ids, batch, '节点')
+            rows = np.flatnonzero(signed_volumes(vertices[positions], gmsh_type) < 0)
+            if rows.size:
+                batch[rows] = batch[rows][:, MIRROR_ORDERS[gmsh_type]]
+                flipped[gmsh_type] = flipped.get(gmsh_type, 0) + int(rows.size)
+    return flipped
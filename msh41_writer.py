@@ -0,0 +1,166 @@
+import numpy as np
+from f3grid_reader import id_index
+from element_order import GMSH_TYPE_DIM
+from msh_writer import (DEFAULT_BATCH_SIZE, DEFAULT_FLOAT_FORMAT, _default_tags, _format_rows,
+                        _node_ids, _write_header)
+
+
+def entity_blocks(blocks, tags):
+    """
+    把单元块按几何实体拆分为MSH 4.1的实体块
+
+    每一维中 (几何实体标签, 物理标签) 相同的单元属于同一个实体，实体从1开始连续编号。
+    grid_blocks 的标签中两者相同，因此每个单元组 (面组) 对应一个实体。
+
+    参数:
+        blocks: element_blocks 或 grid_blocks 返回的单元分组
+        tags: 与 blocks 对应的每块标签数组 (n, 2)，列为 (物理标签, 几何实体标签)
+
+    返回:
+        entities: {维数: (k, 2) 数组}，第 t-1 行为实体 t 的 (几何实体标签, 物理标签)
+        sub_blocks: [(维数, 实体编号, gmsh_type, index, nodes), ...]，
+                    按输入块的顺序，每块内按实体编号拆分，块内单元保持原顺序
+    """
+    keys_by_dim = {}
+    for (gmsh_type, _, _), block_tags in zip(blocks, tags):
+        keys_by_dim.setdefault(GMSH_TYPE_DIM[gmsh_type], []).append(np.asarray(block_tags)[:, ::-1])
+    entities = {dim: np.unique(np.concatenate(parts), axis=0) for dim, parts in sorted(keys_by_dim.items())}
+
+    sub_blocks = []
+    for (gmsh_type, index, nodes), block_tags in zip(blocks, tags):
+        dim = GMSH_TYPE_DIM[gmsh_type]
+        keys = entities[dim]
+        # (几何实体, 物理) 合成一个整数键，在已排序的实体中二分查找
+        base = int(keys[:, 1].max()) + 1
+        entity = np.searchsorted(keys[:, 0] * base + keys[:, 1],
+                                 np.asarray(block_tags)[:, 1] * base + np.asarray(block_tags)[:, 0])
+        order = np.argsort(entity, kind='stable')
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(entity, minlength=len(keys)))))
+        for e in np.flatnonzero(np.diff(bounds)).tolist():
+            rows = order[bounds[e]:bounds[e + 1]]
+            sub_blocks.append((dim, e + 1, gmsh_type, index[rows], nodes[rows]))
+    return entities, sub_blocks
+
+
+def _bounding_boxes(vertices, sub_blocks, node_ids, batch_size):
+    """每个实体所含节点的包围盒 {(维数, 实体编号): (min xyz, max xyz)}"""
+    boxes = {}
+    for dim, entity, _, _, nodes in sub_blocks:
+        lower, upper = boxes.get((dim, entity), (np.full(3, np.inf), np.full(3, -np.inf)))
+        for start in range(0, len(nodes), batch_size):
+            batch = nodes[start:start + batch_size].ravel()
+            points = vertices[batch - 1 if node_ids is None else id_index(node_ids, batch, '节点')]
+            lower = np.minimum(lower, points.min(axis=0))
+            upper = np.maximum(upper, points.max(axis=0))
+        boxes[(dim, entity)] = (lower, upper)
+    return boxes
+
+
+def _write_entities(f, entities, boxes, binary):
+    f.write(b"$Entities\n")
+    counts = [len(entities.get(dim, ())) for dim in range(4)]
+    if binary:
+        f.write(np.array(counts, dtype=np.uint64).tobytes())
+    else:
+        f.write(b"%d %d %d %d\n" % tuple(counts))
+    for dim in sorted(entities):
+        for t, (_, physical) in enumerate(entities[dim].tolist(), start=1):
+            lower, upper = boxes[(dim, t)]
+            # 点只有坐标，其余实体为包围盒；物理标签0表示不属于物理组；不写边界实体
+            coords = lower if dim == 0 else np.concatenate((lower, upper))
+            physicals = [physical] if physical else []
+            if binary:
+                f.write(np.array([t], dtype=np.int32).tobytes())
+                f.write(coords.astype(np.float64).tobytes())
+                f.write(np.array([len(physicals)], dtype=np.uint64).tobytes())
+                f.write(np.array(physicals, dtype=np.int32).tobytes())
+                if dim > 0:
+                    f.write(np.array([0], dtype=np.uint64).tobytes())
+            else:
+                fields = [str(t)] + ['%.17g' % c for c in coords] + [str(len(physicals))] + \
+                         [str(p) for p in physicals] + (['0'] if dim > 0 else [])
+                f.write((' '.join(fields) + '\n').encode())
+    if binary:
+        f.write(b"\n")
+    f.write(b"$EndEntities\n\n")
+
+
+def _write_nodes(f, vertices, node_ids, entity, binary, batch_size, float_format):
+    """所有节点写为一个节点块，归属于最高维的第一个实体"""
+    num_nodes = len(vertices)
+    ids = _node_ids(node_ids, 0, num_nodes)
+    low, high = (int(ids.min()), int(ids.max())) if num_nodes else (0, 0)
+    num_blocks = 1 if num_nodes else 0
+    f.write(b"$Nodes\n")
+    if binary:
+        f.write(np.array([num_blocks, num_nodes, low, high], dtype=np.uint64).tobytes())
+        if num_blocks:
+            f.write(np.array([entity[0], entity[1], 0], dtype=np.int32).tobytes())
+            f.write(np.array([num_nodes], dtype=np.uint64).tobytes())
+            f.write(ids.astype(np.uint64).tobytes())
+            for start in range(0, num_nodes, batch_size):
+                f.write(np.ascontiguousarray(vertices[start:start + batch_size], dtype=np.float64).tobytes())
+        f.write(b"\n")
+    else:
+        f.write(b"%d %d %d %d\n" % (num_blocks, num_nodes, low, high))
+        if num_blocks:
+            f.write(b"%d %d 0 %d\n" % (entity[0], entity[1], num_nodes))
+            for start in range(0, num_nodes, batch_size):
+                f.write(_format_rows("%d\n", ids[start:start + batch_size]).encode())
+            row_format = f"{float_format} {float_format} {float_format}\n"
+            for start in range(0, num_nodes, batch_size):
+                f.write(_format_rows(row_format, vertices[start:start + batch_size]).encode())
+    f.write(b"$EndNodes\n\n")
+
+
+def _write_elements(f, sub_blocks, binary, batch_size):
+    num_elements = sum(len(nodes) for _, _, _, _, nodes in sub_blocks)
+    f.write(b"$Elements\n")
+    header = [len(sub_blocks), num_elements, 1 if num_elements else 0, num_elements]
+    if binary:
+        f.write(np.array(header, dtype=np.uint64).tobytes())
+    else:
+        f.write(b"%d %d %d %d\n" % tuple(header))
+
+    first_id = 1
+    for dim, entity, gmsh_type, _, nodes in sub_blocks:
+        if binary:
+            f.write(np.array([dim, entity, gmsh_type], dtype=np.int32).tobytes())
+            f.write(np.array([len(nodes)], dtype=np.uint64).tobytes())
+        else:
+            f.write(b"%d %d %d %d\n" % (dim, entity, gmsh_type, len(nodes)))
+        row_format = "%d" + " %d" * nodes.shape[1] + "\n"
+        for start in range(0, len(nodes), batch_size):
+            block = nodes[start:start + batch_size]
+            ids = np.arange(first_id + start, first_id + start + len(block))
+            if binary:
+                f.write(np.column_stack((ids, block)).astype(np.uint64).tobytes())
+            else:
+                f.write(_format_rows(row_format, np.column_stack((ids, block))).encode())
+        first_id += len(nodes)
+    if binary:
+        f.write(b"\n")
+    f.write(b"$EndElements\n")
+
+
+def write_msh41(filename, vertices, blocks, tags=None, binary=False, node_ids=None,
+                batch_size=DEFAULT_BATCH_SIZE, float_format=DEFAULT_FLOAT_FORMAT, physical_names=()):
+    """
+    写出Gmsh MSH 4.1文件，参数与 msh_writer.write_msh22 相同
+
+    单元按 (几何实体, 单元类型) 分为实体块 (见 entity_blocks)，每块的单元编号连续，
+    块的先后顺序与 blocks 相同，因此各单元组内的单元顺序与MSH 2.2输出一致。
+    二进制格式中编号为 size_t (8字节)，实体和类型为 int (4字节)，整块由数组 tobytes() 写出。
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    if tags is None:
+        tags = _default_tags(blocks)
+    entities, sub_blocks = entity_blocks(blocks, tags)
+    boxes = _bounding_boxes(vertices, sub_blocks, node_ids, batch_size)
+    node_entity = (max(entities), 1) if entities else (3, 1)
+
+    with open(filename, 'wb') as f:
+        _write_header(f, binary, physical_names, version=b"4.1")
+        _write_entities(f, entities, boxes, binary)
+        _write_nodes(f, vertices, node_ids, node_entity, binary, batch_size, float_format)
+        _write_elements(f, sub_blocks, binary, batch_size)
@@ -0,0 +1,353 @@
+import mmap
+import numpy as np
+from f3grid_reader import parse_numbers, token_layout
+from element_order import GMSH_TYPE_NODES
+
+# MSH 4.1 二进制中的 size_t 为8字节 (data-size 8)
+_SIZE_T = 'u8'
+
+
+def _section(data, name, pos=0):
+    """
+    返回 $name 与 $Endname 之间内容的 (起始偏移, 结束偏移)，没有该区段时返回None。
+    二进制文件中区段的结束位置由数据长度决定，应从上一区段的数据末尾开始查找
+    """
+    start = data.find(b'$' + name + b'\n', pos)
+    if start == -1:
+        start = data.find(b'$' + name + b'\r\n', pos)
+        if start == -1:
+            return None
+    start = data.find(b'\n', start) + 1
+    end = data.find(b'$End' + name, start)
+    return start, end
+
+
+def _read_line(data, pos):
+    """读取一行文本，返回 (去掉首尾空白的内容, 下一行起始偏移)"""
+    end = data.find(b'\n', pos)
+    return data[pos:end].strip(), end + 1
+
+
+def read_mesh_format(data):
+    """
+    解析 $MeshFormat
+
+    返回:
+        version: 版本字符串，如 '2.2'
+        binary: 是否为二进制格式
+        byte_order: 二进制数据的字节序 ('<' 或 '>')，ASCII格式为None
+    """
+    bounds = _section(data, b'MeshFormat')
+    if bounds is None:
+        raise ValueError("不是Gmsh MSH文件: 缺少 $MeshFormat")
+    line, pos = _read_line(data, bounds[0])
+    version, file_type, data_size = line.split()
+    binary = file_type == b'1'
+    byte_order = None
+    if binary:
+        if data_size != b'8':
+            raise ValueError(f"仅支持双精度 (data-size 8) 的二进制MSH文件，当前为 {data_size.decode()}")
+        marker = np.frombuffer(data[pos:pos + 4], dtype='<i4')[0]
+        byte_order = '<' if marker == 1 else '>'
+    return version.decode(), binary, byte_order
+
+
+def msh_file_format(filename):
+    """读取文件开头的 $MeshFormat，返回值同 read_mesh_format"""
+    with open(filename, 'rb') as f:
+        head = f.read(256)
+    return read_mesh_format(head)
+
+
+def is_binary_msh(filename):
+    """判断MSH文件是否为二进制格式"""
+    return msh_file_format(filename)[1]
+
+
+def read_physical_names(filename):
+    """
+    读取 $PhysicalNames 区段 (位于节点数据之前，二进制文件中也是文本)
+
+    返回:
+        [(维数, 物理标签, 名称), ...]，没有该区段时为空列表
+    """
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            nodes = data.find(b'$Nodes')
+            bounds = _section(data[:nodes if nodes != -1 else len(data)], b'PhysicalNames')
+            if bounds is None:
+                return []
+            count, pos = _read_line(data, bounds[0])
+            names = []
+            for line in data[pos:bounds[1]].decode().splitlines()[:int(count)]:
+                dim, tag, name = line.split(maxsplit=2)
+                names.append((int(dim), int(tag), name.strip().strip('"')))
+    return names
+
+
+def _read_ascii_nodes(data, start, end):
+    count, pos = _read_line(data, start)
+    values = parse_numbers(data[pos:end], np.float64)
+    if values is None or values.size != 4 * int(count):
+        raise ValueError("无法解析 $Nodes 区段")
+    values = values.reshape(-1, 4)
+    return values[:, 0].astype(np.int64), np.ascontiguousarray(values[:, 1:])
+
+
+def _read_binary_nodes(data, start, byte_order):
+    count, pos = _read_line(data, start)
+    record = np.dtype([('id', byte_order + 'i4'), ('xyz', byte_order + 'f8', (3,))])
+    rows = np.frombuffer(data, dtype=record, count=int(count), offset=pos)
+    return rows['id'].astype(np.int64), rows['xyz'].astype(np.float64), pos + rows.nbytes
+
+
+def _group_elements(rows_by_key):
+    """把 {(类型, 标签数): [行数组, ...]} 整理为按类型排序的块"""
+    blocks = []
+    for (gmsh_type, num_tags), parts in sorted(rows_by_key.items()):
+        rows = np.concatenate(parts)
+        blocks.append((gmsh_type, rows[:, 0], rows[:, 1:1 + num_tags], rows[:, 1 + num_tags:]))
+    return blocks
+
+
+def _read_ascii_elements(data, start, end):
+    count, pos = _read_line(data, start)
+    text = data[pos:end]
+    _, counts = token_layout(text)
+    values = parse_numbers(text, np.int64)
+    if values is None or values.size != counts.sum() or len(counts) != int(count):
+        raise ValueError("无法解析 $Elements 区段")
+
+    line_starts = np.cumsum(counts) - counts
+    types = values[line_starts + 1]
+    num_tags = values[line_starts + 2]
+    rows_by_key = {}
+    # 同类型、同标签数的行长度相同，可整体取成二维数组
+    for gmsh_type, ntags, length in set(zip(types.tolist(), num_tags.tolist(), counts.tolist())):
+        mask = (types == gmsh_type) & (num_tags == ntags) & (counts == length)
+        columns = np.r_[0, 3:length]  # 去掉类型和标签数两列
+        rows = values[line_starts[mask][:, None] + columns]
+        rows_by_key.setdefault((gmsh_type, ntags), []).append(rows)
+    return _group_elements(rows_by_key)
+
+
+def _read_binary_elements(data, start, byte_order):
+    count, pos = _read_line(data, start)
+    remaining = int(count)
+    int32 = np.dtype(byte_order + 'i4')
+    rows_by_key = {}
+    while remaining > 0:
+        gmsh_type, num_elements, num_tags = np.frombuffer(data, dtype=int32, count=3, offset=pos).tolist()
+        pos += 12
+        if gmsh_type not in GMSH_TYPE_NODES:
+            raise ValueError(f"不支持的Gmsh单元类型: {gmsh_type}")
+        width = 1 + num_tags + GMSH_TYPE_NODES[gmsh_type]
+        rows = np.frombuffer(data, dtype=int32, count=num_elements * width, offset=pos)
+        rows_by_key.setdefault((gmsh_type, num_tags), []).append(rows.reshape(num_elements, width).astype(np.int64))
+        pos += rows.nbytes
+        remaining -= num_elements
+    return _group_elements(rows_by_key)
+
+
+def read_msh22(filename):
+    """
+    读取Gmsh MSH 2.2文件 (ASCII 或 二进制)
+
+    参数:
+        filename: MSH文件名
+
+    返回:
+        node_ids: 节点编号 (N,) int64
+        vertices: 节点坐标 (N, 3) float64
+        blocks: [(gmsh_type, element_ids, tags, nodes), ...]，按 (类型, 标签数) 分组，
+                每组内保持文件中的顺序；nodes 为 (n, 每单元节点数) 的节点编号
+    """
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            version, binary, byte_order = read_mesh_format(data)
+            if not version.startswith('2'):
+                raise ValueError(f"仅支持MSH 2.x 格式，当前为 {version}")
+
+            nodes = _section(data, b'Nodes')
+            if nodes is None:
+                raise ValueError("MSH文件缺少 $Nodes 区段")
+            if binary:
+                node_ids, vertices, nodes_end = _read_binary_nodes(data, nodes[0], byte_order)
+            else:
+                node_ids, vertices = _read_ascii_nodes(data, *nodes)
+                nodes_end = nodes[1]
+
+            elements = _section(data, b'Elements', nodes_end)
+            if elements is None:
+                raise ValueError("MSH文件缺少 $Elements 区段")
+            if binary:
+                blocks = _read_binary_elements(data, elements[0], byte_order)
+            else:
+                blocks = _read_ascii_elements(data, *elements)
+    return node_ids, vertices, blocks
+
+
+def _read_ascii_entities(data, start, end):
+    """返回 {(维数, 实体编号): 第一个物理标签 (没有时为0)}"""
+    values = parse_numbers(data[start:end], np.float64)
+    if values is None or values.size < 4:
+        raise ValueError("无法解析 $Entities 区段")
+    values = values.astype(np.int64).tolist()  # 包围盒坐标截断为整数无妨，只需要标签和计数
+    physicals, pos = {}, 4
+    for dim, count in enumerate(values[:4]):
+        for _ in range(count):
+            tag = values[pos]
+            pos += 4 if dim == 0 else 7
+            num_physicals = values[pos]
+            physicals[(dim, tag)] = values[pos + 1] if num_physicals else 0
+            pos += 1 + num_physicals
+            if dim > 0:
+                pos += 1 + values[pos]
+    return physicals
+
+
+def _read_binary_entities(data, start, byte_order):
+    int32, size_t = np.dtype(byte_order + 'i4'), np.dtype(byte_order + _SIZE_T)
+    counts = np.frombuffer(data, dtype=size_t, count=4, offset=start).tolist()
+    physicals, pos = {}, start + 32
+    for dim, count in enumerate(counts):
+        for _ in range(count):
+            tag = int(np.frombuffer(data, dtype=int32, count=1, offset=pos)[0])
+            pos += 4 + (24 if dim == 0 else 48)
+            num_physicals = int(np.frombuffer(data, dtype=size_t, count=1, offset=pos)[0])
+            tags = np.frombuffer(data, dtype=int32, count=num_physicals, offset=pos + 8)
+            physicals[(dim, tag)] = int(tags[0]) if num_physicals else 0
+            pos += 8 + 4 * num_physicals
+            if dim > 0:
+                num_bounding = int(np.frombuffer(data, dtype=size_t, count=1, offset=pos)[0])
+                pos += 8 + 4 * num_bounding
+    return physicals, pos
+
+
+def _read_ascii_nodes41(data, start, end):
+    values = parse_numbers(data[start:end], np.float64)
+    if values is None or values.size < 4:
+        raise ValueError("无法解析 $Nodes 区段")
+    num_blocks, num_nodes = int(values[0]), int(values[1])
+    ids, coords, pos = [], [], 4
+    for _ in range(num_blocks):
+        parametric, count = int(values[pos + 2]), int(values[pos + 3])
+        if parametric:
+            raise ValueError("不支持带参数坐标的节点块")
+        pos += 4
+        ids.append(values[pos:pos + count].astype(np.int64))
+        coords.append(values[pos + count:pos + 4 * count].reshape(count, 3))
+        pos += 4 * count
+    if pos != values.size or sum(len(i) for i in ids) != num_nodes:
+        raise ValueError("无法解析 $Nodes 区段")
+    return np.concatenate(ids or [np.zeros(0, np.int64)]), np.concatenate(coords or [np.zeros((0, 3))])
+
+
+def _read_binary_nodes41(data, start, byte_order):
+    int32, size_t = np.dtype(byte_order + 'i4'), np.dtype(byte_order + _SIZE_T)
+    float64 = np.dtype(byte_order + 'f8')
+    num_blocks = int(np.frombuffer(data, dtype=size_t, count=4, offset=start)[0])
+    ids, coords, pos = [], [], start + 32
+    for _ in range(num_blocks):
+        parametric = int(np.frombuffer(data, dtype=int32, count=3, offset=pos)[2])
+        count = int(np.frombuffer(data, dtype=size_t, count=1, offset=pos + 12)[0])
+        if parametric:
+            raise ValueError("不支持带参数坐标的节点块")
+        pos += 20
+        ids.append(np.frombuffer(data, dtype=size_t, count=count, offset=pos).astype(np.int64))
+        pos += 8 * count
+        coords.append(np.frombuffer(data, dtype=float64, count=3 * count, offset=pos).reshape(count, 3).astype(np.float64))
+        pos += 24 * count
+    return (np.concatenate(ids or [np.zeros(0, np.int64)]),
+            np.concatenate(coords or [np.zeros((0, 3))]), pos)
+
+
+def _read_ascii_elements41(data, start, end, physicals):
+    values = parse_numbers(data[start:end], np.int64)
+    if values is None or values.size < 4:
+        raise ValueError("无法解析 $Elements 区段")
+    rows_by_key, pos = {}, 4
+    for _ in range(int(values[0])):
+        dim, entity, gmsh_type, count = values[pos:pos + 4].tolist()
+        if gmsh_type not in GMSH_TYPE_NODES:
+            raise ValueError(f"不支持的Gmsh单元类型: {gmsh_type}")
+        pos += 4
+        width = 1 + GMSH_TYPE_NODES[gmsh_type]
+        rows = values[pos:pos + count * width].reshape(count, width)
+        pos += count * width
+        rows_by_key.setdefault((gmsh_type, 2), []).append(_with_tags(rows, physicals.get((dim, entity), 0), entity))
+    if pos != values.size:
+        raise ValueError("无法解析 $Elements 区段")
+    return _group_elements(rows_by_key)
+
+
+def _read_binary_elements41(data, start, byte_order, physicals):
+    int32, size_t = np.dtype(byte_order + 'i4'), np.dtype(byte_order + _SIZE_T)
+    num_blocks = int(np.frombuffer(data, dtype=size_t, count=4, offset=start)[0])
+    rows_by_key, pos = {}, start + 32
+    for _ in range(num_blocks):
+        dim, entity, gmsh_type = np.frombuffer(data, dtype=int32, count=3, offset=pos).tolist()
+        count = int(np.frombuffer(data, dtype=size_t, count=1, offset=pos + 12)[0])
+        if gmsh_type not in GMSH_TYPE_NODES:
+            raise ValueError(f"不支持的Gmsh单元类型: {gmsh_type}")
+        pos += 20
+        width = 1 + GMSH_TYPE_NODES[gmsh_type]
+        rows = np.frombuffer(data, dtype=size_t, count=count * width, offset=pos).reshape(count, width)
+        pos += rows.nbytes
+        rows_by_key.setdefault((gmsh_type, 2), []).append(
+            _with_tags(rows.astype(np.int64), physicals.get((dim, entity), 0), entity))
+    return _group_elements(rows_by_key)
+
+
+def _with_tags(rows, physical, entity):
+    """在 编号 列之后插入 (物理标签, 实体编号) 两列，与MSH 2.2的行布局一致"""
+    tags = np.empty((len(rows), 2), dtype=np.int64)
+    tags[:, 0], tags[:, 1] = physical, entity
+    return np.column_stack((rows[:, :1], tags, rows[:, 1:]))
+
+
+def read_msh41(filename):
+    """
+    读取Gmsh MSH 4.1文件 (ASCII 或 二进制)
+
+    返回值与 read_msh22 相同；每个单元的标签为 (所在实体的物理标签, 实体编号)，
+    没有物理标签的实体记为0
+    """
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            version, binary, byte_order = read_mesh_format(data)
+            if not version.startswith('4'):
+                raise ValueError(f"仅支持MSH 4.x 格式，当前为 {version}")
+
+            pos = 0
+            physicals = {}
+            entities = _section(data, b'Entities')
+            if entities is not None:
+                if binary:
+                    physicals, pos = _read_binary_entities(data, entities[0], byte_order)
+                else:
+                    physicals, pos = _read_ascii_entities(data, *entities), entities[1]
+
+            nodes = _section(data, b'Nodes', pos)
+            if nodes is None:
+                raise ValueError("MSH文件缺少 $Nodes 区段")
+            if binary:
+                node_ids, vertices, nodes_end = _read_binary_nodes41(data, nodes[0], byte_order)
+            else:
+                node_ids, vertices = _read_ascii_nodes41(data, *nodes)
+                nodes_end = nodes[1]
+
+            elements = _section(data, b'Elements', nodes_end)
+            if elements is None:
+                raise ValueError("MSH文件缺少 $Elements 区段")
+            if binary:
+                blocks = _read_binary_elements41(data, elements[0], byte_order, physicals)
+            else:
+                blocks = _read_ascii_elements41(data, *elements, physicals)
+    return node_ids, vertices, blocks
+
+
+def read_msh(filename):
+    """按文件中的版本读取MSH 2.x 或 4.x 文件，返回值同 read_msh22"""
+    version = msh_file_format(filename)[0]
+    return read_msh41(filename) if version.startswith('4') else read_msh22(filename)
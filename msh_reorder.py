@@ -0,0 +1,162 @@
+import itertools
+import numpy as np
+from f3grid_reader import parse_numbers, token_layout
+from element_order import GMSH_TYPE_NODES, gmsh_node_orders
+
+# 每批重排的单元数
+DEFAULT_BATCH_SIZE = 100000
+# 原样复制区段时每次读写的字节数
+COPY_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+def _copy_bytes(fin, fout, size):
+    """从 fin 复制 size 个字节到 fout"""
+    while size > 0:
+        block = fin.read(min(size, COPY_BLOCK_SIZE))
+        if not block:
+            raise ValueError("MSH文件提前结束")
+        fout.write(block)
+        size -= len(block)
+
+
+def _copy_lines_until(fin, fout, marker):
+    """逐行复制到 marker 所在行 (包含该行)，没有找到时抛出异常"""
+    for line in fin:
+        fout.write(line)
+        if line.strip() == marker:
+            return
+    raise ValueError(f"MSH文件中没有找到 {marker.decode()}")
+
+
+def _copy_rest(fin, fout):
+    for block in iter(lambda: fin.read(COPY_BLOCK_SIZE), b''):
+        fout.write(block)
+
+
+def _reorder_ascii_batch(text):
+    """
+    重排一批ASCII单元行，保持行的顺序不变
+
+    参数:
+        text: 若干完整单元行 (bytes)
+
+    返回:
+        重排后的文本 (str)
+    """
+    _, counts = token_layout(text)
+    values = parse_numbers(text, np.int64)
+    if values is None or values.size != counts.sum():
+        raise ValueError("无法解析 $Elements 区段")
+
+    line_starts = np.cumsum(counts) - counts
+    types = values[line_starts + 1]
+    num_tags = values[line_starts + 2]
+    num_nodes = counts - 3 - num_tags
+    source = values.copy()
+    for gmsh_type, index_map in gmsh_node_orders().items():
+        # 与原实现一致: 类型和节点数都匹配时才重排
+        mask = (types == gmsh_type) & (num_nodes == len(index_map))
+        if not mask.any():
+            continue
+        first_node = (line_starts + 3 + num_tags)[mask][:, None]
+        values[first_node + np.arange(len(index_map))] = source[first_node + index_map]
+
+    counts = counts.tolist()
+    line_formats = {c: ' '.join(['%d'] * c) + '\n' for c in set(counts)}
+    row_format = ''.join([line_formats[c] for c in counts])
+    return row_format % tuple(values.tolist())
+
+
+def _reorder_ascii_elements(fin, fout, num_elements, batch_size):
+    remaining = num_elements
+    while remaining > 0:
+        lines = [line for line in itertools.islice(fin, min(batch_size, remaining)) if line.strip()]
+        if not lines:
+            raise ValueError("MSH文件提前结束")
+        fout.write(_reorder_ascii_batch(b''.join(lines)).encode())
+        remaining -= len(lines)
+
+
+def _reorder_binary_elements(fin, fout, num_elements, byte_order, batch_size):
+    int32 = np.dtype(byte_order + 'i4')
+    node_orders = gmsh_node_orders()
+    remaining = num_elements
+    while remaining > 0:
+        header = fin.read(12)
+        gmsh_type, count, num_tags = np.frombuffer(header, dtype=int32).tolist()
+        if gmsh_type not in GMSH_TYPE_NODES:
+            raise ValueError(f"不支持的Gmsh单元类型: {gmsh_type}")
+        fout.write(header)
+
+        width = 1 + num_tags + GMSH_TYPE_NODES[gmsh_type]
+        index_map = node_orders.get(gmsh_type)
+        for start in range(0, count, batch_size):
+            n = min(batch_size, count - start)
+            data = fin.read(n * width * 4)
+            if len(data) != n * width * 4:
+                raise ValueError("MSH文件提前结束")
+            if index_map is None:
+                fout.write(data)
+                continue
+            rows = np.frombuffer(data, dtype=int32).reshape(n, width).copy()
+            nodes = rows[:, 1 + num_tags:]
+            nodes[:] = nodes[:, index_map]
+            fout.write(rows.tobytes())
+        remaining -= count
+
+
+def _read_format(fin, fout):
+    """复制 $MeshFormat 区段，返回 (是否二进制, 字节序)"""
+    _copy_lines_until(fin, fout, b'$MeshFormat')
+    line = fin.readline()
+    fout.write(line)
+    version, file_type, data_size = line.split()
+    if not version.startswith(b'2'):
+        raise ValueError(f"仅支持MSH 2.x 格式，当前为 {version.decode()}")
+    if file_type != b'1':
+        return False, None
+    if data_size != b'8':
+        raise ValueError(f"仅支持双精度 (data-size 8) 的二进制MSH文件，当前为 {data_size.decode()}")
+    marker = fin.read(4)
+    fout.write(marker)
+    return True, '<' if np.frombuffer(marker, dtype='<i4')[0] == 1 else '>'
+
+
+def reorder_msh_stream(input_file, output_file, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    流式地把MSH 2.2文件中单元的节点从FLAC3D顺序转换为Gmsh顺序
+
+    单元区段按 batch_size 个单元一批读入、整批向量化重排后立即写出，
+    其余区段原样复制，内存占用与单元总数无关。支持ASCII和二进制输入，
+    输出格式与输入相同。
+
+    参数:
+        input_file: 输入MSH文件
+        output_file: 输出MSH文件
+        batch_size: 每批处理的单元数
+
+    返回:
+        num_elements: 处理的单元数
+    """
+    with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+        binary, byte_order = _read_format(fin, fout)
+
+        if binary:
+            # 二进制节点数据中可能出现任意字节，必须按长度跳过
+            _copy_lines_until(fin, fout, b'$Nodes')
+            line = fin.readline()
+            fout.write(line)
+            _copy_bytes(fin, fout, int(line) * 28)
+
+        _copy_lines_until(fin, fout, b'$Elements')
+        line = fin.readline()
+        fout.write(line)
+        num_elements = int(line)
+
+        if binary:
+            _reorder_binary_elements(fin, fout, num_elements, byte_order, batch_size)
+        else:
+            _reorder_ascii_elements(fin, fout, num_elements, batch_size)
+
+        _copy_rest(fin, fout)
+    return num_elements
@@ -0,0 +1,280 @@
+import numpy as np
+from f3grid_reader import ZONE_TYPE_NAMES, ZONE_TYPE_NODES, FACE_TYPE_CODES, FACE_TYPE_NODES, id_index
+from element_order import element_types, to_gmsh_order, is_permutation, cyclic_quad_order, check_zone_types
+
+# 每批格式化的行数
+DEFAULT_BATCH_SIZE = 100000
+# 节点坐标格式，%.17g 可保证双精度往返不失真
+DEFAULT_FLOAT_FORMAT = '%.17g'
+# FLAC3D面类型 -> Gmsh单元类型 (3节点三角形, 4节点四边形)
+FACE_GMSH_TYPES = {'T3': 2, 'Q4': 3}
+
+
+def element_blocks(zone_types, offsets, connectivity, reorder=False):
+    """
+    按单元类型分组单元
+
+    参数:
+        zone_types: 单元类型编码 (M,) uint8，对应 ZONE_TYPE_NAMES
+        offsets, connectivity: 单元节点的偏移/编号数组
+        reorder: 是否把节点从FLAC3D顺序转换为Gmsh顺序 (见 element_order)，
+                 每块只做一次整体的花式索引
+
+    返回:
+        blocks: [(gmsh_type, zone_index, nodes), ...]，按Gmsh类型排序。
+                zone_index 为该类型单元在原单元列表中的位置 (升序)，
+                nodes 为 (n, 每单元节点数) 的节点编号数组
+    """
+    check_zone_types(zone_types)
+    registered = element_types()
+
+    blocks = []
+    for zone_type, (gmsh_type, _) in registered.items():
+        code = ZONE_TYPE_NAMES.index(zone_type)
+        zone_index = np.flatnonzero(zone_types == code)
+        if zone_index.size == 0:
+            continue
+        if not reorder and not is_permutation(zone_type):
+            raise ValueError(f"退化单元 {zone_type} 只能在转换为Gmsh节点顺序时写出")
+        nodes = connectivity[offsets[zone_index][:, None] + np.arange(ZONE_TYPE_NODES[code])]
+        if reorder:
+            nodes = to_gmsh_order(zone_type, nodes)
+        blocks.append((gmsh_type, zone_index, nodes))
+    return blocks
+
+
+def face_blocks(face_types, face_offsets, face_connectivity, face_index, vertices, node_ids=None):
+    """
+    按Gmsh类型分组要写出的面单元
+
+    参数:
+        face_types, face_offsets, face_connectivity: Flac3DGrid 中面的数组
+        face_index: 要写出的面在面列表中的位置，可以重复 (一个面属于多个面组时)
+        vertices: 节点坐标 (N, 3)，用于把四边形节点排成首尾相接的顺序
+        node_ids: 节点编号 (N,)，为None时编号 i+1 的节点坐标为 vertices[i]
+
+    返回:
+        blocks: [(gmsh_type, entry, nodes), ...]，按Gmsh类型排序。
+                entry 为这些面在 face_index 中的位置 (升序)
+    """
+    types = face_types[face_index]
+    blocks = []
+    for face_type, gmsh_type in sorted(FACE_GMSH_TYPES.items(), key=lambda item: item[1]):
+        code = FACE_TYPE_CODES[face_type]
+        entry = np.flatnonzero(types == code)
+        if entry.size == 0:
+            continue
+        nodes = face_connectivity[face_offsets[face_index[entry]][:, None] + np.arange(FACE_TYPE_NODES[code])]
+        if face_type == 'Q4':
+            positions = nodes - 1 if node_ids is None else id_index(node_ids, nodes, '节点')
+            nodes = np.take_along_axis(nodes, cyclic_quad_order(vertices[positions]), axis=1)
+        blocks.append((gmsh_type, entry, nodes))
+    return blocks
+
+
+def _group_labels(names, slots, groups):
+    """
+    所选组的物理名称: 某个slot中有组名与其他组重复时，该slot的所有组都加上slot前缀，
+    同一slot的组名形式一致
+    """
+    labels = [str(names[g]) for g in groups]
+    clashing = {str(slots[g]) for g, label in zip(groups, labels) if labels.count(label) > 1}
+    return [f"{slots[g]}:{label}" if str(slots[g]) in clashing else label
+            for g, label in zip(groups, labels)]
+
+
+def physical_groups(grid, zone_slot=None, face_slot=None):
+    """
+    把FLAC3D的单元组和面组整理为Gmsh物理组
+
+    每个体单元只能有一个物理标签，因此单元组只取 zone_slot 中的组
+    (为None时取文件中第一个slot)。面组取 face_slot 中的组，为None时取全部slot，
+    属于多个组的面每组各写出一次。物理标签从1开始，先单元组后面组，互不重复。
+
+    物理名称为组名；单元组或面组中不同slot有同名组时，涉及重名的slot中的
+    每个组都写为 "slot:组名" (如 "Skin:Bottom"、"Skin:East1")，其余slot的组仍为组名。
+
+    返回:
+        physical_names: [(维数, 物理标签, 名称), ...]
+        zone_tags: (M,) 每个单元的物理标签，不属于任何组时为 0
+        face_index: 要写出的面在面列表中的位置 (可重复)
+        face_tags: 与 face_index 对应的物理标签
+    """
+    zone_group = grid.zone_group_index(zone_slot)
+    zone_groups = np.unique(zone_group[zone_group >= 0])
+
+    face_index, face_group = grid.face_group_pairs()
+    if face_slot is not None:
+        if not (grid.face_group_slots == face_slot).any():
+            raise ValueError(f"没有名为 {face_slot} 的slot")
+        keep = grid.face_group_slots[face_group] == face_slot
+        face_index, face_group = face_index[keep], face_group[keep]
+    face_groups = np.unique(face_group)
+
+    # 组下标 -> 物理标签，下标 -1 (不属于任何组) 对应标签 0
+    zone_tag_of = np.zeros(len(grid.zone_group_names) + 1, dtype=np.int64)
+    zone_tag_of[zone_groups + 1] = np.arange(1, len(zone_groups) + 1)
+    face_tag_of = np.zeros(len(grid.face_group_names), dtype=np.int64)
+    face_tag_of[face_groups] = np.arange(1, len(face_groups) + 1) + len(zone_groups)
+
+    physical_names = [(3, int(zone_tag_of[g + 1]), label) for g, label in
+                      zip(zone_groups, _group_labels(grid.zone_group_names, grid.zone_group_slots, zone_groups))]
+    physical_names += [(2, int(face_tag_of[g]), label) for g, label in
+                       zip(face_groups, _group_labels(grid.face_group_names, grid.face_group_slots, face_groups))]
+    return physical_names, zone_tag_of[zone_group + 1], face_index, face_tag_of[face_group]
+
+
+def grid_blocks(grid, reorder=False, zone_slot=None, face_slot=None):
+    """
+    整理整个网格的单元块、标签和物理名称，可直接交给 write_msh22
+
+    体单元在前 (FiPy按文件顺序为体单元连续编号)，面组中的面单元在后；
+    物理标签和几何实体标签相同。
+
+    返回:
+        blocks: [(gmsh_type, index, nodes), ...]，体单元块的 index 为单元位置，
+                面单元块的 index 为面位置
+        tags: 与 blocks 对应的每块标签数组 (n, 2)
+        physical_names: physical_groups 返回的物理名称
+    """
+    physical_names, zone_tags, face_index, face_tags = physical_groups(grid, zone_slot, face_slot)
+    blocks = element_blocks(grid.zone_types, grid.offsets, grid.connectivity, reorder=reorder)
+    tags = [np.repeat(zone_tags[zone_index][:, None], 2, axis=1) for _, zone_index, _ in blocks]
+    for gmsh_type, entry, nodes in face_blocks(grid.face_types, grid.face_offsets, grid.face_connectivity,
+                                               face_index, grid.vertices, grid.node_ids):
+        blocks.append((gmsh_type, face_index[entry], nodes))
+        tags.append(np.repeat(face_tags[entry][:, None], 2, axis=1))
+    return blocks, tags, physical_names
+
+
+def _format_rows(row_format, rows):
+    """用一次 % 运算把整批行格式化为一个字符串"""
+    return (row_format * len(rows)) % tuple(rows.ravel().tolist())
+
+
+def _node_ids(node_ids, start, count):
+    if node_ids is None:
+        return np.arange(start + 1, start + 1 + count)
+    return node_ids[start:start + count]
+
+
+def format_nodes(vertices, node_ids=None, batch_size=DEFAULT_BATCH_SIZE,
+                 float_format=DEFAULT_FLOAT_FORMAT):
+    """逐批生成 $Nodes 区段的文本，node_ids 为None时节点从1开始连续编号"""
+    row_format = f"%d {float_format} {float_format} {float_format}\n"
+    for start in range(0, len(vertices), batch_size):
+        block = vertices[start:start + batch_size]
+        ids = _node_ids(node_ids, start, len(block))
+        yield _format_rows(row_format, np.column_stack((ids, block)))
+
+
+def format_elements(gmsh_type, nodes, first_id, tags=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    逐批生成一个单元类型块的 $Elements 文本，单元编号从 first_id 开始连续编号
+
+    参数:
+        tags: 每个单元的标签 (n, 标签数)，为None时写出 "2 0 0"
+    """
+    if tags is None:
+        row_format = f"%d {gmsh_type} 2 0 0" + " %d" * nodes.shape[1] + "\n"
+    else:
+        row_format = f"%d {gmsh_type} {tags.shape[1]}" + " %d" * (tags.shape[1] + nodes.shape[1]) + "\n"
+    for start in range(0, len(nodes), batch_size):
+        block = nodes[start:start + batch_size]
+        ids = np.arange(first_id + start, first_id + start + len(block))
+        columns = (ids, block) if tags is None else (ids, tags[start:start + batch_size], block)
+        yield _format_rows(row_format, np.column_stack(columns))
+
+
+def _default_tags(blocks):
+    return [np.zeros((len(nodes), 2), dtype=np.int64) for _, _, nodes in blocks]
+
+
+def _write_header(f, binary, physical_names=(), version=b"2.2"):
+    f.write(b"$MeshFormat\n")
+    if binary:
+        f.write(version + b" 1 8\n")  # 二进制格式，双精度
+        f.write(np.array([1], dtype=np.int32).tobytes())  # 字节序标记
+        f.write(b"\n")
+    else:
+        f.write(version + b" 0 8\n")  # ASCII格式，双精度
+    f.write(b"$EndMeshFormat\n\n")
+
+    f.write(b"$PhysicalNames\n")
+    f.write(b"%d\n" % len(physical_names))
+    for dim, tag, name in physical_names:
+        f.write(f'{dim} {tag} "{name}"\n'.encode())
+    f.write(b"$EndPhysicalNames\n\n")
+
+
+def _write_binary_nodes(f, vertices, node_ids, batch_size):
+    record = np.dtype([('id', np.int32), ('xyz', np.float64, (3,))])  # 紧凑排列，每个节点28字节
+    for start in range(0, len(vertices), batch_size):
+        block = vertices[start:start + batch_size]
+        rows = np.empty(len(block), dtype=record)
+        rows['id'] = _node_ids(node_ids, start, len(block))
+        rows['xyz'] = block
+        f.write(rows.tobytes())
+
+
+def _write_binary_elements(f, gmsh_type, nodes, first_id, tags, batch_size):
+    # 块头: 单元类型, 单元数, 标签数；随后每个单元为 编号, 标签..., 节点...
+    f.write(np.array([gmsh_type, len(nodes), tags.shape[1]], dtype=np.int32).tobytes())
+    for start in range(0, len(nodes), batch_size):
+        block = nodes[start:start + batch_size]
+        rows = np.empty((len(block), 1 + tags.shape[1] + nodes.shape[1]), dtype=np.int32)
+        rows[:, 0] = np.arange(first_id + start, first_id + start + len(block))
+        rows[:, 1:1 + tags.shape[1]] = tags[start:start + batch_size]
+        rows[:, 1 + tags.shape[1]:] = block
+        f.write(rows.tobytes())
+
+
+def write_msh22(filename, vertices, blocks, tags=None, binary=False, node_ids=None,
+                batch_size=DEFAULT_BATCH_SIZE, float_format=DEFAULT_FLOAT_FORMAT, physical_names=()):
+    """
+    写出Gmsh MSH 2.2文件
+
+    参数:
+        filename: 输出文件名
+        vertices: 节点坐标 (N, 3)
+        blocks: element_blocks 或 grid_blocks 返回的单元分组，单元按块的顺序连续编号
+        tags: 与 blocks 对应的每块单元标签数组 (n, 标签数)，为None时标签均为 0 0
+        binary: 是否写出二进制格式 (file-type 1)，节点和单元直接由数组 tobytes() 写出
+        node_ids: 节点编号 (N,)，为None时第 i 行的节点编号为 i+1
+        batch_size: 每批写出的行数
+        float_format: ASCII格式下坐标的格式
+        physical_names: 写入 $PhysicalNames 的 [(维数, 物理标签, 名称), ...]
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    num_elements = sum(len(nodes) for _, _, nodes in blocks)
+    if binary and tags is None:
+        tags = _default_tags(blocks)
+
+    # 文本统一以 \n 换行写出
+    with open(filename, 'wb') as f:
+        _write_header(f, binary, physical_names)
+
+        f.write(b"$Nodes\n")
+        f.write(b"%d\n" % len(vertices))
+        if binary:
+            _write_binary_nodes(f, vertices, node_ids, batch_size)
+            f.write(b"\n")
+        else:
+            for text in format_nodes(vertices, node_ids, batch_size, float_format):
+                f.write(text.encode())
+        f.write(b"$EndNodes\n\n")
+
+        f.write(b"$Elements\n")
+        f.write(b"%d\n" % num_elements)
+        first_id = 1
+        for i, (gmsh_type, _, nodes) in enumerate(blocks):
+            block_tags = None if tags is None else np.asarray(tags[i])
+            if binary:
+                _write_binary_elements(f, gmsh_type, nodes, first_id, block_tags, batch_size)
+            else:
+                for text in format_elements(gmsh_type, nodes, first_id, block_tags, batch_size):
+                    f.write(text.encode())
+            first_id += len(nodes)
+        if binary:
+            f.write(b"\n")
+        f.write(b"$EndElements\n")
@@ -0,0 +1,115 @@
+import numpy as np
+from f3grid_reader import Flac3DGrid
+
+# 支持的节点重新编号方式
+RENUMBER_METHODS = ('rcm',)
+# 建立邻接矩阵时每批处理的单元数
+DEFAULT_BATCH_SIZE = 200000
+
+
+def _sorted_unique(keys):
+    """排序后去掉相邻的重复项 (比 np.unique 的哈希实现快)"""
+    keys = np.sort(keys)
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+
+
+def node_adjacency(num_nodes, offsets, connectivity, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    由单元连接关系建立节点邻接矩阵: 同一单元内的任意两个节点相邻
+
+    参数:
+        num_nodes: 节点数
+        offsets, connectivity: 单元节点的偏移/编号数组，节点编号为 1..num_nodes
+
+    返回:
+        (num_nodes, num_nodes) 的 scipy.sparse.csr_matrix，对称、不含对角线
+    """
+    from scipy import sparse
+
+    # 每条边编码为 行*num_nodes+列 的 int64 键。每批先在批内去重，最后对全部键去重一次，
+    # 排好序的键直接就是CSR的顺序，只建立一次矩阵 (不在每批累加整个矩阵)
+    keys = []
+    counts = np.diff(offsets)
+    # 同一节点数的单元可整体取成二维数组，逐对列生成邻接边
+    for k in np.unique(counts).tolist():
+        zones = np.flatnonzero(counts == k)
+        pairs = np.array([(i, j) for i in range(k) for j in range(k) if i != j])
+        for start in range(0, len(zones), batch_size):
+            batch = zones[start:start + batch_size]
+            nodes = connectivity[offsets[batch][:, None] + np.arange(k)].astype(np.int64) - 1
+            rows = nodes[:, pairs[:, 0]].ravel()
+            cols = nodes[:, pairs[:, 1]].ravel()
+            keep = rows != cols  # 退化单元中重合的节点
+            keys.append(_sorted_unique(rows[keep] * num_nodes + cols[keep]))
+    keys = _sorted_unique(np.concatenate(keys)) if keys else np.zeros(0, dtype=np.int64)
+    rows, cols = np.divmod(keys, num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+    # 每个位置只有一项，数据直接为1，不经过重复项相加
+    adjacency = sparse.csr_matrix((np.ones(len(keys), dtype=np.int8), cols, indptr),
+                                  shape=(num_nodes, num_nodes))
+    return adjacency
+
+
+def bandwidth(adjacency, order=None):
+    """
+    矩阵带宽 max|i - j|
+
+    参数:
+        order: 新编号顺序 (第 i 个新节点为原来的第 order[i] 个节点)，为None时按原顺序
+    """
+    coo = adjacency.tocoo()
+    if coo.nnz == 0:
+        return 0
+    rows, cols = coo.row, coo.col
+    if order is not None:
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        rows, cols = rank[rows], rank[cols]
+    return int(np.abs(rows.astype(np.int64) - cols).max())
+
+
+def rcm_order(adjacency):
+    """Reverse Cuthill-McKee 顺序，返回 order (第 i 个新节点为原来的第 order[i] 个节点)"""
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+    return reverse_cuthill_mckee(adjacency.tocsr(), symmetric_mode=True).astype(np.int64)
+
+
+def permute_nodes(grid, order):
+    """
+    按 order 重排节点，单元和面的节点编号同步换算
+
+    参数:
+        grid: 节点编号为 1..N 的 Flac3DGrid (见 Flac3DGrid.compact_nodes)
+        order: 第 i 个新节点为原来的第 order[i] 个节点
+
+    返回:
+        新的 Flac3DGrid，节点编号仍为 1..N，其余数组与原网格共用
+    """
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    arrays = dict(vars(grid))
+    arrays['vertices'] = grid.vertices[order]
+    arrays['connectivity'] = rank[grid.connectivity - 1] + 1
+    arrays['face_connectivity'] = rank[grid.face_connectivity - 1] + 1
+    return Flac3DGrid(**arrays)
+
+
+def renumber_nodes(grid, method='rcm'):
+    """
+    以减小带宽为目标重新编号节点
+
+    参数:
+        grid: 节点编号为 1..N 的 Flac3DGrid
+        method: 编号方式，目前支持 'rcm'
+
+    返回:
+        grid: 重新编号后的 Flac3DGrid
+        before, after: 重新编号前后节点邻接矩阵的带宽
+    """
+    if method not in RENUMBER_METHODS:
+        raise ValueError(f"不支持的节点编号方式: {method}，可选 {', '.join(RENUMBER_METHODS)}")
+    adjacency = node_adjacency(grid.num_nodes, grid.offsets, grid.connectivity)
+    order = rcm_order(adjacency)
+    return permute_nodes(grid, order), bandwidth(adjacency), bandwidth(adjacency, order)
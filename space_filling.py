@@ -0,0 +1,108 @@
+import numpy as np
+
+# 每个坐标量化的位数，三个坐标交织后的键为 63 位，可放入 uint64
+DEFAULT_BITS = 21
+# 计算单元形心时每批处理的单元数
+DEFAULT_BATCH_SIZE = 200000
+
+
+def quantize(points, lower, upper, bits=DEFAULT_BITS):
+    """把坐标线性映射到 [0, 2**bits - 1] 的整数网格，返回 (n, 3) uint64"""
+    scale = np.where(upper > lower, upper - lower, 1.0)
+    cells = (points - lower) / scale * ((1 << bits) - 1)
+    return np.clip(np.nan_to_num(cells), 0, (1 << bits) - 1).astype(np.uint64)
+
+
+def _interleave(coords, bits):
+    """逐位交织三个坐标: 高位在前，每一位依次取 x, y, z"""
+    keys = np.zeros(len(coords), dtype=np.uint64)
+    one = np.uint64(1)
+    for b in range(bits - 1, -1, -1):
+        for i in range(3):
+            keys = (keys << one) | ((coords[:, i] >> np.uint64(b)) & one)
+    return keys
+
+
+def morton_keys(coords, bits=DEFAULT_BITS):
+    """Morton (Z序) 键，coords 为 quantize 得到的整数坐标"""
+    return _interleave(coords, bits)
+
+
+def hilbert_keys(coords, bits=DEFAULT_BITS):
+    """
+    三维Hilbert曲线键，coords 为 quantize 得到的整数坐标
+
+    按 Skilling 的转置算法 (AxesToTranspose) 对全部点逐位整体变换，
+    再把转置形式交织为一个整数
+    """
+    x = coords.astype(np.uint64)  # 复制一份，原地变换
+    q = 1 << (bits - 1)
+    while q > 1:
+        p = np.uint64(q - 1)
+        for i in range(3):
+            high = (x[:, i] & np.uint64(q)) != 0
+            x[high, 0] ^= p
+            # 低位不为1时交换 x[0] 与 x[i] 的低位
+            low = ~high
+            t = (x[low, 0] ^ x[low, i]) & p
+            x[low, 0] ^= t
+            x[low, i] ^= t
+        q >>= 1
+
+    # Gray编码
+    x[:, 1] ^= x[:, 0]
+    x[:, 2] ^= x[:, 1]
+    t = np.zeros(len(x), dtype=np.uint64)
+    q = 1 << (bits - 1)
+    while q > 1:
+        t[(x[:, 2] & np.uint64(q)) != 0] ^= np.uint64(q - 1)
+        q >>= 1
+    x ^= t[:, None]
+    return _interleave(x, bits)
+
+
+# 曲线名 -> 键函数
+SFC_CURVES = {
+    'morton': morton_keys,
+    'hilbert': hilbert_keys,
+}
+
+
+def element_centroids(vertices, nodes, batch_size=DEFAULT_BATCH_SIZE):
+    """单元形心 (节点坐标平均)，节点编号 i+1 对应 vertices[i]"""
+    centroids = np.empty((len(nodes), 3))
+    for start in range(0, len(nodes), batch_size):
+        centroids[start:start + batch_size] = vertices[nodes[start:start + batch_size] - 1].mean(axis=1)
+    return centroids
+
+
+def sort_blocks(vertices, blocks, tags=None, curve='hilbert', bits=DEFAULT_BITS):
+    """
+    按单元形心的空间填充曲线键对每个单元块内的单元排序
+
+    块的顺序不变，只改变块内单元的顺序，单元节点顺序 (如已转换的Gmsh顺序) 不受影响。
+    所有块使用整个网格的包围盒量化，相邻块中空间位置接近的单元键也接近。
+
+    参数:
+        vertices: 节点坐标 (N, 3)，编号 i+1 的节点坐标为 vertices[i]
+        blocks: element_blocks 或 grid_blocks 返回的单元分组
+        tags: 与 blocks 对应的每块标签数组，随单元一起重排
+        curve: 'hilbert' 或 'morton'
+        bits: 每个坐标量化的位数 (不超过21)
+
+    返回:
+        blocks, tags: 重排后的新列表 (tags 为None时仍为None)
+    """
+    if curve not in SFC_CURVES:
+        raise ValueError(f"不支持的空间填充曲线: {curve}，可选 {', '.join(SFC_CURVES)}")
+    vertices = np.asarray(vertices, dtype=np.float64)
+    lower, upper = np.nanmin(vertices, axis=0), np.nanmax(vertices, axis=0)
+
+    sorted_blocks, sorted_tags = [], []
+    for i, (gmsh_type, index, nodes) in enumerate(blocks):
+        keys = SFC_CURVES[curve](quantize(element_centroids(vertices, nodes), lower, upper, bits), bits)
+        order = np.argsort(keys, kind='stable')
+        sorted_blocks.append((gmsh_type, index[order], nodes[order]))
+        if tags is not None:
+            sorted_tags.append(np.asarray(tags[i])[order])
+    return sorted_blocks, (sorted_tags if tags is not None else None)
@@ -0,0 +1,194 @@
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+import unicodedata
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 可选的分析钩子
+PROFILE_HOOKS = ('cprofile', 'tracemalloc')
+# 报告中每个阶段列出的热点函数 / 内存分配位置个数
+DEFAULT_TOP = 10
+# /proc/self/clear_refs 写入5可重置进程的峰值RSS (Linux 4.0+)
+_CLEAR_REFS = '/proc/self/clear_refs'
+_PROC_STATUS = '/proc/self/status'
+
+
+def _proc_status_kb(field):
+    try:
+        with open(_PROC_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """进程的峰值RSS (MB)，无法获取时为None"""
+    kb = _proc_status_kb('VmHWM')
+    if kb is not None:
+        return kb / 1024
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 为字节，Linux 为KB
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    except (ImportError, AttributeError):
+        return None
+
+
+def reset_peak_rss():
+    """重置进程的峰值RSS，使之后的峰值只反映当前阶段；不支持时返回False"""
+    try:
+        with open(_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def display_width(text):
+    """终端显示宽度，中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+
+
+def ljust(text, width):
+    """按显示宽度左对齐"""
+    return text + ' ' * (width - display_width(text))
+
+
+def rjust(text, width):
+    """按显示宽度右对齐"""
+    return ' ' * (width - display_width(text)) + text
+
+
+class StageProfiler:
+    """
+    记录流水线各阶段的墙钟时间、CPU时间、峰值RSS和处理速度 (条目/秒)
+
+    用法:
+        profiler = StageProfiler(profile='cprofile')
+        with profiler.stage('read', items=num_zones) as record:
+            ...
+            record['items'] = num_zones   # 条目数也可在阶段结束前给出
+        profiler.write_json('report.json')
+
+    峰值RSS在支持重置的系统 (Linux) 上为该阶段内的峰值，否则为到该阶段结束时的进程峰值
+    (记录中 peak_rss_reset 为False)。报告中的总峰值取每次重置前读到的峰值、
+    各阶段峰值和当前读数中的最大值，不受阶段内重置的影响。profile 为 'cprofile' 时每个阶段单独分析，
+    报告中列出累计时间最多的函数，给出 profile_dir 时同时写出 .prof 文件；
+    为 'tracemalloc' 时记录每个阶段Python对象分配的峰值和分配最多的代码行。
+    """
+
+    def __init__(self, profile=None, profile_dir=None, top=DEFAULT_TOP, **meta):
+        if profile is not None and profile not in PROFILE_HOOKS:
+            raise ValueError(f"不支持的分析方式: {profile}，可选 {', '.join(PROFILE_HOOKS)}")
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.top = top
+        self.meta = meta
+        self.stages = []
+        self.started = datetime.datetime.now().astimezone().isoformat(timespec='seconds')
+        self._wall0, self._cpu0 = time.perf_counter(), time.process_time()
+        # 整个运行的峰值RSS，每次重置前更新
+        self._peak_rss = None
+        if profile == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, items=None):
+        """计时一个阶段，产出该阶段的记录 (dict)，可在阶段内修改 items"""
+        record = {'name': name, 'items': items}
+        self._update_peak(peak_rss_mb())
+        rss_reset = reset_peak_rss()
+        profiler = cProfile.Profile() if self.profile == 'cprofile' else None
+        if self.profile == 'tracemalloc':
+            tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            items = record['items']
+            record.update(wall_s=wall, cpu_s=cpu, peak_rss_mb=peak_rss_mb(), peak_rss_reset=rss_reset,
+                          items_per_s=(items / wall if items is not None and wall > 0 else None))
+            self._update_peak(record['peak_rss_mb'])
+            if profiler:
+                record['cprofile'] = self._profile_summary(profiler, name)
+            if self.profile == 'tracemalloc':
+                record['tracemalloc_peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+                stats = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')[:self.top]
+                record['tracemalloc_top'] = [{'line': str(s.traceback[0]), 'size_diff_mb': s.size_diff / 1024 ** 2,
+                                              'count_diff': s.count_diff} for s in stats]
+            self.stages.append(record)
+
+    def _update_peak(self, rss):
+        if rss is not None and (self._peak_rss is None or rss > self._peak_rss):
+            self._peak_rss = rss
+
+    def total_peak_rss_mb(self):
+        """整个运行的峰值RSS (MB)，无法获取时为None"""
+        self._update_peak(peak_rss_mb())
+        return self._peak_rss
+
+    def _profile_summary(self, profiler, name):
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{len(self.stages):02d}_{name}.prof"))
+        stats = pstats.Stats(profiler)
+        rows = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:self.top]
+        return [{'function': f"{os.path.basename(file)}:{line}({func})", 'ncalls': nc,
+                 'tottime_s': tt, 'cumtime_s': ct} for (file, line, func), (_, nc, tt, ct, _) in rows]
+
+    def report(self):
+        """可直接写为JSON的报告"""
+        return {
+            'started': self.started,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'profile': self.profile,
+            **self.meta,
+            'total': {'wall_s': time.perf_counter() - self._wall0, 'cpu_s': time.process_time() - self._cpu0,
+                      'peak_rss_mb': self.total_peak_rss_mb()},
+            'stages': self.stages,
+        }
+
+    def write_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=1)
+
+    def format_table(self):
+        """各阶段的文本表格"""
+        lines = [ljust('阶段', 14) + rjust('墙钟(s)', 10) + f"{'CPU(s)':>10}" + rjust('峰值RSS(MB)', 14) + rjust('条目/秒', 14)]
+        for r in self.stages:
+            rss = f"{r['peak_rss_mb']:>14.1f}" if r['peak_rss_mb'] is not None else f"{'-':>14}"
+            speed = f"{r['items_per_s']:>14.0f}" if r['items_per_s'] is not None else f"{'-':>14}"
+            lines.append(f"{r['name']:<14}{r['wall_s']:>10.3f}{r['cpu_s']:>10.3f}" + rss + speed)
+        return '\n'.join(lines)
+
+
+class NullProfiler:
+    """不记录任何信息的 StageProfiler 替代，未要求报告时使用"""
+
+    @contextlib.contextmanager
+    def stage(self, name, items=None):
+        yield {'name': name, 'items': items}
@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 from datetime import datetime
 import numpy as np
+from vtk.util import numpy_support
 
 # 添加必要的路径
 if getattr(sys, 'frozen', False):
@@ -16,9 +17,426 @@ else:
 sys.path.append(r'C:\Users\Yang\AppData\Roaming\Python\Python313\site-packages')
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QPushButton, QFileDialog, QCheckBox, QSlider, QLabel,
-                           QComboBox, QHBoxLayout, QGroupBox, QMessageBox)
+                           QComboBox, QHBoxLayout, QGroupBox, QMessageBox, QProgressBar,
+                           QSpinBox)
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QImage
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
+from f3grid_reader import read_flac3d_arrays, id_index
+from msh_reader import read_msh
+from msh_writer import element_blocks
+from element_order import GMSH_TYPE_DIM
+
+def points_as_numpy(polydata):
+    """点坐标的 (N, 3) NumPy 视图，与VTK共享内存，不复制"""
+    points = polydata.GetPoints()
+    if points is None:
+        return np.empty((0, 3))
+    return numpy_support.vtk_to_numpy(points.GetData())
+
+
+def distance_to_origin(points):
+    """每个点到原点的距离"""
+    return np.sqrt(np.einsum('ij,ij->i', points, points, dtype=np.float64))
+
+
+# 点标量名 -> 由点坐标 (N, 3) 计算标量的函数
+POINT_FIELDS = {
+    'Distances': distance_to_origin,
+}
+
+
+def point_scalars(polydata, name='Distances'):
+    """
+    计算一个点标量场，加入点数据并设为当前标量
+
+    坐标以零拷贝方式取出，整列向量化计算后转换为 vtkFloatArray，
+    VTK数组直接引用计算结果的内存 (numpy_support 保存了对它的引用)
+
+    返回:
+        array: 加入点数据的 vtkFloatArray
+    """
+    values = np.ascontiguousarray(POINT_FIELDS[name](points_as_numpy(polydata)), dtype=np.float32)
+    array = numpy_support.numpy_to_vtk(values, deep=False, array_type=vtk.VTK_FLOAT)
+    array.SetName(name)
+    polydata.GetPointData().SetScalars(array)
+    return array
+
+
+class LoadCancelled(Exception):
+    """后台读取或LOD生成被取消"""
+
+
+def _observe(algorithm, progress=None, is_cancelled=None, start=0.0, span=1.0):
+    """
+    把VTK算法的 vtkCommand.ProgressEvent 转发给 progress 回调，映射到 [start, start+span]；
+    is_cancelled 返回True时请求算法中止 (算法支持时提前结束)
+    """
+    def on_progress(caller, event):
+        if is_cancelled and is_cancelled():
+            caller.AbortExecuteOn()
+        if progress:
+            progress(start + span * caller.GetProgress())
+
+    algorithm.AddObserver(vtk.vtkCommand.ProgressEvent, on_progress)
+    return algorithm
+
+
+def _check_cancelled(file_name, is_cancelled):
+    if is_cancelled and is_cancelled():
+        raise LoadCancelled(file_name)
+
+
+# Gmsh单元类型 -> VTK单元类型
+GMSH_VTK_CELL_TYPES = {
+    2: vtk.VTK_TRIANGLE,
+    3: vtk.VTK_QUAD,
+    4: vtk.VTK_TETRA,
+    5: vtk.VTK_HEXAHEDRON,
+    6: vtk.VTK_WEDGE,
+    7: vtk.VTK_PYRAMID,
+}
+# Gmsh节点顺序 -> VTK节点顺序，未列出的类型顺序相同。
+# VTK楔形的底面 (0,1,2) 按右手法则朝外，Gmsh棱柱的底面朝内
+GMSH_TO_VTK_ORDERS = {
+    6: np.array([0, 2, 1, 3, 5, 4]),
+}
+
+
+def unstructured_grid(vertices, blocks, node_ids=None):
+    """
+    由节点坐标和Gmsh顺序的单元块创建 vtkUnstructuredGrid
+
+    坐标和单元数组整块交给VTK (vtkCellArray.SetData)，不逐个插入单元。
+    有体单元时只使用体单元: MSH文件中的面单元是边界标记，与体单元的外表面重合。
+
+    参数:
+        vertices: 节点坐标 (N, 3)
+        blocks: [(gmsh_type, index, nodes), ...]，nodes 为 (n, 每单元节点数) 的节点编号
+        node_ids: 节点编号数组，为None时编号 i+1 对应 vertices[i]
+
+    返回:
+        grid: vtkUnstructuredGrid
+    """
+    blocks = [(gmsh_type, nodes) for gmsh_type, _, nodes in blocks if gmsh_type in GMSH_VTK_CELL_TYPES]
+    volume = [(gmsh_type, nodes) for gmsh_type, nodes in blocks if GMSH_TYPE_DIM[gmsh_type] == 3]
+    blocks = volume or blocks
+
+    connectivity, cell_types, sizes = [], [], []
+    for gmsh_type, nodes in blocks:
+        if gmsh_type in GMSH_TO_VTK_ORDERS:
+            nodes = nodes[:, GMSH_TO_VTK_ORDERS[gmsh_type]]
+        positions = nodes - 1 if node_ids is None else id_index(node_ids, nodes, '节点')
+        connectivity.append(positions.ravel())
+        cell_types.append(np.full(len(nodes), GMSH_VTK_CELL_TYPES[gmsh_type], dtype=np.uint8))
+        sizes.append(np.full(len(nodes), nodes.shape[1], dtype=np.int64))
+    connectivity = np.concatenate(connectivity) if blocks else np.empty(0, dtype=np.int64)
+    cell_types = np.concatenate(cell_types) if blocks else np.empty(0, dtype=np.uint8)
+    offsets = np.zeros(len(cell_types) + 1, dtype=np.int64)
+    if blocks:
+        np.cumsum(np.concatenate(sizes), out=offsets[1:])
+
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(np.ascontiguousarray(vertices, dtype=np.float64), deep=True))
+    cells = vtk.vtkCellArray()
+    cells.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(connectivity.astype(np.int64), deep=True))
+    grid = vtk.vtkUnstructuredGrid()
+    grid.SetPoints(points)
+    grid.SetCells(numpy_support.numpy_to_vtk(cell_types, deep=True, array_type=vtk.VTK_UNSIGNED_CHAR), cells)
+    return grid
+
+
+def _read_legacy_vtk(file_name, progress=None, is_cancelled=None):
+    """旧版VTK文件，POLYDATA 或 UNSTRUCTURED_GRID 等任意数据集 (由文件头决定)"""
+    reader = _observe(vtk.vtkDataSetReader(), progress, is_cancelled, span=0.5)
+    reader.SetFileName(file_name)
+    reader.Update()
+    _check_cancelled(file_name, is_cancelled)
+    if reader.GetErrorCode() or reader.GetOutput() is None:
+        raise IOError(f"无法读取VTK文件: {file_name}")
+    return reader.GetOutput()
+
+
+def _read_vtu(file_name, progress=None, is_cancelled=None):
+    """XML非结构网格 (.vtu)，ASCII、二进制、appended 和压缩格式均由读取器处理"""
+    reader = _observe(vtk.vtkXMLUnstructuredGridReader(), progress, is_cancelled, span=0.5)
+    reader.SetFileName(file_name)
+    reader.Update()
+    _check_cancelled(file_name, is_cancelled)
+    if reader.GetErrorCode() or reader.GetOutput().GetNumberOfCells() == 0:
+        raise IOError(f"无法读取VTU文件: {file_name}")
+    return reader.GetOutput()
+
+
+def _read_msh(file_name, progress=None, is_cancelled=None):
+    """Gmsh MSH 2.2 / 4.1 文件，由 msh_reader 整块读入"""
+    node_ids, vertices, blocks = read_msh(file_name)
+    _check_cancelled(file_name, is_cancelled)
+    if progress:
+        progress(0.4)
+    grid = unstructured_grid(vertices, [(gmsh_type, ids, nodes) for gmsh_type, ids, _, nodes in blocks], node_ids)
+    if progress:
+        progress(0.5)
+    return grid
+
+
+def _read_f3grid(file_name, progress=None, is_cancelled=None):
+    """FLAC3D网格文件，由 read_flac3d_arrays 解析，单元转换为Gmsh节点顺序"""
+    grid = read_flac3d_arrays(file_name)
+    _check_cancelled(file_name, is_cancelled)
+    if progress:
+        progress(0.4)
+    blocks = element_blocks(grid.zone_types, grid.offsets, grid.connectivity, reorder=True)
+    grid = unstructured_grid(grid.vertices, blocks, grid.node_ids)
+    if progress:
+        progress(0.5)
+    return grid
+
+
+# 文件扩展名 -> 读取函数，返回 vtkPolyData 或 vtkUnstructuredGrid
+MESH_READERS = {
+    '.vtk': _read_legacy_vtk,
+    '.vtu': _read_vtu,
+    '.msh': _read_msh,
+    '.f3grid': _read_f3grid,
+}
+MESH_FILE_FILTER = "网格文件 (" + " ".join(f"*{ext}" for ext in MESH_READERS) + ")"
+
+
+def surface_polydata(dataset, progress=None, is_cancelled=None, start=0.5):
+    """
+    非结构网格经 vtkDataSetSurfaceFilter 只保留外表面 (内部面不上传到GPU)，
+    vtkPolyData 原样返回
+    """
+    if isinstance(dataset, vtk.vtkPolyData):
+        return dataset
+    surface = _observe(vtk.vtkDataSetSurfaceFilter(), progress, is_cancelled, start, 1.0 - start)
+    surface.SetInputData(dataset)
+    surface.Update()
+    return surface.GetOutput()
+
+
+def read_surface_polydata(file_name, progress=None, is_cancelled=None):
+    """
+    读取网格文件 (见 MESH_READERS) 的外表面并计算点标量，可在后台线程中调用
+
+    参数:
+        file_name: 网格文件名，按扩展名选择读取函数
+        progress: 读取进度回调 progress(0..1)，由读取器和表面提取的 vtkCommand.ProgressEvent 触发
+        is_cancelled: 返回True时中止读取，抛出 LoadCancelled
+
+    返回:
+        polydata: 带 Distances 点标量的 vtkPolyData
+    """
+    ext = os.path.splitext(file_name)[1].lower()
+    if ext not in MESH_READERS:
+        raise ValueError(f"不支持的文件格式: {ext}，可选 {', '.join(MESH_READERS)}")
+    if progress:
+        # vtkDataSetReader 内部读取器的进度会从0重新开始，只报告增加的进度
+        report, reached = progress, [0.0]
+
+        def progress(value):
+            if value > reached[0]:
+                reached[0] = value
+                report(value)
+
+    dataset = MESH_READERS[ext](file_name, progress, is_cancelled)
+    _check_cancelled(file_name, is_cancelled)
+
+    # 断开与读取器的连接，数据可以交给主线程使用
+    polydata = vtk.vtkPolyData()
+    polydata.ShallowCopy(surface_polydata(dataset, progress, is_cancelled))
+    _check_cancelled(file_name, is_cancelled)
+    if polydata.GetNumberOfPoints() == 0:
+        raise IOError(f"文件中没有可显示的单元: {file_name}")
+    point_scalars(polydata)
+    _check_cancelled(file_name, is_cancelled)
+    if progress:
+        progress(1.0)
+    return polydata
+
+
+# 交互时的细节层次 (LOD): 表面单元数不少于 LOD_MIN_CELLS 时在后台生成简化表示
+LOD_MIN_CELLS = 100000
+# 各级简化表示保留的三角形 (点云模式下为点) 比例，从精细到粗糙
+LOD_LEVELS = (0.25, 0.05)
+# 默认的交互目标帧时间 (毫秒)
+DEFAULT_FRAME_TIME_MS = 50
+
+
+def decimate_surface(polydata, fractions=LOD_LEVELS, is_cancelled=None):
+    """
+    用 vtkQuadricDecimation 逐级简化表面，每一级在上一级的结果上继续简化
+
+    点坐标在简化中改变，每一级的点标量重新计算
+
+    参数:
+        polydata: 表面 (多边形会先三角化)
+        fractions: 各级保留的三角形比例
+        is_cancelled: 返回True时中止，抛出 LoadCancelled
+
+    返回:
+        [vtkPolyData, ...]，与 fractions 一一对应
+    """
+    triangles = vtk.vtkTriangleFilter()
+    triangles.SetInputData(polydata)
+    triangles.PassVertsOff()
+    triangles.PassLinesOff()
+    triangles.Update()
+    current, kept, levels = triangles.GetOutput(), 1.0, []
+    for fraction in fractions:
+        _check_cancelled('LOD', is_cancelled)
+        decimate = _observe(vtk.vtkQuadricDecimation(), is_cancelled=is_cancelled)
+        decimate.SetInputData(current)
+        decimate.SetTargetReduction(1.0 - fraction / kept)
+        decimate.Update()
+        _check_cancelled('LOD', is_cancelled)
+        level = vtk.vtkPolyData()
+        level.ShallowCopy(decimate.GetOutput())
+        point_scalars(level)
+        levels.append(level)
+        current, kept = level, fraction
+    return levels
+
+
+def subsample_points(polydata, fractions=LOD_LEVELS, is_cancelled=None):
+    """
+    点云模式的LOD: 用 vtkMaskPoints 随机抽取一部分点 (每个点一个顶点单元)，点标量随点保留
+
+    返回:
+        [vtkPolyData, ...]，与 fractions 一一对应
+    """
+    levels = []
+    for fraction in fractions:
+        _check_cancelled('LOD', is_cancelled)
+        mask = vtk.vtkMaskPoints()
+        mask.SetInputData(polydata)
+        mask.SetMaximumNumberOfPoints(max(1, int(polydata.GetNumberOfPoints() * fraction)))
+        mask.RandomModeOn()
+        mask.SetRandomModeType(1)  # 在全部点中随机抽取，点数准确
+        mask.GenerateVerticesOn()
+        mask.SingleVertexPerCellOn()
+        mask.Update()
+        level = vtk.vtkPolyData()
+        level.ShallowCopy(mask.GetOutput())
+        levels.append(level)
+    return levels
+
+
+def build_lod_levels(polydata, fractions=LOD_LEVELS, is_cancelled=None):
+    """
+    生成一个模型的全部LOD表示，可在后台线程中调用
+
+    返回:
+        {'surface': 简化表面列表, 'points': 抽样点云列表}
+    """
+    return {'points': subsample_points(polydata, fractions, is_cancelled),
+            'surface': decimate_surface(polydata, fractions, is_cancelled)}
+
+
+# 切片用的坐标标量名，依次为X、Y、Z轴
+SLICE_AXIS_ARRAYS = ('SliceX', 'SliceY', 'SliceZ')
+# 拖动切片滑块时两次切片的最短间隔 (毫秒)，其间的滑块事件合并为一次
+SLICE_INTERVAL_MS = 30
+
+
+class AxisSlicer:
+    """
+    沿坐标轴的增量切片
+
+    平面 x = c 与表面的交线就是点标量 x 的等值线。每个轴在第一次切片时建立一次坐标标量
+    和 vtkSpanSpace (按单元标量范围排序的索引)，之后移动切片只取出跨过 c 的单元，
+    不再像 vtkCutter 那样对全部点计算平面函数、遍历全部单元。
+    vtkSpanSpace 只索引当前标量，因此每个轴使用一个单独的浅拷贝 (点坐标共用)。
+    """
+
+    def __init__(self, polydata):
+        self.polydata = polydata
+        self.filters = {}
+
+    def _filter(self, axis):
+        if axis not in self.filters:
+            dataset = vtk.vtkPolyData()
+            dataset.ShallowCopy(self.polydata)
+            dataset.GetPointData().Initialize()
+            values = np.ascontiguousarray(points_as_numpy(dataset)[:, axis])
+            scalars = numpy_support.numpy_to_vtk(values, deep=False)
+            scalars.SetName(SLICE_AXIS_ARRAYS[axis])
+            dataset.GetPointData().SetScalars(scalars)
+
+            contour = vtk.vtkContourFilter()
+            contour.SetInputData(dataset)
+            contour.UseScalarTreeOn()
+            contour.SetScalarTree(vtk.vtkSpanSpace())
+            contour.ComputeScalarsOff()
+            contour.ComputeNormalsOff()
+            contour.ComputeGradientsOff()
+            self.filters[axis] = contour
+        return self.filters[axis]
+
+    def cut(self, axis, position):
+        """
+        切片平面垂直于第 axis 个坐标轴 (0, 1, 2)，位于 position
+
+        返回:
+            交线 vtkPolyData，同一个轴每次返回同一个对象 (内容已更新)
+        """
+        contour = self._filter(axis)
+        contour.SetValue(0, position)
+        contour.Update()
+        return contour.GetOutput()
+
+
+class VTKLoadWorker(QObject):
+    """
+    在后台线程中读取网格文件 (moveToThread 到 QThread 后由 started 信号调用 run)
+
+    信号在主线程的槽中处理: progress 为0..1的读取进度，finished 传出读取完成的 vtkPolyData，
+    failed 传出错误信息，cancelled 表示已取消。cancel() 可在主线程中随时调用。
+    """
+    progress = pyqtSignal(float)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_name):
+        super().__init__()
+        self.file_name = file_name
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def work(self):
+        return read_surface_polydata(self.file_name, self.progress.emit, self.is_cancelled)
+
+    def run(self):
+        try:
+            result = self.work()
+        except LoadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(result)
+
+
+class LODWorker(VTKLoadWorker):
+    """在后台线程中生成LOD表示，finished 传出 build_lod_levels 的结果，其余信号同 VTKLoadWorker"""
+
+    def __init__(self, polydata):
+        super().__init__(None)
+        # 浅拷贝: 与正在显示的模型共用数组，但不共用单元缓存等可变状态
+        self.polydata = vtk.vtkPolyData()
+        self.polydata.ShallowCopy(polydata)
+
+    def work(self):
+        return build_lod_levels(self.polydata, is_cancelled=self.is_cancelled)
+
 
 class VTKViewer(QMainWindow):
     def __init__(self):
@@ -61,7 +479,7 @@ class VTKViewer(QMainWindow):
         
         # 创建打开文件按钮
         print("Creating open file button...")
-        open_button = QPushButton("打开 VTK 文件")
+        open_button = QPushButton("打开网格文件")
         open_button.clicked.connect(self.open_file)
         file_layout.addWidget(open_button)
         
@@ -73,6 +491,18 @@ class VTKViewer(QMainWindow):
         file_group.setLayout(file_layout)
         control_layout.addWidget(file_group)
 
+        # 后台读取的进度条和取消按钮，读取时才显示
+        load_layout = QHBoxLayout()
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setVisible(False)
+        load_layout.addWidget(self.load_progress)
+        self.cancel_load_button = QPushButton("取消")
+        self.cancel_load_button.clicked.connect(self.cancel_load)
+        self.cancel_load_button.setVisible(False)
+        load_layout.addWidget(self.cancel_load_button)
+        control_layout.addLayout(load_layout)
+
         # 创建视图控制按钮组
         view_group = QGroupBox("视图控制")
         view_layout = QHBoxLayout()
@@ -121,6 +551,21 @@ class VTKViewer(QMainWindow):
         display_mode_layout.addWidget(self.display_mode)
         control_layout.addLayout(display_mode_layout)
 
+        # 交互时的LOD控制: 旋转、缩放时按目标帧时间切换到简化表示，停止交互后恢复完整模型
+        lod_layout = QHBoxLayout()
+        self.lod_checkbox = QCheckBox("交互时简化显示")
+        self.lod_checkbox.setChecked(True)
+        self.lod_checkbox.stateChanged.connect(self.update_lod_settings)
+        lod_layout.addWidget(self.lod_checkbox)
+        lod_layout.addWidget(QLabel("目标帧时间"))
+        self.frame_time_spin = QSpinBox()
+        self.frame_time_spin.setRange(5, 1000)
+        self.frame_time_spin.setSuffix(" ms")
+        self.frame_time_spin.setValue(DEFAULT_FRAME_TIME_MS)
+        self.frame_time_spin.valueChanged.connect(self.update_lod_settings)
+        lod_layout.addWidget(self.frame_time_spin)
+        control_layout.addLayout(lod_layout)
+
         # 创建切片控制组
         cutter_group = QGroupBox("切片控制")
         cutter_layout = QVBoxLayout()
@@ -222,13 +667,18 @@ class VTKViewer(QMainWindow):
         label_prop.SetJustificationToCentered()
         self.colorbar.SetLabelTextProperty(label_prop)
         
-        self.renderer.AddActor2D(self.colorbar)
+        self.renderer.AddViewProp(self.colorbar)
 
         # 初始化切片器相关变量
         self.cutter = None
         self.cutter_actor = None
-        self.plane = None
         self.bounds = None
+        # 等待执行的切片 (轴, 位置)；滑块事件只更新它，由定时器合并执行
+        self.pending_cut = None
+        self.cut_timer = QTimer(self)
+        self.cut_timer.setSingleShot(True)
+        self.cut_timer.setInterval(SLICE_INTERVAL_MS)
+        self.cut_timer.timeout.connect(self.apply_cut)
 
         # 初始化交互器
         print("Initializing interactor...")
@@ -239,6 +689,17 @@ class VTKViewer(QMainWindow):
         
         # 初始化当前actor
         self.current_actor = None
+        # 正在进行的后台读取 (QThread, VTKLoadWorker)
+        self.load_thread = None
+        self.load_worker = None
+        # 当前模型的LOD表示 (build_lod_levels 的结果) 和正在进行的LOD生成
+        self.lod_levels = None
+        self.lod_thread = None
+        self.lod_worker = None
+        # 所有已启动、尚未结束的后台线程 -> worker，包括已取消、已被新任务取代的
+        # (读取器不一定响应取消，这些线程可能仍在运行)
+        self.worker_threads = {}
+        self.update_lod_settings()
         print("VTKViewer initialization complete!")
 
     def reset_view(self):
@@ -268,14 +729,16 @@ class VTKViewer(QMainWindow):
                                        QMessageBox.Yes | QMessageBox.No, 
                                        QMessageBox.No)
             if reply == QMessageBox.Yes:
+                self.cancel_lod()
                 self.renderer.RemoveActor(self.current_actor)
                 self.current_actor = None
+                self.lod_levels = None
                 if self.cutter_actor:
                     self.renderer.RemoveActor(self.cutter_actor)
                     self.cutter_actor = None
                 self.cutter = None
-                self.plane = None
                 self.bounds = None
+                self.pending_cut = None
                 self.cutter_checkbox.setChecked(False)
                 self.show_only_slice_checkbox.setChecked(False)
                 self.vtk_widget.GetRenderWindow().Render()
@@ -346,19 +809,11 @@ class VTKViewer(QMainWindow):
         # 获取模型边界
         self.bounds = self.current_actor.GetBounds()
         
-        # 创建切割平面
-        self.plane = vtk.vtkPlane()
-        self.plane.SetNormal(1, 0, 0)  # 默认X轴方向
-        self.plane.SetOrigin((self.bounds[0] + self.bounds[1])/2, 0, 0)
-        
-        # 创建切割器
-        self.cutter = vtk.vtkCutter()
-        self.cutter.SetInputConnection(self.current_actor.GetMapper().GetInputConnection(0, 0))
-        self.cutter.SetCutFunction(self.plane)
+        # 创建切割器，各轴的索引在第一次沿该轴切片时建立
+        self.cutter = AxisSlicer(self.current_actor.GetMapper().GetInput())
         
         # 创建切割线的映射器
         cutter_mapper = vtk.vtkPolyDataMapper()
-        cutter_mapper.SetInputConnection(self.cutter.GetOutputPort())
         
         # 创建切割线的actor
         self.cutter_actor = vtk.vtkActor()
@@ -369,41 +824,55 @@ class VTKViewer(QMainWindow):
         # 添加到渲染器
         self.renderer.AddActor(self.cutter_actor)
 
+        # 按当前选择的方向在中间位置切片
+        self.update_cutter(self.direction_combo.currentIndex())
+        self.apply_cut()
+
     def update_cutter(self, index):
         """更新切片方向"""
-        if not self.plane or not self.bounds:
+        if not self.cutter or not self.bounds:
             return
             
         if index == 0:  # X轴
-            self.plane.SetNormal(1, 0, 0)
-            self.plane.SetOrigin((self.bounds[0] + self.bounds[1])/2, 0, 0)
+            self.request_cut(0, (self.bounds[0] + self.bounds[1])/2)
         elif index == 1:  # Y轴
-            self.plane.SetNormal(0, 1, 0)
-            self.plane.SetOrigin(0, (self.bounds[2] + self.bounds[3])/2, 0)
+            self.request_cut(1, (self.bounds[2] + self.bounds[3])/2)
         elif index == 2:  # Z轴
-            self.plane.SetNormal(0, 0, 1)
-            self.plane.SetOrigin(0, 0, (self.bounds[4] + self.bounds[5])/2)
-            
-        self.vtk_widget.GetRenderWindow().Render()
+            self.request_cut(2, (self.bounds[4] + self.bounds[5])/2)
 
     def update_cutter_position(self, value):
         """更新切片位置"""
-        if not self.plane or not self.bounds:
+        if not self.cutter or not self.bounds:
             return
             
         # 将滑块值(0-100)映射到模型边界范围内
         direction = self.direction_combo.currentIndex()
         if direction == 0:  # X轴
             pos = self.bounds[0] + (self.bounds[1] - self.bounds[0]) * value / 100
-            self.plane.SetOrigin(pos, 0, 0)
         elif direction == 1:  # Y轴
             pos = self.bounds[2] + (self.bounds[3] - self.bounds[2]) * value / 100
-            self.plane.SetOrigin(0, pos, 0)
         elif direction == 2:  # Z轴
             pos = self.bounds[4] + (self.bounds[5] - self.bounds[4]) * value / 100
-            self.plane.SetOrigin(0, 0, pos)
             
         self.position_label.setText(f"切片位置: {pos:.2f}")
+        self.request_cut(direction, pos)
+
+    def request_cut(self, axis, position):
+        """
+        请求一次切片。拖动滑块时事件很密集: 只记下最新的位置，定时器空闲时才启动，
+        每 SLICE_INTERVAL_MS 至多切片一次，同一时刻只有一次切片在执行
+        """
+        self.pending_cut = (axis, position)
+        if not self.cut_timer.isActive():
+            self.cut_timer.start()
+
+    def apply_cut(self):
+        """执行最新请求的切片并刷新显示"""
+        if not self.cutter or self.pending_cut is None:
+            return
+        axis, position = self.pending_cut
+        self.pending_cut = None
+        self.cutter_actor.GetMapper().SetInputData(self.cutter.cut(axis, position))
         self.vtk_widget.GetRenderWindow().Render()
 
     def change_display_mode(self, index):
@@ -481,6 +950,7 @@ class VTKViewer(QMainWindow):
                 prop.SetVertexColor(0, 0, 0)  # 黑色顶点
             
             self.current_actor.SetProperty(prop)
+            self.apply_lod_levels()
             self.vtk_widget.GetRenderWindow().Render()
 
     def update_speed(self, value):
@@ -538,39 +1008,178 @@ class VTKViewer(QMainWindow):
 
     def open_file(self):
         print("Opening file dialog...")
-        file_name, _ = QFileDialog.getOpenFileName(self, "打开 VTK 文件", "", "VTK Files (*.vtk)")
+        file_name, _ = QFileDialog.getOpenFileName(self, "打开网格文件", "",
+                                                   f"{MESH_FILE_FILTER};;VTK Files (*.vtk *.vtu);;"
+                                                   "Gmsh Files (*.msh);;FLAC3D Files (*.f3grid)")
         if file_name:
             print(f"Selected file: {file_name}")
-            self.load_vtk_file(file_name)
+            self.load_vtk_file_async(file_name)
 
-    def load_vtk_file(self, file_name):
-        print(f"Loading VTK file: {file_name}")
-        # 清除现有的 actor
-        self.renderer.RemoveAllViewProps()
+    def load_vtk_file_async(self, file_name):
+        """
+        在后台线程中读取文件，界面保持响应；读取完成后才替换当前模型，
+        读取期间显示进度条，可取消。已有读取在进行时先取消它
+        """
+        self.cancel_load()
+        print(f"Loading VTK file in background: {file_name}")
+        worker = VTKLoadWorker(file_name)
+        worker.progress.connect(self._on_load_progress)
+        worker.finished.connect(lambda polydata: self._on_load_finished(worker, polydata))
+        worker.failed.connect(lambda message: self._on_load_failed(worker, message))
+        worker.cancelled.connect(lambda: self._on_load_cancelled(worker))
+
+        self.load_worker = worker
+        self.load_thread = self._start_worker(worker)
+        self.load_progress.setValue(0)
+        self.load_progress.setVisible(True)
+        self.cancel_load_button.setVisible(True)
+
+    def _start_worker(self, worker):
+        """把 worker 移到新的QThread中运行，结束后线程和 worker 自动释放"""
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        for signal in (worker.finished, worker.failed, worker.cancelled):
+            signal.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        # 在主线程中从 worker_threads 移除后再释放线程，closeEvent 不会等待已释放的线程
+        thread.finished.connect(lambda: self._forget_thread(thread))
+        self.worker_threads[thread] = worker
+        thread.start()
+        return thread
+
+    def _forget_thread(self, thread):
+        self.worker_threads.pop(thread, None)
+        thread.deleteLater()
 
-        # 创建 VTK 读取器
-        reader = vtk.vtkPolyDataReader()
-        reader.SetFileName(file_name)
-        reader.Update()
+    def cancel_load(self):
+        """取消正在进行的后台读取，已显示的模型不变"""
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+            self._end_load(self.load_worker)
 
-        # 获取点数据
-        polydata = reader.GetOutput()
-        points = polydata.GetPoints()
-        num_points = points.GetNumberOfPoints()
+    def _end_load(self, worker):
+        """结束一次读取的界面状态；worker 已不是当前读取时忽略 (被新的读取取代)"""
+        if worker is not self.load_worker:
+            return False
+        self.load_thread = self.load_worker = None
+        self.load_progress.setVisible(False)
+        self.cancel_load_button.setVisible(False)
+        return True
 
-        # 计算每个点到原点的距离
-        distances = vtk.vtkFloatArray()
-        distances.SetName("Distances")
-        distances.SetNumberOfValues(num_points)
+    def _on_load_progress(self, value):
+        self.load_progress.setValue(int(value * 100))
+
+    def _on_load_finished(self, worker, polydata):
+        if self._end_load(worker):
+            self.show_polydata(polydata)
+            print("VTK file loaded successfully!")
+            self.compute_lod()
+
+    def _on_load_failed(self, worker, message):
+        if self._end_load(worker):
+            QMessageBox.warning(self, '错误', f'读取文件失败：\n{message}')
+
+    def _on_load_cancelled(self, worker):
+        self._end_load(worker)
+        print("VTK file loading cancelled")
+
+    def compute_lod(self):
+        """在后台生成当前模型的LOD表示，完成后交给 apply_lod_levels；模型较小时不需要"""
+        self.cancel_lod()
+        if not self.current_actor:
+            return
+        polydata = self.current_actor.GetMapper().GetInput()
+        if polydata.GetNumberOfCells() < LOD_MIN_CELLS:
+            return
+        worker = LODWorker(polydata)
+        worker.finished.connect(lambda levels: self._on_lod_finished(worker, levels))
+        worker.failed.connect(lambda message: self._on_lod_failed(worker, message))
+        worker.cancelled.connect(lambda: self._end_lod(worker))
+        self.lod_worker = worker
+        self.lod_thread = self._start_worker(worker)
 
-        for i in range(num_points):
-            point = points.GetPoint(i)
-            # 计算到原点的距离
-            distance = np.sqrt(point[0]**2 + point[1]**2 + point[2]**2)
-            distances.SetValue(i, distance)
+    def cancel_lod(self):
+        """取消正在进行的LOD生成"""
+        if self.lod_worker is not None:
+            self.lod_worker.cancel()
+            self._end_lod(self.lod_worker)
 
-        # 将距离数组添加到点数据中
-        polydata.GetPointData().SetScalars(distances)
+    def _end_lod(self, worker):
+        if worker is not self.lod_worker:
+            return False
+        self.lod_thread = self.lod_worker = None
+        return True
+
+    def _on_lod_finished(self, worker, levels):
+        if self._end_lod(worker):
+            self.lod_levels = levels
+            self.apply_lod_levels()
+            print("LOD已生成: " + ", ".join(f"{level.GetNumberOfCells()} 个单元" for level in levels['surface']))
+
+    def _on_lod_failed(self, worker, message):
+        if self._end_lod(worker):
+            print(f"生成LOD失败，交互时显示完整模型: {message}")
+
+    def apply_lod_levels(self):
+        """
+        把当前显示模式对应的LOD表示设为 vtkLODActor 的低精度映射器:
+        点云模式用抽样点云，其余模式用简化表面
+        """
+        if not isinstance(self.current_actor, vtk.vtkLODActor) or self.lod_levels is None:
+            return
+        full = self.current_actor.GetMapper()
+        lod_mappers = self.current_actor.GetLODMappers()
+        lod_mappers.RemoveAllItems()
+        kind = 'points' if self.display_mode.currentIndex() == 2 else 'surface'
+        for level in self.lod_levels[kind]:
+            mapper = vtk.vtkPolyDataMapper()
+            mapper.SetInputData(level)
+            mapper.ScalarVisibilityOn()
+            mapper.SetLookupTable(full.GetLookupTable())
+            mapper.SetScalarRange(full.GetScalarRange())
+            self.current_actor.AddLODMapper(mapper)
+        self.current_actor.Modified()
+
+    def update_lod_settings(self, *args):
+        """
+        设置交互时的目标帧时间: 交互期间渲染窗口按此分配渲染时间，vtkLODActor
+        选择估计耗时在分配时间内的最精细的表示；交互结束后按静止帧率渲染完整模型。
+        关闭时交互帧率与静止帧率相同，总是显示完整模型
+        """
+        if self.lod_checkbox.isChecked():
+            self.interactor.SetDesiredUpdateRate(1000.0 / self.frame_time_spin.value())
+        else:
+            self.interactor.SetDesiredUpdateRate(self.interactor.GetStillUpdateRate())
+        self.frame_time_spin.setEnabled(self.lod_checkbox.isChecked())
+
+    def closeEvent(self, event):
+        # 关闭窗口前取消并等待所有后台线程结束，包括已取消但仍在读取的线程
+        self.cancel_load()
+        self.cancel_lod()
+        threads = list(self.worker_threads.items())
+        for _, worker in threads:
+            worker.cancel()
+        for thread, _ in threads:
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
+
+    def load_vtk_file(self, file_name):
+        """在当前线程中读取并显示文件 (界面交互请用 load_vtk_file_async)"""
+        print(f"Loading VTK file: {file_name}")
+        self.show_polydata(read_surface_polydata(file_name))
+        print("VTK file loaded successfully!")
+
+    def show_polydata(self, polydata):
+        """用已读取的数据替换当前模型，必须在主线程中调用"""
+        # 清除现有的 actor，旧模型上的切片和LOD随之失效
+        self.cancel_lod()
+        self.lod_levels = None
+        self.renderer.RemoveAllViewProps()
+        self.cutter = self.cutter_actor = self.bounds = self.pending_cut = None
+        self.cutter_checkbox.setChecked(False)
+        distances = polydata.GetPointData().GetScalars()
 
         # 创建颜色映射表
         lut = vtk.vtkLookupTable()
@@ -586,9 +1195,11 @@ class VTKViewer(QMainWindow):
         mapper.SetLookupTable(lut)
         mapper.SetScalarRange(distances.GetRange())
         
-        # 创建 actor
-        self.current_actor = vtk.vtkActor()
+        # 创建 actor: 交互时可切换到 apply_lod_levels 设置的简化表示
+        self.current_actor = vtk.vtkLODActor()
         self.current_actor.SetMapper(mapper)
+        # LOD生成之前交互时也显示完整模型，否则 vtkLODActor 自动生成只有少量点的点云
+        self.current_actor.AddLODMapper(mapper)
         
         # 设置颜色图例
         self.colorbar.SetLookupTable(lut)
@@ -623,7 +1234,7 @@ class VTKViewer(QMainWindow):
         
         # 确保颜色图例被添加到渲染器
         if not self.renderer.HasViewProp(self.colorbar):
-            self.renderer.AddActor2D(self.colorbar)
+            self.renderer.AddViewProp(self.colorbar)
 
         # 重新添加坐标轴
         self.orientation_marker.SetEnabled(self.axes_checkbox.isChecked())
@@ -632,7 +1243,6 @@ class VTKViewer(QMainWindow):
         self.renderer.ResetCamera()
         # 刷新显示
         self.vtk_widget.GetRenderWindow().Render()
-        print("VTK file loaded successfully!")
 
 def main():
     print("Starting application...")